@@ -6,9 +6,9 @@ import logging
 from enum import auto
 from dataclasses import dataclass, field
 
-from barbarian.utils.types import StringAutoEnum
+from barbarian.utils.types import StringAutoEnum, FrozenDict
 from barbarian.entity import Entity
-from barbarian.events import Event, EventType
+from barbarian.events import Event, EventType, EventBus
 
 
 logger = logging.getLogger(__name__)
@@ -40,7 +40,17 @@ class ActionType(StringAutoEnum):
     CHANGE_LEVEL = auto()
 
 
-@dataclass()
+# Shared data for the most common actions (see `Action.move` and
+# `Action.inflict_dmg`), so that creating them doesn't allocate a new
+# dict each time. Frozen, as any action may end up holding them.
+_MOVE_DATA = {
+    (dx, dy): FrozenDict(dir=(dx, dy))
+    for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+}
+_DMG_DATA = {}
+
+
+@dataclass(slots=True)
 class Action:
     """
     Represent a game action that can be taken by any game actor.
@@ -78,35 +88,46 @@ class Action:
     processed: bool = field(init=False, repr=False, default=False)
     valid: bool = field(init=False, repr=False, default=None)
     msg: str = field(init=False, repr=False, default=None)
+    # Event bus of the game processing the action (see
+    # `Game.process_action`), result events are published to it.
+    bus: EventBus = field(init=False, repr=False, default=None)
 
     def unpack(self):
         """ Shortcut to quickly retrieve action data. """
         return self.actor, self.target, self.data
 
-    def accept(self, **kwargs):
+    def accept(self, msg="", event_data=None):
         """ Mark the action as valid and emits an `ACTION_ACCEPTED` event. """
         self.processed = True
         self.valid = True
-        self._emit_event(EventType.ACTION_ACCEPTED, **kwargs)
+        self._emit_event(EventType.ACTION_ACCEPTED, msg, event_data)
 
-    def reject(self, **kwargs):
+    def reject(self, msg="", event_data=None):
         """ Mark the action as invalid and emits an `ACTION_REJECTED` event. """
         self.processed = True
         self.valid = False
-        self._emit_event(EventType.ACTION_REJECTED, **kwargs)
+        self._emit_event(EventType.ACTION_REJECTED, msg, event_data)
 
-    def _emit_event(self, event_type, msg="", **kwargs):
+    def _emit_event(self, event_type, msg, event_data):
         """ Emit an event indicating success or failure. """
         # Store msg for testing.
         self.msg = msg
 
-        edata = kwargs.setdefault('event_data', {})
-        edata['actor'] = self.actor
-        edata['target'] = self.target
-        edata['type'] = self.type.value
+        # The event owns its data dict: fill the passed one rather
+        # than copying it.
+        if event_data is None:
+            event_data = {
+                'actor': self.actor,
+                'target': self.target,
+                'type': self.type.value,
+            }
+        else:
+            event_data['actor'] = self.actor
+            event_data['target'] = self.target
+            event_data['type'] = self.type.value
         # include action_data ?
 
-        Event.emit(event_type, msg=msg, **kwargs)
+        Event.emit(event_type, bus=self.bus, msg=msg, event_data=event_data)
 
     ### Alternate constructors ###
 
@@ -133,11 +154,26 @@ class Action:
         return cls(ActionType.ATTACK, a, t, d)
 
     @classmethod
-    def move(cls, a, d):
-        """ Short hand constructor for a MOVE actin. """
+    def move(cls, a, d=None, dir=None):
+        """
+        Short hand constructor for a MOVE actin.
+
+        Pass the (dx, dy) `dir` instead of a `d` dict to use shared data.
+
+        """
+        if d is None:
+            d = _MOVE_DATA.get(dir) or FrozenDict(dir=dir)
         return cls(ActionType.MOVE, a, None, d)
 
     @classmethod
-    def inflict_dmg(cls, a, t, d):
-        """ Short hand constructor for an INFLICT_DMG actin. """
+    def inflict_dmg(cls, a, t, d=None, dmg=None):
+        """
+        Short hand constructor for an INFLICT_DMG actin.
+
+        Pass `dmg` instead of a `d` dict to use shared data.
+
+        """
+        if d is None:
+            if (d := _DMG_DATA.get(dmg)) is None:
+                d = _DMG_DATA[dmg] = FrozenDict(dmg=dmg)
         return cls(ActionType.INFLICT_DMG, a, t, d)
@@ -2,6 +2,9 @@
 Components defining an acting entity.
 
 """
+import numpy as np
+import tcod
+
 from barbarian.components.base import Component
 
 
@@ -9,6 +12,8 @@ class Actor(Component):
     __serialize__ = True
 
     is_player: bool = False
+    # See barbarian.scheduler
+    speed: int = 100
 
 
 class Health(Component):
@@ -28,6 +33,14 @@ class Stats(Component):
 
 
 class Fov(Component):
+    """
+    Field of view.
+
+    `visible` and `explored` are boolean arrays (indexed as [y, x],
+    like the level's fov map). They're only allocated on the first
+    `compute` call, and updated in place afterwards.
+
+    """
     __serialize__ = ['range']
 
     range: int
@@ -36,8 +49,14 @@ class Fov(Component):
         self.reset()
 
     def reset(self):
-        self.visible_cells = set()
-        self.explored = set()
+        self.visible = None
+        self.explored = None
+        # Area updated by the last `compute` call
+        self._window = None
+        # (x, y, transparency version) fov was last computed for
+        self._key = None
+        # Entities in view, as of the last `spot_entities` call
+        self.spotted = set()
 
     def compute(self, level, from_x, from_y, update_level=False):
         """
@@ -45,20 +64,75 @@ class Fov(Component):
 
         (Typically, (from_x, from_y) will be the player's current position).
 
+        Fov is only computed on the part of the map within range, so
+        its cost doesn't depend on the map size (a range of 0 means an
+        unlimited range though).
+
         """
-        self.visible_cells.clear()
+        transparent = level.fov_map.transparent
+        h, w = transparent.shape
+        if self.visible is None or self.visible.shape != (h, w):
+            self.visible = np.zeros((h, w), dtype=bool)
+            self.explored = np.zeros((h, w), dtype=bool)
+        elif self._window is not None:
+            self.visible[self._window] = False
+
+        r = self.range
+        if r > 0:
+            x1, y1 = max(from_x - r, 0), max(from_y - r, 0)
+            x2, y2 = min(from_x + r + 1, w), min(from_y + r + 1, h)
+        else:
+            x1, y1, x2, y2 = 0, 0, w, h
+        self._window = slice(y1, y2), slice(x1, x2)
 
         # TODO: use settings constants.
-        level.fov_map.compute_fov(
-            from_x, from_y, radius=self.range, light_walls=True, algorithm=0)
+        visible = tcod.map.compute_fov(
+            transparent[self._window], (from_y - y1, from_x - x1),
+            radius=r, light_walls=True, algorithm=tcod.FOV_BASIC)
+
+        self.visible[self._window] = visible
+        self.explored[self._window] |= visible
+        if update_level:
+            level.explored[self._window] |= visible
+
+    def update(self, level, from_x, from_y, update_level=False):
+        """
+        Same as `compute`, unless fov was already computed from the
+        same position and the level's transparency hasn't changed
+        since, in which case the previous result is kept.
+
+        Return True if fov was actually recomputed.
 
-        for y in range(level.fov_map.height):
-            for x in range(level.fov_map.width):
-                if level.fov_map.fov[y,x]:
-                    self.visible_cells.add((x,y))
-                    self.explored.add((x, y))
-                    if update_level:
-                        level.explored.add((x,y))
+        """
+        key = (from_x, from_y, level.transparency_version)
+        if key == self._key:
+            return False
+        self.compute(level, from_x, from_y, update_level=update_level)
+        self._key = key
+        return True
 
     def is_in_fov(self, x, y):
-        return (x, y) in self.visible_cells
+        if self.visible is None:
+            return False
+        h, w = self.visible.shape
+        return 0 <= x < w and 0 <= y < h and bool(self.visible[y, x])
+
+    @property
+    def bounds(self):
+        """
+        (x, y, w, h) rect updated by the last `compute` call, or None
+        if fov hasn't been computed yet.
+
+        """
+        if self._window is None:
+            return None
+        rows, cols = self._window
+        return cols.start, rows.start, cols.stop - cols.start, rows.stop - rows.start
+
+    @property
+    def visible_cells(self):
+        """ List of visible cells, as (x, y) tuples. """
+        if self.visible is None:
+            return []
+        ys, xs = np.nonzero(self.visible)
+        return list(zip(xs.tolist(), ys.tolist()))
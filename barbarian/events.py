@@ -21,10 +21,10 @@ class EventType(StringAutoEnum):
     ACTOR_DIED = auto()
 
 
-@dataclass()
+@dataclass(slots=True)
 class Event:
     """
-    Game event & event manager via class methods.
+    Game event.
 
     A game event represent something that happened in the game, and
     to which various systems (or the client) can react. They differ
@@ -32,9 +32,10 @@ class Event:
     trigger some other actions, they're used to represent a deed's
     results, rather than its intent (which is what Actions are for).
 
-    Events are stored both in a queue, (polled by internal systems) and
-    in a log (sent to the client, and which may decide to keep track
-    of some milestone events).
+    Events are published to the emitting game's event bus (see
+    `EventBus`), which internal systems subscribe to, and which also
+    stores them in a log (sent to the client, and which may decide to
+    keep track of some milestone events).
 
     Event flags:
 
@@ -49,9 +50,6 @@ class Event:
 
     """
 
-    _QUEUE = []
-    _LOG = {}
-
     type: EventType
     msg: str = ''
     data: dict = field(default_factory=dict)
@@ -61,64 +59,137 @@ class Event:
     internal: bool = False      # Not used right now
 
     @classmethod
-    def emit(cls, *args, **kwargs):
-        """ Create an event with the passed arguments and store it """
-        kwargs['data'] = kwargs.pop('event_data', {}) or kwargs.pop('data', {})
-        e = cls(*args, **kwargs)
-        cls._QUEUE.append(e)
-        cls._LOG.setdefault('current', []).append(e)
+    def emit(cls, *args, bus=None, event_data=None, data=None, **kwargs):
+        """
+        Create an event with the passed arguments, and publish it to
+        `bus` (the emitting game's `EventBus`) if passed.
+
+        """
+        e = cls(*args, data=event_data or data or {}, **kwargs)
+        if bus is not None:
+            bus.publish(e)
         return e
 
-    @classmethod
-    @property
-    def queue(cls):
-        return cls._QUEUE
+    def serialize(self):
+        return {
+            'type': self.type.value,
+            'msg': self.msg,
+            'data': {
+                k: v.serialize() if hasattr(v, 'serialize') else v
+                for k, v in self.data.items()
+            },
+        }
 
-    @classmethod
-    def clear_queue(cls):
-        logger.debug('Clearing %d events from the queue', len(cls._QUEUE))
-        cls._QUEUE.clear()
 
-    @classmethod
-    def flush_log(cls, tick):
+class EventBus:
+    """
+    Per game event dispatcher.
+
+    Emitted events are stored by type (see `Event.emit`: the game
+    hands its bus to the actions it processes, which pass it on to
+    whatever emits events on their behalf). Systems subscribe to the
+    types they care about, and poll their subscription to get the
+    events emitted since their last poll, so that they only ever look
+    at relevant events, and only once.
+
+    The game clears its bus at the end of each turn.
+
+    Published events are also stored in a log, which outlives turns:
+    current events are kept until flushed (see `flush_log`), and non
+    transient ones are then kept by tick.
+
+    """
+    def __init__(self):
+        # EventType -> events of that type, in emission order
+        self._events = {}
+        self._subscriptions = []
+        # 'current' or tick -> logged events
+        self._log = {}
+
+    def __len__(self):
+        """ Number of events published since the last `clear`. """
+        return sum(len(events) for events in self._events.values())
+
+    def publish(self, event):
+        if (events := self._events.get(event.type)) is None:
+            self._events[event.type] = [event]
+        else:
+            events.append(event)
+        self._log.setdefault('current', []).append(event)
+
+    def subscribe(self, *event_types):
+        """ Return a new `Subscription` to `event_types`. """
+        sub = Subscription(self, event_types)
+        self._subscriptions.append(sub)
+        return sub
+
+    def clear(self):
+        """
+        Drop all events (and rewind subscriptions accordingly). The log
+        is left alone.
+
+        """
+        self._events.clear()
+        for sub in self._subscriptions:
+            sub.rewind()
+
+    def flush_log(self, tick):
         """
         Clear current events from the log, and re-store the non-transient
         ones, using the current tick as an index.
 
         """
-        current_events = cls._get_current()
+        current_events = self._get_current()
         if not current_events:
             return
 
         filtered = [e for e in current_events if not e.transient]
         if filtered:
-            cls._LOG[tick] = filtered
+            self._log[tick] = filtered
 
-        logger.debug('Events logged for turn %d: %d', tick, len(current_events))
+        logger.debug(
+            'Events logged for turn %d: %d', tick, len(current_events))
         current_events.clear()
 
-    @classmethod
-    def _get_current(cls):
-        return cls._LOG.get('current', [])
+    def _get_current(self):
+        return self._log.get('current', [])
 
-    @classmethod
-    def get_current_events(cls, current_tick, flush=False):
+    def get_current_events(self, current_tick, flush=False):
         """
         Return events logged for the current turn, and flush the log
         if requested.
 
         """
-        events = cls._get_current()[:]
+        events = self._get_current()[:]
         if flush:
-            cls.flush_log(current_tick)
+            self.flush_log(current_tick)
         return events
 
-    def serialize(self):
-        return {
-            'type': self.type.value,
-            'msg': self.msg,
-            'data': {
-                k: v.serialize() if hasattr(v, 'serialize') else v
-                for k, v in self.data.items()
-            },
-        }
+
+class Subscription:
+    """
+    Cursor over an `EventBus`, for a set of event types.
+
+    """
+    def __init__(self, bus, event_types):
+        self._bus = bus
+        # EventType -> number of events of that type already polled
+        self._cursors = dict.fromkeys(event_types, 0)
+
+    def rewind(self):
+        for t in self._cursors:
+            self._cursors[t] = 0
+
+    def poll(self):
+        """
+        Return events emitted since the last poll, grouped by type (in
+        subscription order) and in emission order for each type.
+
+        """
+        new = []
+        events = self._bus._events
+        for t, cursor in self._cursors.items():
+            if (typed := events.get(t)) is not None and len(typed) > cursor:
+                new.extend(typed[cursor:])
+                self._cursors[t] = len(typed)
+        return new
@@ -11,14 +11,20 @@ from barbarian.state import GameState
 from barbarian.world import World
 from barbarian.spawn import spawn_player
 from barbarian.actions import Action, ActionType, ActionError
-from barbarian.events import Event, EventType
+from barbarian.events import EventType, EventBus
+from barbarian.scheduler import action_cost
 from barbarian.utils.rng import Rng
+from barbarian.utils.timing import Timings
 
-from barbarian.settings import MAP_W, MAP_H, MAP_DEBUG, LOGCONFIG
+from barbarian.settings import (
+    MAP_W, MAP_H, MAP_DEBUG, LOGCONFIG, TIME_SYSTEMS)
 
 
 logger = logging.getLogger(__name__)
 
+# Timings names for action handlers (see `Game.process_action`)
+ACTION_TIMINGS = {t: f'action.{t.value}' for t in ActionType}
+
 
 class EndTurn(Exception):
     """
@@ -37,13 +43,23 @@ class Game:
     Manages the game loop and handle client requests and responses.
 
     """
-    def __init__(self):
+    def __init__(self, headless=False, timings=TIME_SYSTEMS):
         self.is_running = False
         self.ticks = 1
         self.world = None
         self.player = None
 
         self.gameloop = None
+        # Actions chosen by the ai for the current turn, and the
+        # player's position when they were (see chose_action)
+        self.ai_actions = {}
+        self.ai_planned_for = None
+        self.events = EventBus()
+        self.deaths = self.events.subscribe(EventType.ACTOR_DIED)
+        # Headless games skip gamestate updates (see `barbarian.headless`)
+        self.headless = headless
+        # Per system timings (see `timed`), disabled if None.
+        self.timings = Timings() if timings else None
         self.init_game()
 
         self.state = GameState()
@@ -56,7 +72,19 @@ class Game:
     @property
     def actors(self):
         """ Shotcut """
-        return self.current_level.actors.all[:]
+        return self.current_level.actors.all
+
+    @property
+    def pathmap_stats(self):
+        """ Dijkstra map cache counters for the current level. """
+        return self.current_level.pathmaps.stats
+
+    @property
+    def timings_report(self):
+        """ Per system timings, or None if they're disabled. """
+        if self.timings is None:
+            return None
+        return self.timings.report()
 
     @property
     def gs(self):
@@ -96,7 +124,8 @@ class Game:
 
         self.world = World(MAP_W, MAP_H)
         self.init_level()
-        self.state.update(self)
+        if not self.headless:
+            self.state.update(self)
 
         self.start_gameloop()
 
@@ -136,8 +165,11 @@ class Game:
         """
         Main loop.
 
-        Iterate over all actors, have them chose an action, process it,
-        and handle game events.
+        Iterate over active actors (see `Level.update_activity`) as
+        they're due to act (see `barbarian.scheduler`), have them chose
+        an action, process it, and handle game events. Acting pushes
+        back the actor's next turn depending on the action and its
+        speed.
 
         If the chosen action is of type `REQUEST_INPUT`, this will
         yield and wait for input (ie: player turn) (see `take_turn`).
@@ -150,18 +182,31 @@ class Game:
         while self.is_running:
             # Pre acting "static" stuff (increment hunger, process
             # status effects, etc...)
-            pass
+            level = self.current_level
+            # Only actors around the player get to act
+            self.timed(
+                'activity', level.update_activity,
+                self.player.pos.x, self.player.pos.y)
+            actors = level.active_actors
+            self.timed('fovs', level.update_fovs, actors)
+            self.plan_ai(actors)
 
             # Game actions
             try:
-                for actor in self.actors:
-                    yield from self.take_turn(actor)
-                    self.handle_events()
+                for actor in level.scheduler.turn():
+                    action = None
+                    try:
+                        action = yield from self.take_turn(actor)
+                    finally:
+                        level.scheduler.reschedule(
+                            actor, action_cost(action, actor.actor.speed))
+                    self.timed('handle_events', self.handle_events)
             except EndTurn:
+                level.scheduler.end_turn()
                 logger.debug("Turn ended prematurely")
 
             # Post acting stuff that should happen at the end of a turn
-            Event.clear_queue()
+            self.events.clear()
 
             self.ticks += 1
             logger.debug('tick: %d', self.ticks)
@@ -177,31 +222,70 @@ class Game:
         If a max recusrion error is catched, we simply abort the turn
         for this entity.
 
+        Return the action actually performed (not the ones it led to),
+        or None if the turn was aborted.
+
         """
-        if (action := self.chose_action(actor)) is None:
-            return
+        # Outside of the chose_action span, so that planning time isn't
+        # counted twice.
+        self.update_ai_plans()
+        action = self.timed('chose_action', self.chose_action, actor)
+        if action is None:
+            return None
 
         # Player action: wait for input
         if action.type == ActionType.REQUEST_INPUT:
-            self.state.update(self)
+            if self.headless:
+                # Nobody's there to read the log
+                self.events.flush_log(self.ticks)
+            else:
+                self.timed('state_update', self.state.update, self)
             action = yield
 
         # Loop until action is processed (so that processing can return
         # a new action).
+        performed = action
         while not action.processed:
             try:
                 action = self.process_action(action)
             except ActionError as e:
                 logger.exception(e)
-                return
+                return None
             # Invalid action: request a new one.
             if action.processed and not action.valid:
                 try:
-                    yield from self.take_turn(actor)
+                    return (yield from self.take_turn(actor))
                 except RecursionError:
                     logger.critical(
                         "Maximum recursion limit reached while trying "
                         "to proccess action: %s", action)
+                    return None
+        return performed
+
+    def timed(self, name, func, *args):
+        """
+        Call `func` with `args`, recording how long it took under `name`
+        if timings are enabled.
+
+        """
+        if self.timings is None:
+            return func(*args)
+        return self.timings.time(name, func, *args)
+
+    def plan_ai(self, actors):
+        """ Plan actions for `actors` (see `systems.ai.plan_turn`). """
+        self.ai_actions = self.timed('ai', systems.ai.plan_turn, self, actors)
+        self.ai_planned_for = self.player.pos.x, self.player.pos.y
+
+    def update_ai_plans(self):
+        """
+        Plans are outdated once the player has moved: plan again for
+        actors who haven't acted yet if so.
+
+        """
+        if (self.ai_actions and
+                self.ai_planned_for != (self.player.pos.x, self.player.pos.y)):
+            self.plan_ai(self.ai_actions.keys())
 
     def chose_action(self, actor):
         """
@@ -210,6 +294,14 @@ class Game:
         Said ai is respnsible for returning an input request if `actor`
         id the player.
 
+        Non player actors use the action planned for them at the start
+        of the turn (see `systems.ai.plan_turn`) if there is one. If
+        it was rejected, they chose a new one on the spot.
+
+        Plans are refreshed before this is called if the player has
+        moved (see `update_ai_plans`). An actor whose planned move is
+        now blocked choses on the spot as well.
+
         """
         # If the actor died earlier in the turn, then the level should
         # have removed it from its internal list already, while we're
@@ -218,7 +310,11 @@ class Game:
             if not actor.health.is_dead:
                 logger.warning('actor %s does not belong to the current level', actor)
             return
-        return systems.ai.tmp_ai(actor, self)
+        if (action := self.ai_actions.pop(actor, None)) is None:
+            return systems.ai.tmp_ai(actor, self)
+        if systems.ai.is_blocked(action, self):
+            return systems.ai.tmp_ai(actor, self)
+        return action
 
     def process_action(self, action):
         """
@@ -230,9 +326,30 @@ class Game:
         Logs a warning if `action` could not be processed and keeps
         going.
 
+        Handlers are timed by action type if timings are enabled.
+
+        Events emitted while processing `action` are published to this
+        game's event bus.
+
         """
         logger.debug('Processing action: %s', action)
+        action.bus = self.events
+
+        if self.timings is None:
+            new_action = self._dispatch_action(action)
+        else:
+            new_action = self.timings.time(
+                ACTION_TIMINGS[action.type], self._dispatch_action, action)
 
+        if new_action is None and not action.processed:
+            logger.warning(
+                'action of type %s could not be processed', action.type)
+            action.reject()
+
+        return new_action or action
+
+    def _dispatch_action(self, action):
+        """ Call the system handling `action` and return its result. """
         new_action = None
 
         match action.type:
@@ -263,31 +380,27 @@ class Game:
                     raise EndTurn
 
             case ActionType.ATTACK:
-                new_action = systems.combat.attack(action)
+                new_action = systems.combat.attack(action, self.current_level)
 
             case ActionType.INFLICT_DMG:
                 new_action = systems.stats.inflict_damage(action)
 
-        if new_action is None and not action.processed:
-            logger.warning(
-                'action of type %s could not be processed', action.type)
-            action.reject()
-
-        return new_action or action
+        return new_action
 
     def handle_events(self):
-        """ Process game events. """
-        for e in Event.queue:
-            if e.processed:
-                continue
-            if e.type == EventType.ACTOR_DIED:
-                dead_actor = e.data['actor']
-                # If we want a godmode, simply bypass this
-                if dead_actor == self.player:
-                    self.is_running = False
-                    raise EndTurn
-                e.processed = True
-                self.current_level.actors.remove_e(dead_actor)
+        """
+        Process game events emitted since the last call (see
+        `events.EventBus`).
+
+        """
+        for e in self.deaths.poll():
+            dead_actor = e.data['actor']
+            # If we want a godmode, simply bypass this
+            if dead_actor == self.player:
+                self.is_running = False
+                raise EndTurn
+            e.processed = True
+            self.current_level.remove_entity('actors', dead_actor)
 
     ### NETWORK ###
     ###############
@@ -334,7 +447,7 @@ class Game:
         except StopIteration:
             # Gameloop was aborted: yield the current gamestate so that
             # the client can know what happened
-            self.state.update(self)
+            self.timed('state_update', self.state.update, self)
             return self.response('OK', gamestate=self.gs)
         except ActionError as e:
             msg = e.args[0]
@@ -1,7 +1,10 @@
+import numpy as np
+
 from barbarian.utils.rng import Rng
 from barbarian.utils.geometry import Rect
 from barbarian.utils.noise import get_cellular_voronoi_noise_generator
-from barbarian.utils.structures.dijkstra import DijkstraGrid
+from barbarian.utils.structures.grid import count_neighbors
+from barbarian.utils.structures.dijkstra import ArrayDijkstraGrid
 from barbarian.genmap.common import BaseMapBuilder
 from barbarian.map import TileType
 
@@ -256,35 +259,39 @@ class CellularAutomataMapBuilder(BaseMapBuilder):
     def build(self, depth):
 
         # Random walls and floors
+        #
+        # Map borders are left as walls, and rolls are made in the
+        # same (row major) order as when iterating over the map, so
+        # that a given seed always yields the same cave.
 
-        for x, y, _ in self.map:
-            if not self.map.in_bounds(x, y, border_width=1):
-                continue
-            if Rng.dungeon.randint(1, 100) > self.WALL_CHANCE:
-                self.map[x,y] = TileType.FLOOR
-            else:
-                self.map[x,y] = TileType.WALL
+        w, h = self.map.w, self.map.h
+        rolls = [
+            Rng.dungeon.randint(1, 100) for _ in range((w - 2) * (h - 2))]
 
-        self.take_snapshot(self.map)
+        walls = np.ones((h, w), dtype=bool)
+        walls[1:-1, 1:-1] = (
+            np.array(rolls).reshape(h - 2, w - 2) <= self.WALL_CHANCE)
 
-        # Apply cellular algotithm
+        self.snapshot_walls(walls)
 
+        # Apply cellular algotithm
+        #
+        # A cell becomes a wall if it has no wall neighbors or more
+        # than 4 of them.
+        # Passes alternate between two buffers rather than copying the
+        # map every time.
+
+        back_buffer = walls.copy()
+        counts = np.zeros((h, w), dtype=np.uint8)
         for _ in range(self.SMOOTHING_PASSES):
-            map_copy = self.map.copy()
-
-            for x, y, c in self.map:
-                if not self.map.in_bounds(x, y, border_width=1):
-                    continue
-                wall_neighbors = list(self.map.get_neighbors(
-                    x, y, predicate=lambda _, __, c: c == TileType.WALL))
+            count_neighbors(walls, out=counts)
+            inner = counts[1:-1, 1:-1]
+            np.logical_or(
+                inner == 0, inner > 4, out=back_buffer[1:-1, 1:-1])
+            walls, back_buffer = back_buffer, walls
+            self.snapshot_walls(walls)
 
-                if not wall_neighbors or len(wall_neighbors) > 4:
-                    map_copy[x,y] = TileType.WALL
-                else:
-                    map_copy[x,y] = TileType.FLOOR
-
-            self.map = map_copy
-            self.take_snapshot(self.map)
+        self.map.apply_wall_mask(walls)
 
         # Will be needed for the next step, so let's go ahead
         # and store it to avoid recomputing it later
@@ -293,37 +300,39 @@ class CellularAutomataMapBuilder(BaseMapBuilder):
         # Cull unreachable areas and place the exit as far from the
         # start as possible
 
-        cur_dist = 0
-        self.exit_pos = (0, 0)
+        self.cull_unreachable(*self.start_pos)
+        walls = self.map.wall_mask()
 
-        dg = DijkstraGrid.new(
+        dg = ArrayDijkstraGrid.new(
             self.map.w, self.map.h,
             self.start_pos,
-            predicate=lambda x, y, _: self.map[x,y] != TileType.WALL)
-
-        for x, y, dist_to_start in dg:
-            if self.map.cell_blocks(x, y):
-                continue
-            if dist_to_start == dg.inf:
-                # Can't reach (x,y), so make it a wall
-                self.map[x, y] = TileType.WALL
-            elif dist_to_start > cur_dist:
-                # Push exit further and further from the start
-                self.exit_pos = (x, y)
-                cur_dist = dist_to_start
+            passable=~walls)
+
+        # First farthest cell (in row major order)
+        distances = np.where(walls, -1, dg.array)
+        exit_idx = int(np.argmax(distances))
+        if distances.flat[exit_idx] > 0:
+            self.exit_pos = (exit_idx % self.map.w, exit_idx // self.map.w)
+        else:
+            self.exit_pos = (0, 0)
 
         self.take_snapshot(self.map)
 
         # Create spawn zones
         noise = get_cellular_voronoi_noise_generator(Rng.dungeon)
-        for x, y, c in self.map:
-            if not self.map.in_bounds(x, y, border_width=1):
-                continue
+        for x, y, c in self.map.iter_rect(
+                1, 1, self.map.w - 2, self.map.h - 2):
             if c == TileType.FLOOR:
                 fnoise_val = noise.get_noise(float(x), float(y))
                 noise_val = int(fnoise_val * 10240.0)
                 self.noise_areas.setdefault(noise_val, []).append((x, y))
 
+    def snapshot_walls(self, walls):
+        """ Debug helper: snapshot the map as described by `walls`. """
+        if self.debug:
+            self.map.apply_wall_mask(walls)
+            self.take_snapshot(self.map)
+
     def get_starting_position(self):
         if self.start_pos:
             return self.start_pos
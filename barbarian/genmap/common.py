@@ -1,4 +1,4 @@
-from barbarian.map import Map, TileType
+from barbarian.map import Map, TileType, WALL
 
 
 class BaseMapBuilder:
@@ -41,6 +41,21 @@ class BaseMapBuilder:
             if m.in_bounds(x, y):
                 m[x, y] = TileType.FLOOR
 
+    def cull_unreachable(self, x, y):
+        """
+        Turn all floor cells which can't be reached from (x, y) into
+        walls.
+
+        Raise a ValueError if (x, y) itself is blocked, as everything
+        would be culled.
+
+        """
+        labels, _ = self.map.label_regions()
+        if (start_label := labels[y, x]) == 0:
+            raise ValueError(
+                f"Can't cull unreachable cells from blocked cell {x, y}")
+        self.map.array[(labels > 0) & (labels != start_label)] = WALL
+
     def get_starting_position(self):
         return self.map.rooms[0].center
 
@@ -61,6 +76,7 @@ class BaseMapBuilder:
     def build_map(self, w, h, depth):
         self.map = Map(w, h, [TileType.WALL for _ in range(w * h)])
         self.build(depth)
+        self.map.compute_regions()
         return self.map
 
     def build(self, dpeth):
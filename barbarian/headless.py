@@ -0,0 +1,193 @@
+"""
+Headless games, where the player is controlled by a bot.
+
+Used to simulate whole runs without a client (soak testing,
+benchmarking...):
+
+    >>> report = run(ExplorerBot(), n_turns=1000, seed='1234')
+
+Runs only depend on their seed, so they can be spread over several
+processes (see `run_batch` and bin/simulate.py).
+
+"""
+import logging
+import traceback
+import multiprocessing
+from time import perf_counter
+
+from barbarian.actions import Action, ActionType
+from barbarian.events import EventType
+from barbarian.game import Game
+from barbarian.systems.movement import hostiles_in_view
+from barbarian.utils.structures.grid import Grid
+from barbarian.utils.timing import Timings
+
+
+class ExplorerBot:
+    """
+    Default player policy:
+
+    - attack adjacent monsters, or go after the ones in view (the
+      game won't let the player explore while they're around),
+    - take the stairs down once they're known and reachable,
+    - otherwise explore,
+    - wait a turn if its last action was rejected (so that we don't
+      keep sending the same invalid action over and over).
+
+    Policies are callables taking the game and returning the player's
+    next action.
+
+    """
+    def __init__(self):
+        self.last_action = None
+
+    def __call__(self, game):
+        player, level = game.player, game.current_level
+        last = self.last_action
+        if last is not None and last.processed and not last.valid:
+            action = Action(ActionType.IDLE, player)
+        else:
+            action = (
+                self.fight(player, level) or
+                self.descend(player, level) or
+                Action(ActionType.XPLORE, player)
+            )
+        self.last_action = action
+        return action
+
+    @classmethod
+    def fight(cls, player, level):
+        """
+        Attack the first adjacent actor, if any, or step towards the
+        closest visible ones.
+
+        """
+        x, y = player.pos.x, player.pos.y
+        for dx, dy in Grid.ALL_DIRS:
+            if not level.map.in_bounds(x + dx, y + dy):
+                continue
+            if level.actors[x + dx, y + dy]:
+                return Action.move(player, dir=(dx, dy))
+        if hostiles := hostiles_in_view(player, level):
+            return cls.step_towards(
+                player, level, [(a.pos.x, a.pos.y) for a in hostiles])
+        return None
+
+    @classmethod
+    def descend(cls, player, level):
+        """
+        Use the stairs down if the player stands on them, or step
+        towards the closest explored ones.
+
+        (Stairs may be spawned inside walls, those are ignored.)
+
+        """
+        x, y = player.pos.x, player.pos.y
+        stairs = [
+            (p.pos.x, p.pos.y) for p in level.props.all
+            if p.usable and p.usable.use_key == 'down' and
+            level.explored[p.pos.y, p.pos.x] and
+            not level.map.cell_blocks(p.pos.x, p.pos.y)
+        ]
+        if not stairs:
+            return None
+        if (x, y) in stairs:
+            return Action(
+                ActionType.USE_PROP, player, data={'use_key': 'down'})
+        return cls.step_towards(player, level, stairs)
+
+    @staticmethod
+    def step_towards(player, level, goals):
+        """
+        Move one step towards the closest of `goals`, or return None if
+        none can be reached.
+
+        """
+        x, y = player.pos.x, player.pos.y
+        pathmap = level.get_pathmap(
+            *goals, ignore_actors=True, ignore_openable=True)
+        destx, desty, destc = min(
+            pathmap.get_neighbors(x, y), key=lambda t: t[2])
+        if destc == pathmap.inf:
+            return None     # Unreachable
+        return Action.move(player, dir=(destx - x, desty - y))
+
+
+def run(policy=None, n_turns=1000, seed='', game=None):
+    """
+    Play a headless game for `n_turns` turns (or until the player
+    dies), letting `policy` (an `ExplorerBot` by default) chose the
+    player's actions.
+
+    Return a json friendly report dict.
+
+    """
+    policy = policy or ExplorerBot()
+    game = game or Game(headless=True)
+    game.headless = True
+    game.timings = timings = Timings()
+    # Leftovers from a previous game
+    game.events.flush_log(0)
+
+    start = perf_counter()
+    game.start_game(seed=seed)
+    try:
+        while game.is_running and game.ticks <= n_turns:
+            action = timings.time('policy', policy, game)
+            game.gameloop.send(action)
+    except StopIteration:
+        pass
+    elapsed = perf_counter() - start
+
+    turns = game.ticks - 1
+    levels = game.world.current_depth
+    return {
+        'seed': seed,
+        'turns': turns,
+        'depth': levels,
+        'dead': game.player.health.is_dead,
+        'cause_of_death': cause_of_death(game),
+        'elapsed': elapsed,
+        'turns_per_sec': turns / elapsed,
+        'levels_per_sec': levels / elapsed,
+        'timings': timings.report(),
+    }
+
+
+def cause_of_death(game):
+    """ Name of whatever killed the player, or None. """
+    if not game.player.health.is_dead:
+        return None
+    for e in game.events.get_current_events(game.ticks):
+        if (e.type == EventType.ACTOR_DIED and
+                e.data['actor'] == game.player):
+            return e.data['slayer'].name
+    return 'unknown'
+
+
+def _run_one(args):
+    seed, n_turns = args
+    try:
+        return run(n_turns=n_turns, seed=seed)
+    except Exception:   # Don't let one crash bring the whole batch down
+        return {'seed': seed, 'error': traceback.format_exc()}
+
+
+def _init_worker():
+    # Spawn warnings & co would drown the output
+    logging.disable(logging.WARNING)
+
+
+def run_batch(seeds, n_turns=1000, processes=None):
+    """
+    Play one headless game per seed over a pool of `processes` worker
+    processes (defaults to the number of cpus), with the default
+    policy.
+
+    Yield reports (see `run`) as runs complete, so *not* in `seeds`
+    order. Crashed runs yield a {'seed', 'error'} dict instead.
+
+    """
+    jobs = [(seed, n_turns) for seed in seeds]
+    with multiprocessing.Pool(processes, initializer=_init_worker) as pool:
+        yield from pool.imap_unordered(_run_one, jobs)
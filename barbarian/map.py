@@ -5,24 +5,106 @@ Sepcialized grid to hold map data.
 from enum import Enum
 import logging
 
-from barbarian.utils.structures.grid import Grid, OutOfBoundGridError
+import numpy as np
+
+from barbarian.utils.structures.grid import (
+    ArrayGrid, OutOfBoundGridError, count_neighbors, label_regions)
 
 
 logger = logging.getLogger(__name__)
 
 
 class TileType(Enum):
-    """ Type for a map cell. """
+    """
+    Type for a map cell.
+
+    Values are the tile glyphs. Maps store tiles as integer codes (see
+    `TILE_TABLE`), TileType members are only a view on them.
+
+    """
     FLOOR = '.'
     WALL = '#'
 
+    @property
+    def code(self):
+        return TILE_CODES[self]
+
+    @property
+    def blocks(self):
+        return bool(TILE_BLOCKS[self.code])
+
+    @property
+    def blocks_sight(self):
+        return bool(TILE_BLOCKS_SIGHT[self.code])
+
+    @property
+    def glyph(self):
+        return self.value
+
+
+# Tile properties, indexed by tile code (ie the row index).
+# A new tile type only needs a TileType member and a row here.
+TILE_TABLE = (
+    # type              blocks  blocks_sight
+    (TileType.FLOOR,    False,  False),
+    (TileType.WALL,     True,   True),
+)
+
+TILE_TYPES = tuple(tt for tt, _, __ in TILE_TABLE)
+TILE_CODES = {tt: code for code, tt in enumerate(TILE_TYPES)}
+TILE_BLOCKS = np.array([b for _, b, __ in TILE_TABLE], dtype=bool)
+TILE_BLOCKS_SIGHT = np.array([b for _, __, b in TILE_TABLE], dtype=bool)
+TILE_GLYPHS = np.array([ord(tt.glyph) for tt in TILE_TYPES], dtype=np.uint8)
+
+FLOOR = TileType.FLOOR.code
+WALL = TileType.WALL.code
+
+
+def wall_bitmasks(walls):
+    """
+    Compute the wall bitmasks (see `Map.get_bitmask`) from a boolean
+    wall mask (indexed as [y, x]).
+
+    `walls` must include 2 extra cells of context on each side (out of
+    bounds cells should be set as walls); bitmasks are returned for
+    the inner cells only.
+
+    """
+    h, w = walls.shape[0] - 4, walls.shape[1] - 4
+    # Room borders: walls with at least one non wall neighbor.
+    border = walls & (count_neighbors(~walls) > 0)
+    border = border.view(np.uint8)
+    mask = border[1:h + 1, 2:w + 2].copy()     # N
+    mask |= border[3:h + 3, 2:w + 2] << 1       # S
+    mask |= border[2:h + 2, 1:w + 1] << 2       # W
+    mask |= border[2:h + 2, 3:w + 3] << 3       # E
+    return mask
+
+
+class BitmaskGrid(ArrayGrid):
+    """ Array backed grid storing the wall bitmasks of a map. """
+
+    dtype = np.uint8
+    fill_value = 0
+
 
-class Map(Grid):
-    """ Specialized Grid to represent map of a game level. """
+class Map(ArrayGrid):
+    """
+    Specialized Grid to represent map of a game level.
 
-    BLOCKING_TILE_TYPES = (
-        TileType.WALL,
-    )
+    Cells are stored as tile codes (see `TILE_TABLE`) in a uint8 array,
+    but accessing or iterating over cells still returns `TileType`
+    members. Use `array` (or the mask methods) to work on the codes
+    directly.
+
+    """
+
+    dtype = np.uint8
+    fill_value = WALL
+
+    BLOCKING_TILE_TYPES = tuple(tt for tt in TILE_TYPES if tt.blocks)
+
+    bitmask_grid_cls = BitmaskGrid
 
     def __init__(self, *args, **kwargs):
         self.rooms = []
@@ -32,6 +114,64 @@ class Map(Grid):
 
         super().__init__(*args, **kwargs)
 
+    @classmethod
+    def _to_array(cls, width, height, cells):
+        if not isinstance(cells, np.ndarray):
+            # Accept both TileType members and tile codes
+            cells = [TILE_CODES.get(c, c) for c in cells]
+        return super()._to_array(width, height, cells)
+
+    @property
+    def cells(self):
+        """
+        Flat (row major) tuple of the cells, as TileType members.
+
+        This is a read only snapshot (cells are stored as codes in
+        `array`): use `set_cell` / `map[x, y] = ...`, or assign the
+        whole property to modify them.
+
+        """
+        return tuple(TILE_TYPES[c] for c in self.array.reshape(-1).tolist())
+
+    @cells.setter
+    def cells(self, cells):
+        self.array = self._to_array(self.w, self.h, cells)
+
+    def get_cell(self, x, y):
+        if not (0 <= x < self.w and 0 <= y < self.h):
+            raise OutOfBoundGridError(x, y)
+        return TILE_TYPES[self.array.item(y, x)]
+
+    def set_cell(self, x, y, v):
+        if not (0 <= x < self.w and 0 <= y < self.h):
+            raise OutOfBoundGridError(x, y)
+        # Same as _to_array: both TileType members and codes are fine
+        self.array[y, x] = TILE_CODES.get(v, v)
+
+    def _row(self, y, x1, x2):
+        return [TILE_TYPES[c] for c in self.array[y, x1:x2].tolist()]
+
+    def iter_rows(self):
+        for y, row in enumerate(self.array.tolist()):
+            yield y, [TILE_TYPES[c] for c in row]
+
+    def values_in_rect(self, x, y, w, h):
+        x1, y1, x2, y2 = self._clip_rect(x, y, w, h)
+        return [
+            TILE_TYPES[c]
+            for c in self.array[y1:y2, x1:x2].reshape(-1).tolist()]
+
+    def iter_where(self, where):
+        if callable(where):
+            return super().iter_where(where)
+        ys, xs = self._mask_nonzero(where)
+        return zip(
+            xs.tolist(), ys.tolist(),
+            [TILE_TYPES[c] for c in self.array[ys, xs].tolist()])
+
+    def tolist(self):
+        return list(self.cells)
+
     def in_bounds(self, x, y, border_width=0):
         """
         Return whether (x, y) falls outside the map's bounds.
@@ -52,13 +192,91 @@ class Map(Grid):
         occupy the cell (This check is the Level's job).
 
         """
-        return self.get_cell(x, y) in self.BLOCKING_TILE_TYPES
+        if not (0 <= x < self.w and 0 <= y < self.h):
+            raise OutOfBoundGridError(x, y)
+        return bool(TILE_BLOCKS[self.array[y, x]])
+
+    def cell_blocks_sight(self, x, y):
+        """ Return whether the passed in cell should block sight. """
+        if not (0 <= x < self.w and 0 <= y < self.h):
+            raise OutOfBoundGridError(x, y)
+        return bool(TILE_BLOCKS_SIGHT[self.array[y, x]])
+
+    def mask(self, predicate):
+        """
+        Return a boolean array (indexed as [y, x]) of the cells for
+        which predicate(cell) is True.
+
+        `predicate` is only called once per tile type.
+
+        """
+        lookup = np.array([predicate(tt) for tt in TILE_TYPES], dtype=bool)
+        return lookup[self.array]
+
+    def blocking_mask(self):
+        """
+        Return a boolean array (indexed as [y, x]) of the cells blocking
+        movement (ie `cell_blocks` for the whole map).
+
+        """
+        return TILE_BLOCKS[self.array]
+
+    def transparency_mask(self):
+        """
+        Return a boolean array (indexed as [y, x]) of the cells which
+        don't block sight.
+
+        """
+        return ~TILE_BLOCKS_SIGHT[self.array]
+
+    def wall_mask(self):
+        """ Return a boolean array (indexed as [y, x]) of the wall cells. """
+        return self.array == WALL
+
+    def apply_wall_mask(self, walls):
+        """
+        Turn cells into walls where the boolean array `walls` is set,
+        and into floor everywhere else.
+
+        """
+        self.array[:] = np.where(walls, WALL, FLOOR)
 
     def compute_bitmask_grid(self):
         """ Build a bitmask grid of the map cells. Used for rendering. """
-        self.bitmask_grid = Grid(self.w, self.h)
-        for x, y, _ in self:
-            self.bitmask_grid[x,y] = self.get_bitmask(x, y)
+        walls = np.pad(self.wall_mask(), 2, constant_values=True)
+        self.bitmask_grid = self.bitmask_grid_cls(
+            self.w, self.h, wall_bitmasks(walls))
+
+    def update_bitmask_grid(self, changed_cells):
+        """
+        Recompute the bitmasks affected by a change of the tiles at
+        `changed_cells` ((x, y) tuples), ie the ones in a 2 cells radius.
+
+        Builds the whole bitmask grid if it hasn't been computed yet.
+
+        """
+        if self.bitmask_grid is None:
+            return self.compute_bitmask_grid()
+        if not changed_cells:
+            return
+
+        xs, ys = zip(*changed_cells)
+        # Affected area...
+        x1, y1 = max(min(xs) - 2, 0), max(min(ys) - 2, 0)
+        x2, y2 = min(max(xs) + 3, self.w), min(max(ys) + 3, self.h)
+        # ...and the walls needed to compute it, out of bounds cells
+        # being walls.
+        walls = np.ones((y2 - y1 + 4, x2 - x1 + 4), dtype=bool)
+        wx1, wy1 = max(x1 - 2, 0), max(y1 - 2, 0)
+        wx2, wy2 = min(x2 + 2, self.w), min(y2 + 2, self.h)
+        walls[
+            wy1 - y1 + 2:wy2 - y1 + 2, wx1 - x1 + 2:wx2 - x1 + 2
+        ] = self.array[wy1:wy2, wx1:wx2] == WALL
+
+        bitmasks = wall_bitmasks(walls)
+        for y, row in enumerate(bitmasks.tolist(), y1):
+            start = y * self.w
+            self.bitmask_grid.cells[start + x1:start + x2] = row
 
     def get_bitmask(self, x, y):
         """ Compute a specific cell's bitmask. """
@@ -85,18 +303,40 @@ class Map(Grid):
 
         return mask
 
-    def _floodfill(self, x, y, predicate, action=None):
-        # TODO: TESTS!!
-        # TODO: recursive (this version) or stack based (private version below) ?
-        cell = self[x, y]
-        if predicate(cell):
-            if action is not None:
-                action(cell)
-            yield cell
-            self.floodfill(x + 1, y, predicate, action) # right
-            self.floodfill(x - 1, y, predicate, action) # left
-            self.floodfill(x, y + 1, predicate, action) # down
-            self.floodfill(x, y - 1, predicate, action) # up
+    def label_regions(self, predicate=None):
+        """
+        Label the connected regions of cells matching `predicate`
+        (defaults to non blocking cells).
+
+        Return a (labels, sizes) tuple (see `grid.label_regions`).
+
+        """
+        if predicate is None:
+            mask = ~self.blocking_mask()
+        else:
+            mask = self.mask(predicate)
+        return label_regions(mask)
+
+    def compute_regions(self, predicate=None):
+        """
+        Fill `self.regions` with the connected regions of cells matching
+        `predicate` (defaults to non blocking cells).
+
+        Each region is a list of (x, y) tuples.
+
+        """
+        labels, sizes = self.label_regions(predicate)
+        ys, xs = np.nonzero(labels)
+        order = np.argsort(labels[ys, xs], kind='stable')
+        xs, ys = xs[order].tolist(), ys[order].tolist()
+
+        self.regions = []
+        start = 0
+        for size in sizes[1:].tolist():
+            self.regions.append(
+                list(zip(xs[start:start + size], ys[start:start + size])))
+            start += size
+        return self.regions
 
     def floodfill(self, x, y, predicate, action=None):
         """
@@ -106,39 +346,24 @@ class Map(Grid):
         Option `action` should be a callable wich will be run for each
         yielded cell.
 
-        REFACT: pass more arguments (like the cell itself, maybe the map ?)
-        to both the predicate and action callables.
-
         """
-        stack = set()
-        visited = set()
-        stack.add( (x, y) )
-        while len(stack) > 0:
-            x, y = stack.pop()
-            if self.in_bounds(x, y):
-                continue
-            if (x, y) in visited:
-                continue
-
-            visited.add((x, y))
-            cell = self[x, y]
-            if not predicate(cell):
-                continue
+        if not predicate(self[x, y]):
+            return
+        labels, _ = self.label_regions(predicate)
+        ys, xs = np.nonzero(labels == labels[y, x])
+        for cx, cy in zip(xs.tolist(), ys.tolist()):
+            cell = self[cx, cy]
             if action is not None:
                 action(cell)
-
-            stack.add( (x + 1, y) )  # right
-            stack.add( (x - 1, y) )  # left
-            stack.add( (x, y + 1) )  # down
-            stack.add( (x, y - 1) )  # up
-
             yield cell
 
     def serialize(self):
         return {
             'width': self.w,
             'height': self.h,
-            'cells': [c.value for c in self.cells],
+            # One glyph per cell, as a single (ascii) string
+            'cells': TILE_GLYPHS[self.array].tobytes().decode('ascii'),
             'bitmask_grid':
-                self.bitmask_grid.cells if self.bitmask_grid else None,
+                self.bitmask_grid.tolist() if self.bitmask_grid else None,
         }
+
@@ -0,0 +1,149 @@
+"""
+Turn scheduling.
+
+"""
+import heapq
+import itertools
+
+from barbarian.actions import ActionType
+
+
+# Time units per game turn. An actor with a speed of 100 acts once
+# per turn, 200 twice per turn, 50 every other turn...
+TICK = 100
+
+# Time (at speed 100) taken by each action type. Defaults to TICK.
+ACTION_COSTS = {
+    ActionType.IDLE: TICK,
+    ActionType.MOVE: TICK,
+    ActionType.XPLORE: TICK,
+    ActionType.ATTACK: TICK,
+}
+
+
+def action_cost(action, speed=100):
+    """
+    Return the time `action` takes for an actor with the given
+    `speed` (a None action is counted as a regular turn).
+
+    """
+    cost = TICK if action is None else ACTION_COSTS.get(action.type, TICK)
+    return max(1, cost * 100 // speed)
+
+
+class Scheduler:
+    """
+    Heap of actors, ordered by the time they're due to act next (ties
+    are broken by scheduling order).
+
+    `add` and `reschedule` are O(log n). `remove` only flags the
+    actor's heap entry, which gets dropped once it reaches the top
+    of the heap.
+
+    Iterating over the scheduler yields all scheduled actors, in the
+    order they were added.
+
+    """
+    def __init__(self):
+        self.time = 0
+        self._turn_end = TICK
+        self._heap = []
+        # actor -> [time, seq, actor] heap entry
+        self._entries = {}
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, actor):
+        return actor in self._entries
+
+    def __iter__(self):
+        return iter(list(self._entries))
+
+    def add(self, actor, delay=0):
+        """
+        Schedule `actor` to act `delay` time units from now (replacing
+        its current schedule if it already has one).
+
+        """
+        heap = self._heap
+        old = self._entries.get(actor)
+        entry = [self.time + delay, next(self._seq), actor]
+        self._entries[actor] = entry
+        if old is not None and heap[0] is old:
+            # Actor that just acted: replace its entry in one go
+            heapq.heapreplace(heap, entry)
+            return
+        if old is not None:
+            old[-1] = None
+        heapq.heappush(heap, entry)
+        # Don't let removed entries pile up
+        if len(heap) > 2 * len(self._entries) + 64:
+            self._heap = [e for e in self._heap if e[-1] is not None]
+            heapq.heapify(self._heap)
+
+    def reschedule(self, actor, delay):
+        """
+        Same as `add`, but no-op if `actor` isn't scheduled anymore (ie
+        it was removed while acting).
+
+        """
+        if actor in self._entries:
+            self.add(actor, delay)
+
+    def remove(self, actor):
+        """ Unschedule `actor`, if it is scheduled. """
+        entry = self._entries.pop(actor, None)
+        if entry is not None:
+            entry[-1] = None
+
+    def _next(self, until):
+        heap = self._heap
+        while heap:
+            entry = heap[0]
+            if entry[-1] is None:
+                heapq.heappop(heap)
+                continue
+            if entry[0] >= until:
+                return None
+            self.time = max(self.time, entry[0])
+            return entry[-1]
+        return None
+
+    def turn(self):
+        """
+        Yield actors due during the current turn, in order.
+
+        Yielded actors are *not* unscheduled: callers must `reschedule`
+        them once they've acted (otherwise they'll be yielded again).
+        Actors added during the turn are yielded as well if they're due
+        before its end.
+
+        Once exhausted, time is moved forward to the next turn.
+
+        """
+        end = self._turn_end = self.time + TICK
+        while (actor := self._next(end)) is not None:
+            yield actor
+        self.time = end
+
+    def end_turn(self):
+        """
+        Abort the current turn: actors that haven't acted yet wait for
+        the next one (in the same order), and time is moved forward to
+        the next turn.
+
+        """
+        end = self._turn_end
+        skipped = []
+        while (actor := self._next(end)) is not None:
+            skipped.append(actor)
+            heapq.heappop(self._heap)
+        self.time = end
+        for actor in skipped:
+            # Popped entries are replaced in place, so that iteration
+            # order is kept.
+            entry = [self.time, next(self._seq), actor]
+            self._entries[actor] = entry
+            heapq.heappush(self._heap, entry)
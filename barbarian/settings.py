@@ -39,3 +39,10 @@ LOGCONFIG = {
 RAWS_ROOT = 'raws'
 
 MAX_SPAWNS = 4  # per zone
+
+PATHMAP_CACHE_MAX_BYTES = 4 * 1024 * 1024  # per level
+
+ACTIVITY_RADIUS = 20    # actors further away from the player are dormant
+NOISE_RADIUS = 8        # actors this close to a fight wake up
+
+TIME_SYSTEMS = False    # record per system timings (see Game.timed)
@@ -29,16 +29,16 @@ def spawn_player(x, y):
     return spawn_entity(x, y, actor_data)
 
 
-def _spawn(container, entity):
+def _spawn(level, layer, entity):
     """
     Shortcut.
 
-    Add entity to the passed container (either an `EntityContainer` or a
-    `GridContainer`) if it is not None.
+    Add entity to the passed level's `layer` container (either `actors`,
+    `props` or `items`) if it is not None.
 
     """
     if entity is not None:
-        container.add_e(entity)
+        level.add_entity(layer, entity)
 
 
 def spawn_zone(level, zone_tiles, spawn_table):
@@ -54,8 +54,7 @@ def spawn_zone(level, zone_tiles, spawn_table):
             entity_data = get_entity_data(entity_name, entity_cat)
             if entity_data:
                 x, y = Rng.spawn.choice(zone_tiles)
-                container = getattr(level, entity_cat)
-                _spawn(container, spawn_entity(x, y, entity_data))
+                _spawn(level, entity_cat, spawn_entity(x, y, entity_data))
                 break
         else:
             logger.warning(
@@ -69,7 +68,7 @@ def spawn_stairs(level, x, y, entity_name):
     (Note, this would work for any prop).
     """
     data = get_entity_data(entity_name, 'props')
-    _spawn(level.props, spawn_entity(x, y, data))
+    _spawn(level, 'props', spawn_entity(x, y, data))
 
 
 def spawn_door(level, x, y):
@@ -86,7 +85,7 @@ def spawn_door(level, x, y):
         ))) == 2
     ):
         data = get_entity_data('door', 'props')
-        _spawn(level.props, spawn_entity(x, y, data))
+        _spawn(level, 'props', spawn_entity(x, y, data))
 
 
 def spawn_level(level, spawn_zones):
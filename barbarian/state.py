@@ -2,7 +2,7 @@
 State management.
 
 """
-from barbarian.events import Event
+from barbarian.systems.movement import hostiles_in_view
 
 
 class GameState:
@@ -36,33 +36,28 @@ class GameState:
             'map': game.current_level.map.serialize(),
             'map_snapshots':
                 [m.serialize() for m in game.current_level.map_snapshots],
-            'visible_cells': [
-                (x, y) in game.player.fov.visible_cells
-                for x, y, _ in game.current_level.map],
-            'explored_cells': [
-                (x, y) in game.current_level.explored
-                for x, y, _ in game.current_level.map],
+            'visible_cells': game.player.fov.visible.ravel().tolist(),
+            'explored_cells': game.current_level.explored.ravel().tolist(),
+            # Lets the client interrupt repeated commands (running...)
+            'hostile_in_view':
+                bool(hostiles_in_view(game.player, game.current_level)),
             'actors': [e.serialize() for e in game.actors],
             'items': [e.serialize() for e in game.current_level.items.all],
             'props': [e.serialize() for e in game.current_level.props.all],
             # 'last_action': game.last_action,
             'last_events': [
                 e.serialize() for e in
-                Event.get_current_events(game.ticks, flush=True)],
+                game.events.get_current_events(game.ticks, flush=True)],
         }
 
         # DEBUGGING
-        m = game.current_level.map
-
-        from barbarian.utils.structures.dijkstra import DijkstraGrid
-        path_map = DijkstraGrid.new(
-            m.w, m.h,
+        level = game.current_level
+        path_map = level.get_pathmap(
             (game.player.pos.x, game.player.pos.y),
-            (2, *game.current_level.exit_pos),
-            predicate=lambda x, y, _: not m.cell_blocks(x, y),
-            cost_function=lambda _, __, ___: 1
+            (2, *level.exit_pos),
+            ignore_actors=True, ignore_openable=True,
         )
-        self._state['map']['pathmap'] = path_map.cells
+        self._state['map']['pathmap'] = path_map.tolist()
 
         # Still DEBUGING
         self._state['spawn_zones'] = list(
@@ -2,22 +2,136 @@
 Ai routines.
 
 """
+import numpy as np
+
 from barbarian.utils.rng import Rng
+from barbarian.utils.structures.grid import Grid
 from barbarian.actions import Action, ActionType
 
 
+# Neighbor offsets, as a (8, 2) array of (dx, dy) vectors
+DIRS = np.array(Grid.ALL_DIRS)
+
+
 def tmp_ai(actor, game):
     """ Temporary, *very dumb* ai. """
     if actor.is_player:
         return Action(ActionType.REQUEST_INPUT)
 
-    # If player can see me, then I can see him
-    if game.player.fov.is_in_fov(actor.pos.x, actor.pos.y):
-        dx, dy = actor.pos.vector_to(game.player.pos.x, game.player.pos.y)
-        return Action.move(actor, d={'dir': (dx, dy)})
+    # Fovs are kept up to date by the level (see Level.update_fovs)
+    if actor.fov and actor.fov.is_in_fov(game.player.pos.x, game.player.pos.y):
+        # Shared by all actors chasing the player (and kept as long as
+        # the player doesn't move), see Level.get_pathmap.
+        pathmap = game.current_level.get_pathmap(
+            (game.player.pos.x, game.player.pos.y),
+            ignore_actors=True, ignore_openable=True)
+        destx, desty, destc = min(
+            pathmap.get_neighbors(actor.pos.x, actor.pos.y),
+            key=lambda t: t[2])
+        if destc == pathmap.inf:
+            dx, dy = actor.pos.vector_to(
+                game.player.pos.x, game.player.pos.y)
+        else:
+            dx, dy = destx - actor.pos.x, desty - actor.pos.y
+        return Action.move(actor, dir=(dx, dy))
 
     # Can't spot the player, so move randomly
     # return Action(type=ActionType.XPLORE, actor=actor)
     dx = Rng.choice([-1, 0, 1])
     dy = Rng.choice([-1, 0, 1])
-    return Action.move(actor, d={'dir': (dx, dy)})
+    return Action.move(actor, dir=(dx, dy))
+
+
+def plan_turn(game, actors=None):
+    """
+    Chose actions for all non player actors on the current level (or
+    for the passed `actors` only), in a single pass.
+
+    Decisions are made from data computed once for the whole turn
+    rather than once per actor: the distance map to the player, the
+    blocking mask and the actors' fovs.
+    - Actors seeing the player step to the free neighbor closest to
+      the player (stepping onto the player's cell means attacking),
+      or wait if they can't get any closer,
+    - others move randomly, to a free cell.
+
+    Return an {actor: action} dict (see `Game.chose_action`).
+
+    """
+    level, player = game.current_level, game.player
+    if actors is None:
+        actors = level.actors.all
+    actors = [a for a in actors if not a.is_player]
+    if not actors:
+        return {}
+    n = len(actors)
+
+    px, py = player.pos.x, player.pos.y
+    pathmap = level.get_pathmap(
+        (px, py), ignore_actors=True, ignore_openable=True)
+    inf = pathmap.inf
+
+    # Padding saves us from bound checks
+    dist = np.pad(pathmap.array, 1, constant_values=inf)
+    blocked = np.pad(level.blocking_mask(), 1, constant_values=True)
+    blocked[py + 1, px + 1] = False
+
+    xs = np.fromiter((a.pos.x for a in actors), np.intp, n)
+    ys = np.fromiter((a.pos.y for a in actors), np.intp, n)
+    nxs = xs[:, None] + DIRS[:, 0] + 1
+    nys = ys[:, None] + DIRS[:, 1] + 1
+    free = ~blocked[nys, nxs]
+
+    # Visibility: only look at the fovs of actors close enough to
+    # possibly see the player (a range of 0 means unlimited).
+    ranges = np.fromiter(
+        (a.fov.range if a.fov else -1 for a in actors), np.intp, n)
+    cheb = np.maximum(np.abs(xs - px), np.abs(ys - py))
+    sees_player = np.zeros(n, dtype=bool)
+    for i in np.flatnonzero((ranges == 0) | (cheb <= ranges)).tolist():
+        sees_player[i] = actors[i].fov.is_in_fov(px, py)
+
+    # Chasing: step to the closest free neighbor if it's closer than
+    # the current cell, or straight to the player if there's no path.
+    ndist = np.where(free, dist[nys, nxs], inf)
+    best = ndist.argmin(axis=1)
+    own_dist = dist[ys + 1, xs + 1]
+    closer = ndist[np.arange(n), best] < own_dist
+    chase_dx = np.where(closer, DIRS[best, 0], 0)
+    chase_dy = np.where(closer, DIRS[best, 1], 0)
+    no_path = own_dist == inf
+    chase_dx[no_path] = np.sign(px - xs[no_path])
+    chase_dy[no_path] = np.sign(py - ys[no_path])
+
+    # Wandering: pick one of the free neighbors, or wait (0 below).
+    # Seeded from the game's rng so that runs stay reproducible.
+    rng = np.random.default_rng(Rng.getrandbits(64))
+    pick = (rng.random(n) * (free.sum(axis=1) + 1)).astype(np.intp)
+    # Index of the pick-th free direction
+    dir_idx = (np.cumsum(free, axis=1) < pick[:, None]).sum(axis=1)
+    wander_dx = np.where(pick > 0, DIRS[np.minimum(dir_idx, 7), 0], 0)
+    wander_dy = np.where(pick > 0, DIRS[np.minimum(dir_idx, 7), 1], 0)
+
+    dxs = np.where(sees_player, chase_dx, wander_dx).tolist()
+    dys = np.where(sees_player, chase_dy, wander_dy).tolist()
+    return {
+        actor: Action.move(actor, dir=(dx, dy))
+        for actor, dx, dy in zip(actors, dxs, dys)
+    }
+
+
+def is_blocked(action, game):
+    """
+    Return True if a move planned by `plan_turn` leads to a cell
+    which has been blocked since (moving onto the player is attacking,
+    so the player's cell doesn't count).
+
+    """
+    actor = action.actor
+    dx, dy = action.data['dir']
+    if (dx, dy) == (0, 0):
+        return False
+    x, y = actor.pos.x + dx, actor.pos.y + dy
+    if (x, y) == (game.player.pos.x, game.player.pos.y):
+        return False
+    return game.current_level.is_blocked(x, y)
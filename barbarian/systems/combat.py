@@ -6,16 +6,27 @@ import logging
 
 from barbarian.actions import Action
 
+from barbarian.settings import NOISE_RADIUS
+
 
 logger = logging.getLogger(__name__)
 
 
-def attack(attack_action):
-    """ Handle actor attacking another. """
+def attack(attack_action, level=None):
+    """
+    Handle actor attacking another.
+
+    Fighting is noisy: if `level` is passed, actors around will wake
+    up (see `Level.make_noise`).
+
+    """
     actor, target, _ = attack_action.unpack()
     attack_action.accept()
 
+    if level is not None:
+        level.make_noise(actor.pos.x, actor.pos.y, NOISE_RADIUS)
+
     stats_a, stats_t = actor.stats, target.stats
     dmg = max(1, stats_a.strength - stats_t.strength)
 
-    return Action.inflict_dmg(actor, target, {'dmg': dmg})
+    return Action.inflict_dmg(actor, target, dmg=dmg)
@@ -4,6 +4,8 @@ Logic to handle entity movement.
 """
 import logging
 
+import numpy as np
+
 from barbarian import systems
 from barbarian.actions import Action
 from barbarian.events import Event, EventType
@@ -43,10 +45,11 @@ def move_actor(action, level):
     if level.move_actor(actor, dx, dy):
         action.accept(
             event_data={'from_x': destx - dx, 'from_y': desty - dy})
-        if actor.fov:
-            actor.fov.compute(
-                level, destx, desty, update_level=actor.is_player)
-            spot_entities(actor, level)
+        # Other actors' fovs are updated once per turn, before they
+        # act (see Level.update_fovs)
+        if actor.fov and actor.is_player:
+            level.update_fov(actor)
+            spot_entities(actor, level, action.bus)
         if (prop := level.props[destx, desty]) and (
             prop.trigger and
             prop.trigger.activation_mode == PropActivationMode.ACTOR_ON_TILE
@@ -74,23 +77,44 @@ def xplore(action, level):
     Compute an exploration map and move the actor one step towards
     the nearest unexplored cell.
 
+    Exploration maps are cached on the level, and only repaired where
+    needed (newly explored cells, opened doors, moving actors...) on
+    subsequent calls.
+
+    Rejected for the player if any hostile is in view.
+
     """
     actor = action.actor
     assert hasattr(actor, 'pos')
     if not actor.fov:
         return action.reject(msg=f'{actor} cant xplore: no fov')
-
-    explored_cells = (
-        level.explored if actor.is_player else actor.fov.explored)
-    dg = DijkstraGrid.new(
-        level.map.w, level.map.h,
-        *((x, y) for x, y, _ in level.map
-          if (x, y) not in explored_cells),
-        predicate=lambda x, y, _: (
-            (level.props[x,y] is not None and
-             level.props[x,y].openable) or
-            not level.is_blocked(x, y)
+    # Don't let the player explore with something dangerous around
+    if actor.is_player and hostiles_in_view(actor, level):
+        return action.reject(msg='Something dangerous is in view')
+
+    explored = level.explored if actor.is_player else actor.fov.explored
+
+    def _passable():
+        # Closed doors shouldn't stop exploration
+        return ~level.blocking_mask(ignore_openable=True)
+
+    def _compute():
+        ys, xs = np.nonzero(~explored)
+        return DijkstraGrid.new(
+            level.map.w, level.map.h,
+            *zip(xs.tolist(), ys.tolist()),
+            passable=_passable(),
         )
+
+    def _update(dg):
+        dg.update_from_arrays(_passable(), goal_mask=~explored)
+
+    # Explored cells are only ever added, so their count is enough to
+    # tell if the map is outdated.
+    dg = level.pathmaps.get(
+        ('xplore', actor),
+        (level.blocking_version, int(np.count_nonzero(explored))),
+        _compute, _update,
     )
 
     destx, desty, destc = min(
@@ -100,7 +124,7 @@ def xplore(action, level):
     else:
         action.accept()
         dx, dy = destx - actor.pos.x, desty - actor.pos.y
-        return Action.move(actor, d={'dir': (dx, dy)})
+        return Action.move(actor, dir=(dx, dy))
 
 
 _delta_map = {'up': -1, 'down': 1, None: 0}
@@ -121,7 +145,22 @@ def change_level(action, world, player, debug=False):
     action.accept(msg='You enter a new level!')
 
 
-def spot_entities(actor, level):
+def hostiles_in_view(actor, level):
+    """
+    Return the actors `actor` can currently see (every other actor is
+    deemed hostile for now).
+
+    """
+    fov = actor.fov
+    if not fov or (bounds := fov.bounds) is None:
+        return []
+    return [
+        a for x, y, a in level.actors.objects_in_rect(*bounds)
+        if a is not actor and fov.is_in_fov(x, y)
+    ]
+
+
+def spot_entities(actor, level, bus=None):
     """
     Spot "interesting" entities in visible range.
 
@@ -129,20 +168,32 @@ def spot_entities(actor, level):
     dangerous. We'll probably add more logic in the future (like an
     actual spot mechanic, ie for trap detection).
 
+    Events are only emitted for entities that weren't already in view
+    on the previous call. Only entities within the fov's bounds are
+    looked up, rather than every visible cell.
+
+    Events are published to `bus` (the game's `EventBus`) if passed.
+
     """
     assert actor.fov
 
-    # FIXME: add a "dangerous" component / component prop and just
-    # check for it
-    for x, y in actor.fov.visible_cells:
-        if a := level.actors[x,y]:
-            if a is actor:
-                continue
-            Event.emit(
-                EventType.ACTOR_SPOTTED,
-                event_data={'actor': actor, 'target': a})
-        if p := level.props[x,y]:
-            if p.typed.type == 'trap':
-                Event.emit(
-                    EventType.ACTOR_SPOTTED,
-                    event_data={'actor': actor, 'target': p})
+    fov = actor.fov
+    in_view = set()
+    if (bounds := fov.bounds) is not None:
+        # FIXME: add a "dangerous" component / component prop and just
+        # check for it
+        for x, y, a in level.actors.objects_in_rect(*bounds):
+            if a is not actor and fov.is_in_fov(x, y):
+                in_view.add(a)
+                if a not in fov.spotted:
+                    Event.emit(
+                        EventType.ACTOR_SPOTTED, bus=bus,
+                        event_data={'actor': actor, 'target': a})
+        for x, y, p in level.props.objects_in_rect(*bounds):
+            if p.typed.type == 'trap' and fov.is_in_fov(x, y):
+                in_view.add(p)
+                if p not in fov.spotted:
+                    Event.emit(
+                        EventType.ACTOR_SPOTTED, bus=bus,
+                        event_data={'actor': actor, 'target': p})
+    fov.spotted = in_view
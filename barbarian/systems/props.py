@@ -92,10 +92,8 @@ def open_or_close_door(action, level):
 
     action.accept()
 
-    level.init_fov_map()
+    level.update_entity('props', door)
     if actor.fov:
-        actor.fov.compute(
-            level, actor.pos.x, actor.pos.y,
-            update_level=actor.is_player)
+        level.update_fov(actor)
 
     action.accept()
@@ -25,5 +25,5 @@ def inflict_damage(action):
         else:
             msg = f'{action.target.name} is dead'
         Event.emit(
-            EventType.ACTOR_DIED, msg=msg,
+            EventType.ACTOR_DIED, bus=action.bus, msg=msg,
             event_data={'actor': target, 'slayer': actor})
@@ -5,13 +5,21 @@ Dijkstra implementation.
 import sys
 import heapq
 import logging
+from collections import OrderedDict
 
-from barbarian.utils.structures.grid import Grid
+import numpy as np
+import tcod
+
+from barbarian.utils.structures.grid import Grid, ArrayGrid, GridError
 
 
 logger = logging.getLogger(__name__)
 
 
+class DijkstraError(GridError):
+    """ Invalid operation on a DijkstraGrid. """
+
+
 class DijkstraGrid(Grid):
     """
     Specialized grid implementing Dijsktra's algorithm.
@@ -22,12 +30,48 @@ class DijkstraGrid(Grid):
     See also:
     http://www.roguebasin.com/index.php/Dijkstra_Maps_Visualized
 
+    Distances can be computed in two ways:
+
+    - `compute` runs a pure python implementation, and decides which
+      cells can be crossed (and at which cost) via callables.
+    - `compute_from_arrays` takes a passability mask and an integer
+      cost array instead, and runs on tcod's (compiled) implementation.
+      It is *much* faster, and should be prefered whenever the map
+      state can be expressed as arrays.
+
+    Both return the same distances.
+
+    Once computed with `compute_from_arrays`, a map can be updated
+    incrementally: `add_goal`, `remove_goal` and `set_cost` record
+    changes, and `repair` then only recomputes the part of the
+    distance field affected by them (see `repair` for details).
+    `update_from_arrays` does all of this from a new passability mask
+    (and optionally new cost and goal arrays).
+
     """
     inf = sys.maxsize
 
+    # tcod's dijkstra works on int32 arrays.
+    _ENGINE_DTYPE = np.int32
+    _ENGINE_MAX = np.iinfo(np.int32).max
+
     def __init__(self, width, height):
         super().__init__(width, height, [self.inf] * (width * height))
         self.goals = set()
+        self.costs = None
+        self._dirty = set()
+
+    @property
+    def nbytes(self):
+        """
+        Approximate memory footprint of the distance field (and cost
+        array, if any), in bytes.
+
+        """
+        nbytes = self.w * self.h * np.dtype(np.int64).itemsize
+        if self.costs is not None:
+            nbytes += self.costs.nbytes
+        return nbytes
 
     def set_goal(self, x, y, weight=0):
         """ Add a potential destination at position (x, y). """
@@ -42,7 +86,8 @@ class DijkstraGrid(Grid):
         cost_function = cost_function or (lambda _, __, ___: 1)
 
         visited = {i: False for i in range(self.w * self.h)}
-        pqueue = [(0, idx) for _, idx in self.goals]
+        pqueue = list(self.goals)
+        heapq.heapify(pqueue)
         while pqueue:
             _, c_idx = heapq.heappop(pqueue)
             curval = self.cells[c_idx]
@@ -70,12 +115,223 @@ class DijkstraGrid(Grid):
                     self.cells[n_idx] = curval + cost
                     heapq.heappush(pqueue, (curval + cost, n_idx))
 
+    def compute_from_arrays(self, passable, costs=None):
+        """
+        Update the map with distances to its goal cells, using tcod's
+        dijkstra implementation.
+
+        `passable` is a boolean array (indexed as [y, x]) of cells
+        that can be crossed (equivalent to `compute`'s predicate).
+
+        `costs` is an optional integer array of the cost to enter each
+        cell (equivalent to `compute`'s cost_function). Defaults to 1
+        for every cell. Cells with a cost <= 0 are considered blocked.
+
+        Goal weights and distances must fit in 32 bits.
+
+        """
+        if costs is None:
+            engine_costs = np.ones((self.h, self.w), dtype=self._ENGINE_DTYPE)
+        else:
+            engine_costs = np.array(costs, dtype=self._ENGINE_DTYPE)
+        engine_costs[~np.asarray(passable, dtype=bool)] = 0
+        # Kept around for incremental updates
+        self.costs = engine_costs
+        self._dirty.clear()
+
+        dist = np.full(
+            (self.h, self.w), self._ENGINE_MAX, dtype=self._ENGINE_DTYPE)
+        for weight, idx in self.goals:
+            y, x = divmod(idx, self.w)
+            dist[y, x] = min(dist[y, x], weight)
+
+        tcod.path.dijkstra2d(dist, engine_costs, 1, None, out=dist)
+
+        distances = dist.astype(np.int64)
+        distances[dist == self._ENGINE_MAX] = self.inf
+        self.update_from_array(distances)
+
+    ### Incremental updates ###
+    #############################
+
+    def add_goal(self, x, y, weight=0):
+        """
+        Add a goal cell at position (x, y) to an already computed map.
+
+        Changes will be applied on the next call to `repair`.
+
+        """
+        idx = self._cartesian_to_idx(x, y)
+        self.goals.add((weight, idx))
+        self._dirty.add(idx)
+
+    def remove_goal(self, x, y):
+        """
+        Remove the goal at position (x, y) from an already computed map.
+
+        Changes will be applied on the next call to `repair`.
+
+        """
+        idx = self._cartesian_to_idx(x, y)
+        self.goals = {(w, i) for w, i in self.goals if i != idx}
+        self._dirty.add(idx)
+
+    def set_cost(self, x, y, cost):
+        """
+        Change the cost of entering cell (x, y) (a cost <= 0 blocks the
+        cell).
+
+        Changes will be applied on the next call to `repair`.
+
+        """
+        if self.costs is None:
+            raise DijkstraError(
+                'Costs can only be changed on maps computed with '
+                'compute_from_arrays')
+        self.costs[y, x] = max(0, cost)
+        self._dirty.add(self._cartesian_to_idx(x, y))
+
+    def update_from_arrays(self, passable, costs=None, goal_mask=None):
+        """
+        Incremental counterpart to `compute_from_arrays`.
+
+        Diff the passed arrays against the current map state, and
+        repair only the parts of the distance field affected by
+        the changes.
+
+        If passed, `goal_mask` should be a boolean array of the cells
+        which should be (weight 0) goals.
+
+        """
+        if self.costs is None:
+            raise DijkstraError(
+                'Only maps computed with compute_from_arrays can be updated')
+
+        if costs is None:
+            new_costs = np.ones((self.h, self.w), dtype=self._ENGINE_DTYPE)
+        else:
+            new_costs = np.array(costs, dtype=self._ENGINE_DTYPE)
+        new_costs[~np.asarray(passable, dtype=bool)] = 0
+        self._dirty.update(
+            np.flatnonzero(new_costs != self.costs).tolist())
+        self.costs = new_costs
+
+        if goal_mask is not None:
+            new_goals = set(np.flatnonzero(goal_mask).tolist())
+            old_goals = {idx for _, idx in self.goals}
+            removed = old_goals - new_goals
+            added = new_goals - old_goals
+            if removed:
+                self.goals = {(w, i) for w, i in self.goals if i not in removed}
+            self.goals.update((0, idx) for idx in added)
+            self._dirty.update(removed)
+            self._dirty.update(added)
+
+        self.repair()
+
+    def repair(self):
+        """
+        Apply pending goal and cost changes to the distance field.
+
+        Rather than recomputing the whole map, this:
+
+        - invalidates changed cells, as well as all cells whose
+          distance was derived from an invalidated cell (ie cells which
+          distance equals an invalidated neighbor's distance + their
+          own cost),
+        - re-evaluates invalidated cells from their valid neighbors and
+          goal weights,
+        - and propagates the resulting distances as in a regular
+          dijkstra run, which only goes as far as distances actually
+          change.
+
+        The result is the same as a full recompute.
+
+        """
+        if not self._dirty:
+            return
+        if self.costs is None:
+            raise DijkstraError(
+                'Only maps computed with compute_from_arrays can be repaired')
+
+        inf, w, h = self.inf, self.w, self.h
+        cells = self.cells
+        costs = self.costs.reshape(-1)
+
+        def neighbors(idx):
+            y, x = divmod(idx, w)
+            if y > 0:       yield idx - w   # N
+            if x < w - 1:   yield idx + 1   # E
+            if y < h - 1:   yield idx + w   # S
+            if x > 0:       yield idx - 1   # W
+
+        goal_weights = {}
+        for weight, idx in self.goals:
+            if weight < goal_weights.get(idx, inf):
+                goal_weights[idx] = weight
+
+        # Invalidate changed cells and everything depending on them.
+        invalid = set(self._dirty)
+        stack = list(self._dirty)
+        self._dirty.clear()
+        while stack:
+            idx = stack.pop()
+            dist = cells[idx]
+            if dist == inf:
+                continue
+            for n_idx in neighbors(idx):
+                if n_idx in invalid:
+                    continue
+                n_dist, n_cost = cells[n_idx], costs.item(n_idx)
+                if (
+                    n_cost > 0 and n_dist == dist + n_cost and
+                    goal_weights.get(n_idx) != n_dist
+                ):
+                    invalid.add(n_idx)
+                    stack.append(n_idx)
+
+        for idx in invalid:
+            cells[idx] = inf
+
+        # Re-evaluate invalidated cells from what's left.
+        pqueue = []
+        for idx in invalid:
+            best = goal_weights.get(idx, inf)
+            cost = costs.item(idx)
+            if cost > 0:
+                for n_idx in neighbors(idx):
+                    n_dist = cells[n_idx]
+                    if n_dist != inf and n_dist + cost < best:
+                        best = n_dist + cost
+            if best != inf:
+                cells[idx] = best
+                pqueue.append((best, idx))
+        heapq.heapify(pqueue)
+
+        # And propagate.
+        while pqueue:
+            dist, idx = heapq.heappop(pqueue)
+            if dist > cells[idx]:
+                continue
+            for n_idx in neighbors(idx):
+                n_cost = costs.item(n_idx)
+                if n_cost > 0 and dist + n_cost < cells[n_idx]:
+                    cells[n_idx] = dist + n_cost
+                    heapq.heappush(pqueue, (dist + n_cost, n_idx))
+
     @classmethod
-    def new(cls, width, height, *goals, predicate=None, cost_function=None):
+    def new(
+        cls, width, height, *goals,
+        predicate=None, cost_function=None, passable=None, costs=None,
+    ):
         """
         Shortcut to nitialize a dtra map, set its goal cells and
         compute pathes all in one go.
 
+        If a `passable` mask is passed, distances will be computed
+        with `compute_from_arrays` (and `predicate` and
+        `cost_function` will be ignored).
+
         """
         dg = cls(width, height)
         for g in goals:
@@ -85,5 +341,122 @@ class DijkstraGrid(Grid):
             except ValueError:
                 gx, gy = g
             dg.set_goal(gx, gy, weight)
-        dg.compute(predicate, cost_function)
+        if passable is not None:
+            dg.compute_from_arrays(passable, costs)
+        else:
+            dg.compute(predicate, cost_function)
         return dg
+
+
+class ArrayDijkstraGrid(DijkstraGrid, ArrayGrid):
+    """ DijkstraGrid storing its distances in an int64 numpy array. """
+
+    dtype = np.int64
+    fill_value = DijkstraGrid.inf
+
+    def __init__(self, width, height):
+        ArrayGrid.__init__(self, width, height)
+        self.goals = set()
+        self.costs = None
+        self._dirty = set()
+
+
+class DijkstraCache:
+    """
+    LRU cache of dijkstra maps.
+
+    Maps are stored under an arbitrary (hashable) key, typically
+    describing their goals, along with a `version` value describing the
+    state they were computed from. As long as the requested version
+    matches the stored one, the cached map is returned as is.
+
+    Least recently used maps are evicted when the total size of
+    stored maps exceeds `max_bytes` (the most recent map is always
+    kept, whatever its size).
+
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._maps = OrderedDict()
+        self.hits = self.misses = self.updates = self.evictions = 0
+
+    def __len__(self):
+        return len(self._maps)
+
+    def __contains__(self, key):
+        return key in self._maps
+
+    @property
+    def nbytes(self):
+        return sum(dg.nbytes for dg, _ in self._maps.values())
+
+    @property
+    def stats(self):
+        return {
+            'size': len(self),
+            'nbytes': self.nbytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'updates': self.updates,
+            'evictions': self.evictions,
+        }
+
+    def get(self, key, version, compute, update=None):
+        """
+        Return the map stored under `key`.
+
+        If there is no such map, `compute` is called (without
+        arguments) to build it.
+
+        If a map is found but is outdated (ie its version doesn't match
+        `version`), it is either passed to `update` to be repaired in
+        place, or recomputed if `update` is None.
+
+        """
+        try:
+            dg, map_version = self._maps[key]
+        except KeyError:
+            dg = None
+        else:
+            self._maps.move_to_end(key)
+            if map_version == version:
+                self.hits += 1
+                return dg
+
+        if dg is not None and update is not None:
+            self.updates += 1
+            update(dg)
+        else:
+            self.misses += 1
+            dg = compute()
+
+        self._maps[key] = dg, version
+        self._maps.move_to_end(key)
+        self._evict()
+        return dg
+
+    def peek(self, key):
+        """
+        Return the map stored under `key` (or None), without updating
+        counters or usage order.
+
+        """
+        try:
+            return self._maps[key][0]
+        except KeyError:
+            return None
+
+    def invalidate(self, key):
+        """ Drop the map stored under `key`, if any. """
+        self._maps.pop(key, None)
+
+    def clear(self):
+        self._maps.clear()
+
+    def _evict(self):
+        nbytes = self.nbytes
+        while nbytes > self.max_bytes and len(self._maps) > 1:
+            _, (dg, _) = self._maps.popitem(last=False)
+            nbytes -= dg.nbytes
+            self.evictions += 1
+            logger.debug('Evicted dijkstra map (%d bytes)', dg.nbytes)
@@ -4,6 +4,8 @@ Useful data structures.
 """
 import itertools
 
+import numpy as np
+
 
 class GridError(Exception):
     pass
@@ -22,6 +24,91 @@ class OutOfBoundGridError(IndexError, GridError):
         super().__init__(msg)
 
 
+def count_neighbors(mask, cardinal_only=False, oob_value=False, out=None):
+    """
+    Return an array holding, for each cell of the 2D boolean `mask`, the
+    number of its neighbors which are set.
+
+    Out of bounds neighbors count as `oob_value`.
+
+    `out` can be passed a preallocated uint8 array of the same shape as
+    `mask` to store the results in.
+
+    """
+    h, w = mask.shape
+    padded = np.pad(mask, 1, constant_values=oob_value).view(np.uint8)
+    if out is None:
+        out = np.zeros((h, w), dtype=np.uint8)
+    else:
+        out.fill(0)
+
+    dirs = Grid.CARDINAL_DIRS if cardinal_only else Grid.ALL_DIRS
+    for dx, dy in dirs:
+        out += padded[1 + dy:1 + dy + h, 1 + dx:1 + dx + w]
+    return out
+
+
+def label_regions(mask):
+    """
+    Label the connected (4-way) regions of the 2D boolean `mask`.
+
+    Return a (labels, sizes) tuple:
+    - labels is an int32 array of the same shape as `mask`, holding
+      the region id of each set cell (ids start at 1, and are assigned
+      in row major order of first appearance). Unset cells are 0.
+    - sizes is an array holding the size of each region, indexed by
+      region id (sizes[0] is always 0).
+
+    This works on horizontal runs of cells rather than on single cells:
+    runs overlapping on consecutive rows are merged (union-find), so the
+    python part only loops once over runs.
+
+    """
+    h, w = mask.shape
+    padded = np.zeros((h, w + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    run_ys, run_starts = np.nonzero(edges == 1)
+    run_ends = np.nonzero(edges == -1)[1]
+    # Index of the first run of each row
+    row_first = np.searchsorted(run_ys, np.arange(h + 1)).tolist()
+    starts, ends = run_starts.tolist(), run_ends.tolist()
+
+    parent = list(range(len(starts)))
+
+    def find(r):
+        while parent[r] != r:
+            parent[r] = parent[parent[r]]
+            r = parent[r]
+        return r
+
+    for y in range(1, h):
+        i, i_end = row_first[y - 1], row_first[y]
+        j, j_end = row_first[y], row_first[y + 1]
+        while i < i_end and j < j_end:
+            if starts[i] < ends[j] and starts[j] < ends[i]:
+                ri, rj = find(i), find(j)
+                if ri != rj:
+                    parent[max(ri, rj)] = min(ri, rj)
+            if ends[i] < ends[j]:
+                i += 1
+            else:
+                j += 1
+
+    region_ids = {}
+    run_labels = [
+        region_ids.setdefault(find(r), len(region_ids) + 1)
+        for r in range(len(starts))]
+
+    labels = np.zeros(h * w, dtype=np.int32)
+    # Set cells are in the same (row major) order as runs
+    labels[np.flatnonzero(mask)] = np.repeat(
+        np.array(run_labels, dtype=np.int32), run_ends - run_starts)
+    sizes = np.bincount(labels, minlength=len(region_ids) + 1)
+    sizes[0] = 0
+    return labels.reshape(h, w), sizes
+
+
 class Grid:
     """ Generic 2D Matrix container """
 
@@ -124,10 +211,83 @@ class Grid:
         return 3 tuples of (x_position, y_postion, cell_object).
 
         """
-        for i, c in enumerate(self.cells):
-            x, y = i % self.w, i // self.w
-            yield x, y, c
-         # ~ raise StopIteration
+        xs = range(self.w)
+        for y, row in self.iter_rows():
+            yield from zip(xs, itertools.repeat(y), row)
+
+    ### Iterators ###
+    #################
+
+    # Those avoid converting indices to coordinates (and checking
+    # bounds) for every cell, and should be prefered to manual loops
+    # over the whole grid.
+
+    def _row(self, y, x1, x2):
+        """ Return cells from x1 to x2 (excluded) on row y, as a list. """
+        start = y * self.w
+        return self.cells[start + x1:start + x2]
+
+    def _clip_rect(self, x, y, w, h):
+        """ Return the (x1, y1, x2, y2) bounds of a rect, clipped to the grid. """
+        return max(x, 0), max(y, 0), min(x + w, self.w), min(y + h, self.h)
+
+    def iter_rows(self):
+        """ Yield (y, row) tuples, row being a list of the row's cells. """
+        for y in range(self.h):
+            yield y, self._row(y, 0, self.w)
+
+    def iter_indices(self):
+        """
+        Yield (x, y, idx) tuples for each cell, idx being the cell's
+        index in the flat cell list.
+
+        """
+        w = self.w
+        xs = range(w)
+        for y in range(self.h):
+            yield from zip(xs, itertools.repeat(y), range(y * w, y * w + w))
+
+    def iter_rect(self, x, y, w, h):
+        """
+        Like iterating over the whole grid, but only for cells in the
+        rect defined by x, y, w & h (clipped to the grid).
+
+        """
+        x1, y1, x2, y2 = self._clip_rect(x, y, w, h)
+        xs = range(x1, x2)
+        for cy in range(y1, y2):
+            yield from zip(xs, itertools.repeat(cy), self._row(cy, x1, x2))
+
+    def iter_where(self, where):
+        """
+        Like iterating over the whole grid, but only for cells for
+        which `where` is True.
+
+        `where` is either a predicate(x, y, cell) callable, or a 2D
+        boolean mask (indexed as [y, x]). Masks are much faster, as
+        cells are picked without looking at the others at all.
+
+        """
+        if callable(where):
+            return (t for t in self if where(*t))
+        ys, xs = self._mask_nonzero(where)
+        cells = self.cells
+        w = self.w
+        return (
+            (x, y, cells[x + y * w])
+            for x, y in zip(xs.tolist(), ys.tolist()))
+
+    def values_in_rect(self, x, y, w, h):
+        """
+        Return a flat (row major) list of the cells in the rect defined
+        by x, y, w & h (clipped to the grid).
+
+        """
+        x1, y1, x2, y2 = self._clip_rect(x, y, w, h)
+        values = []
+        for cy in range(y1, y2):
+            values.extend(self._row(cy, x1, x2))
+        return values
 
     def copy(self):
         return self.__class__(self.w, self.h, self.cells[:])
@@ -166,11 +326,34 @@ class Grid:
 
         return cls(grid.w, grid.h, cells)
 
+    ### Export ###
+    ##############
+
+    def tolist(self):
+        """ Return the cells as a flat (row major) python list. """
+        return list(self.cells)
+
+    def as_array(self, dtype=object):
+        """ Return the cells as a 2D numpy array (indexed as [y, x]). """
+        return np.array(self.cells, dtype=dtype).reshape(self.h, self.w)
+
+    def update_from_array(self, array):
+        """ Overwrite all cells from a 2D array (indexed as [y, x]). """
+        self.cells[:] = array.reshape(-1).tolist()
+
     ### Internal Utils ###
     ######################
 
     # Do we *really* gain anything from storing the cells in a continuous array ?
 
+    def _mask_nonzero(self, mask):
+        """ Return the (ys, xs) coordinates of True cells in `mask`. """
+        if mask.shape != (self.h, self.w):
+            raise GridError(
+                f'Invalid mask shape {mask.shape}, '
+                f'expected {(self.h, self.w)}')
+        return np.nonzero(mask)
+
     def _idx_to_cartesian(self, idx):
         """ Convert internal array index to cartesian coordinates. """
         return idx % self.w, idx // self.w
@@ -180,26 +363,236 @@ class Grid:
         return x + (y * self.w)
 
 
+class ArrayGrid(Grid):
+    """
+    Grid storing its cells in a 2D numpy array rather than in a list.
+
+    Keeps the regular `grid[x, y]` api, but also exposes the underlying
+    array (`grid.array`) so that callers can run whole grid operations
+    without looping over every cell.
+
+    The array is indexed as [y, x] (like the tcod arrays), which keeps
+    its flattened version (`grid.cells`) in the same row-major order as
+    a list-backed grid.
+
+    Subclasses define their cell type through the `dtype` attribute,
+    and the value used for new cells through `fill_value`.
+
+    """
+
+    dtype = object
+    fill_value = None
+
+    def __init__(self, width, height, cells=None):
+        self.w = width
+        self.h = height
+        if cells is not None and (
+            # Don't trip over iterators with no length
+            not hasattr(cells, '__len__') or len(cells)
+        ):
+            self.array = self._to_array(width, height, cells)
+        else:
+            self.array = np.full(
+                (self.h, self.w), self.fill_value, dtype=self.dtype)
+
+    @classmethod
+    def _to_array(cls, width, height, cells):
+        """ Convert a flat cell sequence to a properly shaped 2D array. """
+        size = width * height
+        if isinstance(cells, np.ndarray):
+            if cells.size != size:
+                raise GridError(
+                    f'Invalid cell array size. '
+                    f'Grid of size ({width}, {height} should contain '
+                    f'{size} cells. Passed array contains {cells.size}')
+            return cells.astype(cls.dtype, copy=False).reshape(height, width)
+        try:
+            arr = np.fromiter(cells, dtype=cls.dtype, count=size)
+        except ValueError as e:
+            raise GridError(
+                f'Invalid cell list size. '
+                f'Grid of size ({width}, {height} should contain '
+                f'{size} cells.') from e
+        if hasattr(cells, '__len__') and len(cells) != size:
+            raise GridError(
+                f'Invalid cell list size. '
+                f'Grid of size ({width}, {height} should contain '
+                f'{size} cells. Passed list contains {len(cells)}')
+        return arr.reshape(height, width)
+
+    @property
+    def cells(self):
+        """ Flat (row major) *view* on the cell array. """
+        return self.array.reshape(-1)
+
+    @cells.setter
+    def cells(self, cells):
+        self.array = self._to_array(self.w, self.h, cells)
+
+    def get_cell(self, x, y):
+        """ Get the cell at cartesian coordinates (x, y). """
+        if not (0 <= x < self.w and 0 <= y < self.h):
+            raise OutOfBoundGridError(x, y)
+        # Using item() returns plain python objects rather than numpy
+        # scalars, which keeps the results json friendly.
+        return self.array.item(y, x)
+
+    def set_cell(self, x, y, v):
+        """ Set the cell at cartesian coordinates (x, y). """
+        if not (0 <= x < self.w and 0 <= y < self.h):
+            raise OutOfBoundGridError(x, y)
+        self.array[y, x] = v
+
+    def _row(self, y, x1, x2):
+        return self.array[y, x1:x2].tolist()
+
+    def iter_rows(self):
+        # A single tolist() call converts the whole array to python
+        # objects much faster than one call per row (or per cell).
+        return enumerate(self.array.tolist())
+
+    def values_in_rect(self, x, y, w, h):
+        x1, y1, x2, y2 = self._clip_rect(x, y, w, h)
+        return self.array[y1:y2, x1:x2].reshape(-1).tolist()
+
+    def iter_where(self, where):
+        if callable(where):
+            return super().iter_where(where)
+        ys, xs = self._mask_nonzero(where)
+        return zip(xs.tolist(), ys.tolist(), self.array[ys, xs].tolist())
+
+    def copy(self):
+        return self.__class__(self.w, self.h, self.array.copy())
+
+    def slice(self, x, y, w, h):
+        """ Return a sub-grid object, which rect is defined by x, y, w & h. """
+        return self.__class__(w, h, self.array[y:y+h, x:x+w].copy())
+
+    def merge_grid(self, x, y, subgrid):
+        if isinstance(subgrid, ArrayGrid):
+            sub_array = subgrid.array
+        else:
+            sub_array = self._to_array(subgrid.w, subgrid.h, subgrid.cells)
+        self.array[y:y+subgrid.h, x:x+subgrid.w] = sub_array
+
+    def tolist(self):
+        """ Return the cells as a flat (row major) python list. """
+        return self.array.reshape(-1).tolist()
+
+    def as_array(self, dtype=None):
+        """
+        Return the underlying array, converted to `dtype` if needed.
+
+        Note: no copy is made if no conversion is required.
+
+        """
+        if dtype is None:
+            return self.array
+        return self.array.astype(dtype, copy=False)
+
+    def update_from_array(self, array):
+        """ Overwrite all cells from a 2D array (indexed as [y, x]). """
+        self.array[:] = array
+
+
 class EntityGrid(Grid):
     """
     Store arbitrary objects on a 2D grid.
 
+    On top of the grid itself, stored objects are indexed by id (in
+    insertion order), so that iterating over them or counting them
+    only costs as much as the number of objects, not the grid size.
+    Moving an object with `move` keeps its place in the index.
+
+    Objects are also bucketed by area (`BUCKET_SIZE` cells wide
+    squares), so that looking for objects in a given area
+    (`objects_in_rect`) only costs as much as the number of objects
+    around it.
+
+    `version` is a mutation counter, bumped whenever an object is added
+    to or removed from the grid. Caches depending on the grid content
+    can compare it to tell if they're still fresh.
+
     """
+    BUCKET_SIZE = 8
+
     def __init__(self, width, height):
         cells = [None for _ in range(width * height)]
         Grid.__init__(self, width, height, cells)
+        self._index = {}
+        self._buckets = {}
+        self.version = 0
+
+    def _bucket(self, x, y):
+        return x // self.BUCKET_SIZE, y // self.BUCKET_SIZE
+
+    def _index_add(self, x, y, obj):
+        key = id(obj)
+        if (entry := self._index.get(key)) is not None:
+            del self._buckets[self._bucket(*entry[:2])][key]
+        entry = (x, y, obj)
+        # Reassigning an existing key keeps its position in the index
+        self._index[key] = entry
+        self._buckets.setdefault(self._bucket(x, y), {})[key] = entry
+
+    def _index_remove(self, x, y, obj):
+        # Only drop the entry if it points to the same cell, in case
+        # the object was stored twice.
+        entry = self._index.get(id(obj))
+        if entry is not None and entry[:2] == (x, y):
+            del self._index[id(obj)]
+            del self._buckets[self._bucket(x, y)][id(obj)]
+
+    def set_cell(self, x, y, v):
+        old = self.get_cell(x, y)
+        super().set_cell(x, y, v)
+        if old is not None:
+            self._index_remove(x, y, old)
+        if v is not None:
+            self._index_add(x, y, v)
+        self.version += 1
+
+    def touch(self):
+        """
+        Bump the grid version.
+
+        Use this to signal in place changes to a stored object (ie,
+        a door being opened).
+
+        """
+        self.version += 1
 
     def __iter__(self):
-        for x, y, obj in super().__iter__():
-            if obj is not None:
-                yield x, y, obj
+        # Iterate over a snapshot, so that objects can be moved around
+        # while iterating.
+        yield from tuple(self._index.values())
 
     def __len__(self):
-        return len(self.all)
+        return len(self._index)
 
     @property
     def all(self):
-        return [e for _, __, e in self]
+        return [obj for _, __, obj in self._index.values()]
+
+    def objects_in_rect(self, x, y, w, h):
+        """
+        Return a list of (x, y, obj) tuples for objects stored in the
+        rect starting at (x, y) and of size (w, h).
+
+        """
+        x2, y2 = x + w, y + h
+        bx1, by1 = self._bucket(max(x, 0), max(y, 0))
+        bx2, by2 = self._bucket(min(x2, self.w) - 1, min(y2, self.h) - 1)
+        res = []
+        for by in range(by1, by2 + 1):
+            for bx in range(bx1, bx2 + 1):
+                bucket = self._buckets.get((bx, by))
+                if not bucket:
+                    continue
+                for entry in bucket.values():
+                    if x <= entry[0] < x2 and y <= entry[1] < y2:
+                        res.append(entry)
+        return res
 
     def add(self, x, y, obj):
         self.set_cell(x, y, obj)
@@ -207,6 +600,18 @@ class EntityGrid(Grid):
     def remove(self, x, y, _):
         self.set_cell(x, y, None)
 
+    def move(self, x, y, newx, newy, obj):
+        """
+        Move `obj` from (x, y) to (newx, newy), without changing its
+        position in the index.
+
+        Whatever was on (newx, newy) is replaced (and dropped from the
+        index), like with `add`.
+
+        """
+        Grid.set_cell(self, x, y, None)
+        self.set_cell(newx, newy, obj)
+
     def add_e(self, e):
         """
         Assume the passed object (entity) stores its position
@@ -223,6 +628,16 @@ class EntityGrid(Grid):
         """
         self.remove(e.pos.x, e.pos.y, e)
 
+    def move_e(self, e, newx, newy):
+        """
+        Assume the passed object (entity) stores its position
+        on a subobject named `pos`, move it to (newx, newy) and
+        update said position.
+
+        """
+        self.move(e.pos.x, e.pos.y, newx, newy, e)
+        e.pos.x, e.pos.y = newx, newy
+
 
 class GridContainer(EntityGrid):
     """
@@ -231,23 +646,73 @@ class GridContainer(EntityGrid):
 
     Each cell will be a set containing the stored objects for this position.
 
+    Storage is sparse: sets are only allocated for occupied cells, and
+    empty cells return a shared, immutable empty set. This means objects
+    should only be added and removed via the grid's methods, never
+    by mutating a cell directly.
+
     """
+    EMPTY_CELL = frozenset()
 
     def __init__(self, width, height):
-        cells = [set() for _ in range(width * height)]
-        Grid.__init__(self, width, height, cells)
-
-    def __iter__(self):
-        for x, y, obj_list in super().__iter__():
-            for o in obj_list:
-                yield x, y, o
+        # Not calling Grid.__init__, which would allocate all cells
+        self.w = width
+        self.h = height
+        self._sets = {}
+        self._index = {}
+        self._buckets = {}
+        self.version = 0
 
     @property
-    def all(self):
-        return list(itertools.chain.from_iterable(self.cells))
+    def cells(self):
+        """ Dense list of all cells (mostly for compatibility). """
+        return [
+            self._sets.get(idx, self.EMPTY_CELL)
+            for idx in range(self.w * self.h)]
+
+    def get_cell(self, x, y):
+        if not (0 <= x < self.w and 0 <= y < self.h):
+            raise OutOfBoundGridError(x, y)
+        return self._sets.get(x + (y * self.w), self.EMPTY_CELL)
+
+    def _row(self, y, x1, x2):
+        start = y * self.w
+        return [
+            self._sets.get(idx, self.EMPTY_CELL)
+            for idx in range(start + x1, start + x2)]
+
+    def set_cell(self, x, y, v):
+        raise GridError(
+            f'Cells of {self.__class__.__name__} can\'t be set directly. '
+            'Use the add and remove methods instead.')
+
+    def _add_to_cell(self, x, y, obj):
+        if not (0 <= x < self.w and 0 <= y < self.h):
+            raise OutOfBoundGridError(x, y)
+        self._sets.setdefault(x + (y * self.w), set()).add(obj)
+
+    def _remove_from_cell(self, x, y, obj):
+        idx = x + (y * self.w)
+        cell = self._sets.get(idx, self.EMPTY_CELL)
+        if obj not in cell:
+            raise KeyError(obj)
+        cell.remove(obj)
+        # Drop empty sets
+        if not cell:
+            del self._sets[idx]
 
     def add(self, x, y, obj):
-        self.get_cell(x, y).add(obj)
+        self._add_to_cell(x, y, obj)
+        self._index_add(x, y, obj)
+        self.version += 1
 
     def remove(self, x, y, obj):
-        self.get_cell(x, y).remove(obj)
+        self._remove_from_cell(x, y, obj)
+        self._index_remove(x, y, obj)
+        self.version += 1
+
+    def move(self, x, y, newx, newy, obj):
+        self._remove_from_cell(x, y, obj)
+        self._add_to_cell(newx, newy, obj)
+        self._index_add(newx, newy, obj)
+        self.version += 1
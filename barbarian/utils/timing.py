@@ -0,0 +1,59 @@
+"""
+Timing helpers.
+
+"""
+from time import perf_counter
+
+
+class Timings:
+    """
+    Cumulative timings, by name.
+
+    Each entry is a [count, total, max] list (times are in seconds).
+
+    """
+    def __init__(self):
+        self.entries = {}
+
+    def add(self, name, t):
+        """ Record a `t` seconds long call under `name`. """
+        if (entry := self.entries.get(name)) is None:
+            self.entries[name] = [1, t, t]
+            return
+        entry[0] += 1
+        entry[1] += t
+        if t > entry[2]:
+            entry[2] = t
+
+    def time(self, name, func, *args):
+        """ Call `func` with `args` and record how long it took. """
+        start = perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.add(name, perf_counter() - start)
+
+    def clear(self):
+        self.entries.clear()
+
+    @property
+    def total(self):
+        return sum(total for _, total, _ in self.entries.values())
+
+    def summary(self):
+        """ Return entries as a human readable table, slowest first. """
+        lines = []
+        for name, (count, total, max_) in sorted(
+            self.entries.items(), key=lambda t: t[1][1], reverse=True
+        ):
+            lines.append(
+                f'{name:<20} {total:9.3f}s {count:8d} calls '
+                f'(avg {1000 * total / count:.3f}ms, max {1000 * max_:.3f}ms)')
+        return '\n'.join(lines)
+
+    def report(self):
+        """ Return entries as a json friendly dict. """
+        return {
+            name: {'count': count, 'total': total, 'max': max_}
+            for name, (count, total, max_) in self.entries.items()
+        }
@@ -4,13 +4,18 @@ Level and world storage.
 """
 import logging
 
+import numpy as np
 import tcod
 
 from barbarian.utils.rng import Rng
 from barbarian.utils.structures.grid import (
     EntityGrid, GridContainer, OutOfBoundGridError)
+from barbarian.utils.structures.dijkstra import (
+    ArrayDijkstraGrid, DijkstraCache)
 from barbarian.genmap import builders
 from barbarian.spawn import spawn_level
+from barbarian.scheduler import Scheduler
+from barbarian.settings import PATHMAP_CACHE_MAX_BYTES, ACTIVITY_RADIUS
 
 
 logger = logging.getLogger(__name__)
@@ -25,6 +30,21 @@ class Level:
 
     It's up to the spawning code to assign them to the right container.
 
+    Each layer keeps a version counter, bumped whenever it changes, so
+    that derived data (fov and dijkstra maps, ...) can tell when it
+    is outdated:
+    - `tiles_version` for map tiles,
+    - `blocking_version` for anything affecting `is_blocked`,
+    - `transparency_version` for anything affecting sight,
+    - `version` on each entity container.
+    For this to work, layers should only be mutated via the level's
+    methods (`set_tile`, `add_entity`, `remove_entity`,
+    `update_entity` and `move_actor`).
+
+    Only actors close to the player actually take turns (and are
+    scheduled to do so, see `barbarian.scheduler`). Others are dormant
+    until woken up (see `update_activity` and `make_noise`).
+
     """
 
     def __init__(self, w, h, depth=1):
@@ -33,7 +53,8 @@ class Level:
         self.depth = depth
         self.map = None
         self.fov_map = None
-        self.explored = set()
+        # Cells explored by the player
+        self.explored = np.zeros((h, w), dtype=bool)
 
         self.start_pos = None, None
         self.exit_pos = None, None
@@ -43,6 +64,15 @@ class Level:
         self.actors = EntityGrid(self.w, self.h)
         self.props = EntityGrid(self.w, self.h)
         self.items = GridContainer(self.w, self.h)
+        # Awake actors
+        self.scheduler = Scheduler()
+
+        self.tiles_version = 0
+        self.blocking_version = 0
+        self.transparency_version = 0
+
+        # Dijkstra maps (see get_pathmap)
+        self.pathmaps = DijkstraCache(PATHMAP_CACHE_MAX_BYTES)
 
     def build_map(self, map_debug=False):
         """
@@ -84,18 +114,122 @@ class Level:
         """
         if self.fov_map is None:
             self.fov_map = tcod.map.Map(self.map.w, self.map.h)
-        for x, y, _ in self.map:
-            self.fov_map.transparent[y,x] = (
-                not self.map.cell_blocks(x, y) and
-                not (self.actors[x,y] is not None
-                 and self.actors[x,y].physics.blocks_sight) and
-                not (self.props[x,y] is not None
-                 and self.props[x,y].physics.blocks_sight)
-            )
-            # self.fov_map.walkable[y,x] = (
-            #     not self.map.cell_blocks(x, y) and
-            #     not any(e.physics.blocks for e in self.props[x,y])
-            # )
+        self.fov_map.transparent[:] = self.transparency_mask()
+
+    def transparency_mask(self):
+        """
+        Return a boolean array (indexed as [y, x]) of the cells that
+        don't block sight (neither their tile nor an entity on them).
+
+        """
+        mask = self.map.transparency_mask()
+        for container in (self.props, self.actors):
+            for x, y, e in container:
+                if e.physics.blocks_sight:
+                    mask[y, x] = False
+        return mask
+
+    def cell_blocks_sight(self, x, y):
+        """
+        Return True if the (x, y) cell (or an entity on it) blocks
+        sight, False otherwise.
+
+        """
+        def _blocks_sight(entity):
+            return entity is not None and entity.physics.blocks_sight
+
+        return (
+            self.map.cell_blocks_sight(x, y) or
+            _blocks_sight(self.props[x,y]) or
+            _blocks_sight(self.actors[x,y]))
+
+    def update_transparency(self, x, y):
+        """
+        Update the fov map for the (x, y) cell only.
+
+        Use this rather than `init_fov_map` when a single cell changes
+        (door toggled, sight blocking actor moving or spawning...).
+        No-op if the fov map hasn't been initialized yet.
+
+        """
+        if self.fov_map is not None:
+            self.fov_map.transparent[y, x] = not self.cell_blocks_sight(x, y)
+
+    def update_fov(self, actor):
+        """
+        Update `actor`'s fov from its current position (see
+        `Fov.update`). Return True if it was recomputed.
+
+        """
+        return actor.fov.update(
+            self, actor.pos.x, actor.pos.y, update_level=actor.is_player)
+
+    def update_fovs(self, actors=None):
+        """
+        Update the fov of every actor that has one (or of the passed
+        `actors` only).
+
+        Meant to be called once per turn: fovs are only recomputed for
+        actors that moved, or if something affecting sight changed.
+        Return the number of recomputed fovs.
+
+        """
+        if actors is None:
+            actors = self.actors.all
+        n_computed = 0
+        for actor in actors:
+            if actor.fov and self.update_fov(actor):
+                n_computed += 1
+        return n_computed
+
+    @property
+    def active_actors(self):
+        """ Awake actors, as a list (in the order they woke up). """
+        return list(self.scheduler)
+
+    def wake(self, actor):
+        """
+        Make `actor` active (ie schedule it to act right away), if it
+        isn't already.
+
+        """
+        if actor not in self.scheduler:
+            self.scheduler.add(actor)
+
+    def update_activity(self, x, y, radius=ACTIVITY_RADIUS):
+        """
+        Wake up actors around (x, y) (typically, the player's position)
+        and put the ones that are too far away back to sleep.
+
+        Actors are woken up when they're within `radius` (in both
+        directions) and on an explored cell (which includes any cell in
+        view of the player). They only go back to sleep when they're
+        out of `radius`, so actors woken up otherwise (`make_noise`)
+        stay awake even in unexplored areas.
+
+        Only looks at awake actors and at actors within range, so the
+        cost doesn't depend on the total number of actors.
+
+        """
+        for actor in self.active_actors:
+            if not actor.is_player and (
+                abs(actor.pos.x - x) > radius or abs(actor.pos.y - y) > radius
+            ):
+                self.scheduler.remove(actor)
+        size = radius * 2 + 1
+        for ax, ay, actor in self.actors.objects_in_rect(
+            x - radius, y - radius, size, size
+        ):
+            if self.explored[ay, ax]:
+                self.wake(actor)
+
+    def make_noise(self, x, y, radius):
+        """ Wake up all actors within `radius` of (x, y). """
+        size = radius * 2 + 1
+        for _, _, actor in self.actors.objects_in_rect(
+            x - radius, y - radius, size, size
+        ):
+            self.wake(actor)
 
     def get_map_cell(self, x, y):
         """ Shortcut to access map cells direcly. """
@@ -117,6 +251,105 @@ class Level:
         except OutOfBoundGridError:
             return True
 
+    def blocking_mask(self, ignore_actors=False, ignore_openable=False):
+        """
+        Return a boolean array (indexed as [y, x]) of the cells that are
+        blocked or occupied (ie `is_blocked` for the whole level).
+
+        If `ignore_actors` is True, actors won't be considered as
+        blocking.
+
+        If `ignore_openable` is True, cells holding an openable prop
+        (ie a door) will be considered free, whether they are currently
+        blocked or not.
+
+        """
+        mask = self.map.blocking_mask()
+        for x, y, e in self.props:
+            if e.physics.blocks:
+                mask[y, x] = True
+        if not ignore_actors:
+            for x, y, e in self.actors:
+                if e.physics.blocks:
+                    mask[y, x] = True
+        if ignore_openable:
+            for x, y, e in self.props:
+                if e.openable:
+                    mask[y, x] = False
+        return mask
+
+    def _pathmap_version(self, ignore_actors):
+        if ignore_actors:
+            # Actors moving around shouldn't invalidate the map
+            return self.tiles_version, self.props.version
+        return self.blocking_version
+
+    def get_pathmap(self, *goals, ignore_actors=False, ignore_openable=False):
+        """
+        Return a dijkstra map leading to `goals` ((x, y) or
+        (weight, x, y) tuples, see `DijkstraGrid.new`).
+
+        Maps are cached on the level, and only recomputed when the
+        blocking layer has changed. `ignore_actors` and `ignore_openable`
+        are passed to `blocking_mask`. Ignoring actors means the map
+        doesn't need to be recomputed each time something moves, and
+        should be prefered whenever possible.
+
+        """
+        key = ('goals', frozenset(goals), ignore_actors, ignore_openable)
+        return self.pathmaps.get(
+            key, self._pathmap_version(ignore_actors),
+            lambda: ArrayDijkstraGrid.new(
+                self.map.w, self.map.h, *goals,
+                passable=~self.blocking_mask(ignore_actors, ignore_openable)),
+        )
+
+    def set_tile(self, x, y, tile):
+        """ Change the map tile at position (x, y). """
+        self.map[x, y] = tile
+        if self.map.bitmask_grid is not None:
+            self.map.update_bitmask_grid([(x, y)])
+        self.update_transparency(x, y)
+        self.tiles_version += 1
+        self.blocking_version += 1
+        self.transparency_version += 1
+
+    def _entity_changed(self, entity, force=False):
+        if force or (entity.physics and entity.physics.blocks):
+            self.blocking_version += 1
+        if force or (entity.physics and entity.physics.blocks_sight):
+            self.transparency_version += 1
+            self.update_transparency(entity.pos.x, entity.pos.y)
+
+    def add_entity(self, layer, entity):
+        """
+        Add `entity` to the `layer` container (either `actors`, `props`
+        or `items`).
+
+        """
+        getattr(self, layer).add_e(entity)
+        self._entity_changed(entity)
+
+    def remove_entity(self, layer, entity):
+        """
+        Remove `entity` from the `layer` container (either `actors`,
+        `props` or `items`).
+
+        """
+        getattr(self, layer).remove_e(entity)
+        if layer == 'actors':
+            self.scheduler.remove(entity)
+        self._entity_changed(entity)
+
+    def update_entity(self, layer, entity):
+        """
+        Notify the level that `entity` was changed in place (ie, a door
+        was opened), which may have affected blocking or sight.
+
+        """
+        getattr(self, layer).touch()
+        self._entity_changed(entity, force=True)
+
     def move_actor(self, actor, dx, dy):
         """
         Moved `actor` along the `dx`, `dy` vector, and update
@@ -128,11 +361,13 @@ class Level:
         Not sure how to enforce this tho...
 
         """
-        newx, newy = actor.pos.x + dx, actor.pos.y + dy
+        oldx, oldy = actor.pos.x, actor.pos.y
+        newx, newy = oldx + dx, oldy + dy
         if not self.is_blocked(newx, newy):
-            self.actors.remove_e(actor)
-            actor.pos.x, actor.pos.y = newx, newy
-            self.actors.add_e(actor)
+            self.actors.move_e(actor, newx, newy)
+            self._entity_changed(actor)
+            if actor.physics.blocks_sight:
+                self.update_transparency(oldx, oldy)
             return True
         return False
 
@@ -146,7 +381,8 @@ class Level:
         its fov.
 
         """
-        self.actors.add_e(actor)
+        self.add_entity('actors', actor)
+        self.wake(actor)
         if actor.fov:
             actor.fov.reset()
             actor.fov.compute(
@@ -228,7 +464,7 @@ class World:
         """
         assert self.levels
 
-        self.current_level.actors.remove_e(player)
+        self.current_level.remove_entity('actors', player)
 
         if depth_delta >= 0:
             if depth_delta >= 1:
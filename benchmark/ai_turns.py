@@ -0,0 +1,118 @@
+"""
+Measure game loop throughput (turns per second) with lots of monsters
+on a regular level, with the batched ai pass (`systems.ai.plan_turn`)
+or with every actor calling `tmp_ai` on its own (what the loop used
+to do).
+
+The player just waits every turn. Nobody can die (monsters bumping
+into each other do attack), so that both runs keep the same number of
+actors, and every monster is kept active (see
+`Level.update_activity`). Game state updates are disabled, so that we
+only measure the turn itself.
+
+The decision phase alone (chosing actions for every monster, from the
+same game state) is timed separately.
+
+"""
+import os, sys
+import time
+import timeit
+from unittest.mock import patch
+
+# This assumes we're running from the <root>/bin folder
+root_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, root_dir)
+
+import numpy as np
+
+from barbarian import systems
+from barbarian.game import Game
+from barbarian.world import World, Level
+from barbarian.state import GameState
+from barbarian.actions import Action, ActionType
+from barbarian.raws import get_entity_data
+from barbarian.spawn import spawn_entity, spawn_player
+from barbarian.settings import MAP_W, MAP_H
+
+
+N_MONSTERS = (100, 500, 1000)
+N_TURNS = 50
+SEED = '3078681389793250219'
+
+
+def build_game(n_monsters):
+    game = Game()
+    game.init_rng(SEED)
+    game.world = World(MAP_W, MAP_H)
+    level = game.world.new_level()
+    game.world.insert_level(level)
+
+    rng = np.random.default_rng(0)
+    free = np.argwhere(~level.blocking_mask()).tolist()
+    py, px = free.pop(rng.integers(len(free)))
+    for i in rng.choice(len(free), min(n_monsters, len(free)), replace=False):
+        y, x = free[i]
+        orc = spawn_entity(x, y, get_entity_data('orc', 'actors'))
+        orc.health.hp = 10 ** 9
+        level.add_entity('actors', orc)
+
+    game.player = spawn_player(px, py)
+    game.player.health.hp = 10 ** 9
+    level.enter(game.player)
+    return game
+
+
+def everyone_active(level, x, y, radius=None):
+    for actor in level.actors.all:
+        level.wake(actor)
+
+
+def run(n_monsters, batched):
+    game = build_game(n_monsters)
+    n_actors = len(game.actors)
+    with patch.object(GameState, 'update'), \
+            patch.object(Level, 'update_activity', everyone_active):
+        if batched:
+            game.start_gameloop()
+            start = time.perf_counter()
+            for _ in range(N_TURNS):
+                game.gameloop.send(Action(ActionType.IDLE, actor=game.player))
+        else:
+            with patch('barbarian.systems.ai.plan_turn', return_value={}):
+                game.start_gameloop()
+                start = time.perf_counter()
+                for _ in range(N_TURNS):
+                    game.gameloop.send(
+                        Action(ActionType.IDLE, actor=game.player))
+        elapsed = time.perf_counter() - start
+    return n_actors, N_TURNS / elapsed
+
+
+def decide(n_monsters, number=20):
+    game = build_game(n_monsters)
+    game.current_level.update_fovs()
+    monsters = [a for a in game.actors if not a.is_player]
+
+    def per_actor():
+        return [systems.ai.tmp_ai(a, game) for a in monsters]
+
+    def batched():
+        return systems.ai.plan_turn(game)
+
+    return [
+        min(timeit.repeat(f, number=number, repeat=3)) / number
+        for f in (per_actor, batched)]
+
+
+if __name__ == '__main__':
+    for n in N_MONSTERS:
+        n_actors, per_actor = run(n, batched=False)
+        _, batched = run(n, batched=True)
+        t_per_actor, t_batched = decide(n)
+        print(
+            f'{n_actors - 1:>5} monsters:\n'
+            f'  turns:     per actor ai: {per_actor:7.1f}/s  '
+            f'batched ai: {batched:7.1f}/s  (x{batched / per_actor:.1f})\n'
+            f'  decisions: per actor ai: {t_per_actor * 1000:7.2f}ms  '
+            f'batched ai: {t_batched * 1000:7.2f}ms  '
+            f'(x{t_per_actor / t_batched:.1f})')
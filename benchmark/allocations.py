@@ -0,0 +1,93 @@
+"""
+Measure memory allocated by actions and events, with 200 monsters
+chasing or wandering around a waiting player (nobody can die, and
+everyone is kept active, see ai_turns.py).
+
+- turn: peak memory allocated during a whole turn, over what was
+  allocated before it (tracemalloc is on, so timings are inflated),
+- actions: memory held by one turn worth of monster actions (ie one
+  move action per monster, accepted, so with their events), and how
+  long creating and accepting them takes.
+
+"""
+import os, sys
+import time
+import timeit
+import tracemalloc
+from unittest.mock import patch
+
+# This assumes we're running from the <root>/bin folder
+root_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, root_dir)
+
+from ai_turns import build_game, everyone_active
+
+from barbarian.world import Level
+from barbarian.state import GameState
+from barbarian.actions import Action, ActionType
+
+
+N_MONSTERS = 200
+N_TURNS = 50
+
+
+def turn_peaks(n_monsters):
+    game = build_game(n_monsters)
+    peaks = []
+    with patch.object(GameState, 'update'), \
+            patch.object(Level, 'update_activity', everyone_active):
+        game.start_gameloop()
+        tracemalloc.start()
+        start = time.perf_counter()
+        for _ in range(N_TURNS):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            game.gameloop.send(Action(ActionType.IDLE, actor=game.player))
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+        elapsed = time.perf_counter() - start
+        tracemalloc.stop()
+    return sum(peaks) / len(peaks), elapsed / N_TURNS
+
+
+def one_turn_of_actions(monsters, bus):
+    actions = [Action.move(m, dir=(1, 0)) for m in monsters]
+    for a in actions:
+        # As done by Game.process_action
+        a.bus = bus
+        a.accept(event_data={'from_x': 0, 'from_y': 0})
+    return actions
+
+
+def action_costs(n_monsters):
+    game = build_game(n_monsters)
+    monsters = [a for a in game.actors if not a.is_player]
+
+    bus = game.events
+    bus.clear()
+    bus.flush_log(0)
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    kept = one_turn_of_actions(monsters, bus)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+
+    def run():
+        one_turn_of_actions(monsters, bus)
+        bus.clear()
+        bus.flush_log(0)
+
+    t = min(timeit.repeat(run, number=100, repeat=3)) / 100
+    return after - before, t
+
+
+if __name__ == '__main__':
+    peak, t_turn = turn_peaks(N_MONSTERS)
+    held, t_actions = action_costs(N_MONSTERS)
+    print(
+        f'{N_MONSTERS} monsters:\n'
+        f'  turn:    {peak / 1024:8.1f}KiB peak  ({t_turn * 1000:.2f}ms)\n'
+        f'  actions: {held / 1024:8.1f}KiB held  '
+        f'({held / N_MONSTERS:.0f}B per action, '
+        f'{t_actions * 1000:.3f}ms)')
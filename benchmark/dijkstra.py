@@ -0,0 +1,56 @@
+"""
+Compare DijkstraGrid's python and array (tcod) engines.
+
+Distances are computed from the center of a generated cave, on the
+default map size and on a bigger one.
+
+"""
+import os, sys
+import timeit
+
+# This assumes we're running from the <root>/bin folder
+root_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, root_dir)
+
+from barbarian.utils.rng import Rng
+from barbarian.utils.structures.dijkstra import DijkstraGrid
+from barbarian.genmap.builders import CellularAutomataMapBuilder
+
+from barbarian.settings import MAP_W, MAP_H
+
+
+SIZES = ((MAP_W, MAP_H), (250, 250))
+
+
+def bench(m, number):
+
+    # Both engines read passability from the same mask, so that we
+    # only compare the engines themselves.
+    passable = ~m.blocking_mask()
+
+    def python_engine():
+        return DijkstraGrid.new(
+            m.w, m.h, start, predicate=lambda x, y, _: passable[y, x])
+
+    def array_engine():
+        return DijkstraGrid.new(m.w, m.h, start, passable=passable)
+
+    start = (m.w // 2, m.h // 2)
+    while m.cell_blocks(*start):
+        start = (start[0] - 1, start[1])
+
+    assert python_engine().cells == array_engine().cells
+
+    t_py = min(timeit.repeat(python_engine, number=number, repeat=3)) / number
+    t_arr = min(timeit.repeat(array_engine, number=number, repeat=3)) / number
+    return t_py, t_arr
+
+
+if __name__ == '__main__':
+    Rng.add_rng('dungeon', '3078681389793250219')
+    for w, h in SIZES:
+        m = CellularAutomataMapBuilder().build_map(w, h, 1)
+        t_py, t_arr = bench(m, 10 if w * h < 10000 else 2)
+        print(
+            f'{w}x{h}: python: {t_py * 1000:8.2f}ms  '
+            f'array: {t_arr * 1000:8.2f}ms  (x{t_py / t_arr:.1f})')
@@ -0,0 +1,89 @@
+"""
+Measure how turn cost grows with the total number of monsters on a
+big (200x200) level, when every actor takes its turn (what the game
+loop used to do) or when only actors around the player are active.
+
+Same setup as `ai_turns.py`: the player waits, nobody dies and game
+state updates are disabled.
+
+"""
+import os, sys
+import time
+from unittest.mock import patch
+
+# This assumes we're running from the <root>/bin folder
+root_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, root_dir)
+
+import numpy as np
+
+from barbarian.game import Game
+from barbarian.world import World, Level
+from barbarian.state import GameState
+from barbarian.actions import Action, ActionType
+from barbarian.raws import get_entity_data
+from barbarian.spawn import spawn_entity, spawn_player
+
+
+W, H = 200, 200
+N_MONSTERS = (100, 1000, 4000)
+N_TURNS = 20
+SEED = '3078681389793250219'
+
+
+def build_game(n_monsters):
+    game = Game()
+    game.init_rng(SEED)
+    game.world = World(W, H)
+    level = game.world.new_level()
+    game.world.insert_level(level)
+    for actor in level.actors.all:
+        level.remove_entity('actors', actor)
+
+    rng = np.random.default_rng(0)
+    free = np.argwhere(~level.blocking_mask()).tolist()
+    py, px = free.pop(rng.integers(len(free)))
+    for i in rng.choice(len(free), min(n_monsters, len(free)), replace=False):
+        y, x = free[i]
+        orc = spawn_entity(x, y, get_entity_data('orc', 'actors'))
+        orc.health.hp = 10 ** 9
+        level.add_entity('actors', orc)
+
+    game.player = spawn_player(px, py)
+    game.player.health.hp = 10 ** 9
+    level.enter(game.player)
+    return game
+
+
+def everyone_active(level, x, y, radius=None):
+    for actor in level.actors.all:
+        level.wake(actor)
+
+
+def run(n_monsters, dormancy):
+    game = build_game(n_monsters)
+    with patch.object(GameState, 'update'):
+        if dormancy:
+            game.start_gameloop()
+            start = time.perf_counter()
+            for _ in range(N_TURNS):
+                game.gameloop.send(Action(ActionType.IDLE, actor=game.player))
+        else:
+            with patch.object(Level, 'update_activity', everyone_active):
+                game.start_gameloop()
+                start = time.perf_counter()
+                for _ in range(N_TURNS):
+                    game.gameloop.send(
+                        Action(ActionType.IDLE, actor=game.player))
+        elapsed = time.perf_counter() - start
+    return len(game.current_level.scheduler), elapsed / N_TURNS
+
+
+if __name__ == '__main__':
+    for n in N_MONSTERS:
+        _, t_all = run(n, dormancy=False)
+        n_active, t_active = run(n, dormancy=True)
+        print(
+            f'{n:>5} monsters: all active: {t_all * 1000:8.2f}ms/turn  '
+            f'dormancy: {t_active * 1000:8.2f}ms/turn '
+            f'({n_active} active)')
@@ -0,0 +1,79 @@
+"""
+Measure event dispatch cost over a turn: each actor emits a few events
+(accepted actions, spotted actors...) then events are handled, as the
+game loop does after every actor's turn.
+
+Compares polling a subscription to ACTOR_DIED on the game's event bus
+(see `events.EventBus`) to scanning the whole event queue for
+unprocessed events every time (what `Game.handle_events` used to do,
+back when all events were also stored in a global queue).
+
+"""
+import os, sys
+import timeit
+
+# This assumes we're running from the <root>/bin folder
+root_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, root_dir)
+
+from barbarian.events import Event, EventType, EventBus
+
+
+N_ACTORS = (10, 100, 1000)
+EVENTS_PER_ACTOR = 3
+DEATH_EVERY = 50    # one actor out of DEATH_EVERY dies
+
+
+def turn(n_actors, emit, handle_events):
+    for i in range(n_actors):
+        for _ in range(EVENTS_PER_ACTOR):
+            emit(EventType.ACTION_ACCEPTED)
+        if i % DEATH_EVERY == 0:
+            emit(EventType.ACTOR_DIED)
+        handle_events()
+
+
+def run(n_actors, number=10):
+    # Every event, as the old event queue used to store them
+    queue = []
+
+    def queue_emit(event_type):
+        queue.append(Event.emit(event_type))
+
+    def scan_queue():
+        for e in queue:
+            if e.processed:
+                continue
+            if e.type == EventType.ACTOR_DIED:
+                e.processed = True
+
+    def with_scan():
+        turn(n_actors, queue_emit, scan_queue)
+        queue.clear()
+
+    bus = EventBus()
+    deaths = bus.subscribe(EventType.ACTOR_DIED)
+
+    def bus_emit(event_type):
+        Event.emit(event_type, bus=bus)
+
+    def poll_bus():
+        for e in deaths.poll():
+            e.processed = True
+
+    def with_bus():
+        turn(n_actors, bus_emit, poll_bus)
+        bus.clear()
+        bus.flush_log(0)
+
+    t_scan = min(timeit.repeat(with_scan, number=number, repeat=3)) / number
+    t_bus = min(timeit.repeat(with_bus, number=number, repeat=3)) / number
+    return t_scan, t_bus
+
+
+if __name__ == '__main__':
+    for n in N_ACTORS:
+        t_scan, t_bus = run(n)
+        print(
+            f'{n:>5} actors: queue scan: {t_scan * 1000:8.3f}ms  '
+            f'bus: {t_bus * 1000:8.3f}ms  (x{t_scan / t_bus:.1f})')
@@ -0,0 +1,72 @@
+"""
+Measure the cost of a single fov update (ie what happens every time the
+player moves) as the map grows.
+
+Compares computing the fov on the whole map (what Fov.compute used to
+do) with computing it on the window within range.
+
+"""
+import os, sys
+import timeit
+
+# This assumes we're running from the <root>/bin folder
+root_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, root_dir)
+
+import numpy as np
+
+from barbarian.components.actor import Fov
+from barbarian.map import Map, TileType
+from barbarian.world import Level
+
+
+SIZES = ((80, 50), (250, 250), (1000, 1000))
+FOV_RANGE = 10
+N_MOVES = 100
+
+
+def build_level(w, h):
+    rng = np.random.default_rng(0)
+    l = Level(w, h)
+    l.map = Map(w, h, [TileType.FLOOR] * (w * h))
+    l.init_fov_map()
+    l.fov_map.transparent[:] = rng.random((h, w)) < .8
+    return l
+
+
+def full_map_fov(level, fov, x, y):
+    """ Fov.compute, as it used to be. """
+    level.fov_map.compute_fov(
+        x, y, radius=fov.range, light_walls=True, algorithm=0)
+    fov.visible = level.fov_map.fov.copy()
+    if fov.explored is None or fov.explored.shape != fov.visible.shape:
+        fov.explored = np.zeros_like(fov.visible)
+    fov.explored |= fov.visible
+
+
+def windowed_fov(level, fov, x, y):
+    fov.compute(level, x, y)
+
+
+def bench(level, func, moves):
+    fov = Fov(range=FOV_RANGE)
+
+    def run():
+        for x, y in moves:
+            func(level, fov, x, y)
+
+    return min(timeit.repeat(run, number=1, repeat=3)) / len(moves)
+
+
+if __name__ == '__main__':
+    for w, h in SIZES:
+        level = build_level(w, h)
+        rng = np.random.default_rng(1)
+        moves = list(zip(
+            rng.integers(w, size=N_MOVES).tolist(),
+            rng.integers(h, size=N_MOVES).tolist()))
+        t_full = bench(level, full_map_fov, moves)
+        t_win = bench(level, windowed_fov, moves)
+        print(
+            f'{w}x{h}: full map: {t_full * 1e6:10.1f}us  '
+            f'window: {t_win * 1e6:8.1f}us  (x{t_full / t_win:.1f})')
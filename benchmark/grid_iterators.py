@@ -0,0 +1,88 @@
+"""
+Compare the grid iterators with the equivalent loops over the whole
+grid (ie what callers used to do), on a regular 80x50 map.
+
+"""
+import os, sys
+import timeit
+
+# This assumes we're running from the <root>/bin folder
+root_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, root_dir)
+
+import numpy as np
+
+from barbarian.utils.structures.grid import Grid, ArrayGrid
+
+
+class IntArrayGrid(ArrayGrid):
+    dtype = np.int32
+    fill_value = 0
+
+
+W, H = 80, 50
+RX, RY, RW, RH = 20, 10, 20, 20
+
+# iterator: (old way, new way)
+CASES = {
+    'iter': (
+        'for x, y, c in old_iter(g): pass',
+        'for x, y, c in g: pass',
+    ),
+    'iter_rows': (
+        'for y in range(g.h): [g[x, y] for x in range(g.w)]',
+        'for y, row in g.iter_rows(): pass',
+    ),
+    'iter_indices': (
+        'for x, y, _ in old_iter(g): pass',
+        'for x, y, idx in g.iter_indices(): pass',
+    ),
+    'iter_rect': (
+        'for x, y, c in old_iter(g):\n'
+        '    if not (RX <= x < RX + RW and RY <= y < RY + RH): continue',
+        'for x, y, c in g.iter_rect(RX, RY, RW, RH): pass',
+    ),
+    'iter_where': (
+        '[(x, y, c) for x, y, c in old_iter(g) if pred(x, y, c)]',
+        'list(g.iter_where(pred))',
+    ),
+    'iter_where mask': (
+        '[(x, y, c) for x, y, c in old_iter(g) if pred(x, y, c)]',
+        'list(g.iter_where(g.as_array(np.int64) % 7 == 0))',
+    ),
+    'values_in_rect': (
+        '[g[x, y] for y in range(RY, RY + RH) for x in range(RX, RX + RW)]',
+        'g.values_in_rect(RX, RY, RW, RH)',
+    ),
+}
+
+
+def old_iter(g):
+    """ Grid.__iter__, as it used to be. """
+    for i, c in enumerate(g.cells):
+        x, y = i % g.w, i // g.w
+        yield x, y, c
+
+
+def pred(x, y, c):
+    return c % 7 == 0
+
+
+def bench(g, stmt, number=100):
+    timer = timeit.Timer(stmt, globals={
+        'g': g, 'old_iter': old_iter, 'pred': pred, 'np': np,
+        'RX': RX, 'RY': RY, 'RW': RW, 'RH': RH})
+    return min(timer.repeat(5, number)) / number
+
+
+if __name__ == '__main__':
+    for grid_cls in (Grid, IntArrayGrid):
+        g = grid_cls(W, H, list(range(W * H)))
+        print(f'{grid_cls.__name__} ({W}x{H})')
+        for name, (old, new) in CASES.items():
+            old_t, new_t = bench(g, old), bench(g, new)
+            print(
+                f'  {name:<16}'
+                f'loop: {old_t * 1e6:8.1f}us  '
+                f'iterator: {new_t * 1e6:8.1f}us  '
+                f'(x{old_t / new_t:.1f})')
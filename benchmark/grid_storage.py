@@ -0,0 +1,55 @@
+"""
+Compare the list and numpy backed grid storages.
+
+Times copy, slice and full iteration on a regular 80x50 map and on a
+much bigger 1000x1000 grid.
+
+Full iteration is the one place where the array storage is (slightly)
+slower: every cell still has to be boxed into a python object, which
+the list storage already holds. Whole grid work should go through the
+array instead.
+
+"""
+import os, sys
+import timeit
+
+# This assumes we're running from the <root>/bin folder
+root_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, root_dir)
+
+import numpy as np
+
+from barbarian.utils.structures.grid import Grid, ArrayGrid
+
+
+class IntArrayGrid(ArrayGrid):
+    dtype = np.int32
+    fill_value = 0
+
+
+SIZES = ((80, 50), (1000, 1000))
+
+OPERATIONS = {
+    'copy': 'g.copy()',
+    'slice': 'g.slice(w // 4, h // 4, w // 2, h // 2)',
+    'iterate': 'for _ in g: pass',
+}
+
+
+def bench(grid_cls, w, h, stmt, number):
+    g = grid_cls(w, h, list(range(w * h)))
+    timer = timeit.Timer(stmt, globals={'g': g, 'w': w, 'h': h})
+    return min(timer.repeat(5, number)) / number
+
+
+if __name__ == '__main__':
+    for w, h in SIZES:
+        number = 100 if w * h < 10000 else 2
+        print(f'--- {w}x{h} ---')
+        for op_name, stmt in OPERATIONS.items():
+            t_list = bench(Grid, w, h, stmt, number)
+            t_array = bench(IntArrayGrid, w, h, stmt, number)
+            print(
+                f'{op_name:<8} list: {t_list * 1000:9.3f}ms  '
+                f'array: {t_array * 1000:9.3f}ms  '
+                f'(x{t_list / t_array:.1f})')
@@ -0,0 +1,48 @@
+"""
+Play a few headless games (see `barbarian.headless`) and report
+throughput, along with where the time went.
+
+Unlike game_update.py, this exercises the whole game loop: level
+generation, ai, fovs, actions and events.
+
+    $ python benchmark/headless.py [n_turns] [seed ...]
+
+"""
+import os, sys
+import logging
+
+# This assumes we're running from the <root>/bin folder
+root_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, root_dir)
+
+from barbarian.headless import run
+
+
+SEEDS = ('3078681389793250219', '4876877298345515653', '1', '2', '3')
+N_TURNS = 1000
+
+
+def print_report(report):
+    print(
+        f"seed {report['seed']}: {report['turns']} turns, "
+        f"depth {report['depth']}, "
+        f"{'killed by ' + report['cause_of_death'] if report['dead'] else 'alive'} "
+        f"- {report['elapsed']:.2f}s, "
+        f"{report['turns_per_sec']:.0f} turns/s, "
+        f"{report['levels_per_sec']:.2f} levels/s")
+    timings = sorted(
+        report['timings'].items(), key=lambda t: t[1]['total'], reverse=True)
+    for name, t in timings:
+        print(
+            f"    {name:<16} {t['total']:8.3f}s "
+            f"({100 * t['total'] / report['elapsed']:4.1f}%) "
+            f"{t['count']:6d} calls, max {1000 * t['max']:.2f}ms")
+
+
+if __name__ == '__main__':
+    n_turns = int(sys.argv[1]) if len(sys.argv) > 1 else N_TURNS
+    seeds = sys.argv[2:] or SEEDS
+    # Spawn warnings would drown the output
+    logging.disable(logging.WARNING)
+    for seed in seeds:
+        print_report(run(n_turns=n_turns, seed=seed))
@@ -0,0 +1,75 @@
+"""
+Measure the memory used by a 50 levels run.
+
+Generates (and populates) 50 levels, like a player diving to depth 50
+would, and reports the memory allocated for the whole world as well as
+for the item containers alone.
+
+The dense container below reproduces the old GridContainer storage
+(one set per cell), for comparison.
+
+"""
+import os, sys
+import tracemalloc
+
+# This assumes we're running from the <root>/bin folder
+root_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, root_dir)
+
+from barbarian.game import Game
+from barbarian.world import World
+from barbarian.utils.structures.grid import Grid, EntityGrid, GridContainer
+from barbarian.settings import MAP_W, MAP_H
+
+
+N_LEVELS = 50
+
+
+class DenseGridContainer(EntityGrid):
+
+    def __init__(self, width, height):
+        cells = [set() for _ in range(width * height)]
+        Grid.__init__(self, width, height, cells)
+        self._index = {}
+        self._buckets = {}
+        self.version = 0
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    try:
+        res = func(*args)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return res, current, peak
+
+
+def build_world(n_levels):
+    world = World(MAP_W, MAP_H)
+    for depth in range(1, n_levels + 1):
+        world.current_depth = depth
+        world.insert_level(world.new_level())
+    return world
+
+
+def build_containers(container_cls, n_levels):
+    return [container_cls(MAP_W, MAP_H) for _ in range(n_levels)]
+
+
+def mb(n):
+    return f'{n / (1024 * 1024):.2f} MB'
+
+
+if __name__ == '__main__':
+    g = Game()
+    g.init_rng('3078681389793250219')
+
+    world, current, peak = measure(build_world, N_LEVELS)
+    n_items = sum(len(l.items) for l in world.levels)
+    print(f'World ({N_LEVELS} levels, {n_items} items): '
+          f'{mb(current)} (peak: {mb(peak)})')
+
+    for cls in (DenseGridContainer, GridContainer):
+        _, current, _ = measure(build_containers, cls, N_LEVELS)
+        print(f'{cls.__name__} x {N_LEVELS}: {mb(current)}')
@@ -0,0 +1,77 @@
+"""
+Measure the per turn cost of keeping every monster's fov up to date,
+with 10, 100 and 500 monsters on a regular level.
+
+Each turn, a fraction of the monsters move (the others are idle or
+stuck), and every fov is either recomputed (what we'd do without
+caching) or updated via `Level.update_fovs`, which only recomputes fovs
+that were invalidated.
+
+"""
+import os, sys
+import timeit
+
+# This assumes we're running from the <root>/bin folder
+root_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, root_dir)
+
+import numpy as np
+
+from barbarian.game import Game
+from barbarian.world import World
+from barbarian.raws import get_entity_data
+from barbarian.spawn import spawn_entity
+from barbarian.settings import MAP_W, MAP_H
+
+
+N_MONSTERS = (10, 100, 500)
+MOVING_RATIO = .25
+N_TURNS = 20
+
+
+def build_level(n_monsters, rng):
+    world = World(MAP_W, MAP_H)
+    level = world.new_level()
+    for actor in list(level.actors.all):
+        level.remove_entity('actors', actor)
+
+    free = np.argwhere(~level.blocking_mask())
+    cells = rng.choice(len(free), size=min(n_monsters, len(free)), replace=False)
+    for y, x in free[cells].tolist():
+        level.add_entity(
+            'actors', spawn_entity(x, y, get_entity_data('orc', 'actors')))
+    return level
+
+
+def move_some(level, rng):
+    monsters = level.actors.all
+    for i in rng.choice(len(monsters), int(len(monsters) * MOVING_RATIO)):
+        dx, dy = rng.integers(-1, 2, size=2).tolist()
+        level.move_actor(monsters[i], dx, dy)
+
+
+def compute_all(level):
+    for _, _, actor in level.actors:
+        actor.fov.compute(level, actor.pos.x, actor.pos.y)
+
+
+def bench(n_monsters, update_func):
+    rng = np.random.default_rng(0)
+    level = build_level(n_monsters, rng)
+    update_func(level)
+    elapsed = 0
+    for _ in range(N_TURNS):
+        move_some(level, rng)
+        elapsed += timeit.timeit(lambda: update_func(level), number=1)
+    return elapsed / N_TURNS
+
+
+if __name__ == '__main__':
+    g = Game()
+    g.init_rng('3078681389793250219')
+    for n in N_MONSTERS:
+        t_all = bench(n, compute_all)
+        t_upd = bench(n, lambda l: l.update_fovs())
+        print(
+            f'{n:>4} monsters: recompute all: {t_all * 1000:7.2f}ms  '
+            f'update_fovs: {t_upd * 1000:7.2f}ms  (x{t_all / t_upd:.1f})')
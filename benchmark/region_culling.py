@@ -0,0 +1,69 @@
+"""
+Compare unreachable area culling, using a dijkstra map (like the
+cellular builder used to) or region labeling.
+
+Both run on a smoothed, not yet culled, cave, on the default map size
+and on a bigger one.
+
+"""
+import os, sys
+import timeit
+
+# This assumes we're running from the <root>/bin folder
+root_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, root_dir)
+
+from barbarian.utils.rng import Rng
+from barbarian.utils.structures.dijkstra import DijkstraGrid
+from barbarian.genmap.builders import CellularAutomataMapBuilder
+from barbarian.map import TileType
+
+from barbarian.settings import MAP_W, MAP_H
+
+
+SIZES = ((MAP_W, MAP_H), (250, 250))
+
+
+def dijkstra_culling(m, start):
+    dg = DijkstraGrid.new(
+        m.w, m.h, start, passable=~m.blocking_mask())
+    for x, y, dist_to_start in dg:
+        if m.cell_blocks(x, y):
+            continue
+        if dist_to_start == dg.inf:
+            m[x, y] = TileType.WALL
+
+
+def labeling_culling(m, start):
+    builder = CellularAutomataMapBuilder()
+    builder.map = m
+    builder.cull_unreachable(*start)
+
+
+def bench(cave, start, number):
+
+    def run(func):
+        m = cave.copy()
+        func(m, start)
+        return m
+
+    assert run(dijkstra_culling).cells == run(labeling_culling).cells
+
+    t_dg = min(timeit.repeat(
+        lambda: run(dijkstra_culling), number=number, repeat=3)) / number
+    t_lbl = min(timeit.repeat(
+        lambda: run(labeling_culling), number=number, repeat=3)) / number
+    return t_dg, t_lbl
+
+
+if __name__ == '__main__':
+    Rng.add_rng('dungeon', '3078681389793250219')
+    for w, h in SIZES:
+        builder = CellularAutomataMapBuilder(debug=True)
+        builder.build_map(w, h, 1)
+        # Last snapshot before culling
+        cave = builder.snapshots[-2]
+        t_dg, t_lbl = bench(cave, builder.start_pos, 10 if w * h < 10000 else 2)
+        print(
+            f'{w}x{h}: dijkstra: {t_dg * 1000:8.2f}ms  '
+            f'labeling: {t_lbl * 1000:8.2f}ms  (x{t_dg / t_lbl:.1f})')
@@ -0,0 +1,71 @@
+"""
+Measure the turn scheduler's overhead, compared to rebuilding the
+actor list from the level's entity grid every turn (what the game
+loop used to do), as well as spawn / death costs.
+
+Actors don't do anything here, so this is pure scheduling overhead.
+
+"""
+import os, sys
+import timeit
+
+# This assumes we're running from the <root>/bin folder
+root_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, root_dir)
+
+from barbarian.scheduler import Scheduler, TICK
+from barbarian.utils.structures.grid import EntityGrid
+
+
+N_ACTORS = (100, 1000, 10000)
+W, H = 200, 200
+
+
+class Dummy:
+    pass
+
+
+def build(n):
+    grid = EntityGrid(W, H)
+    scheduler = Scheduler()
+    actors = [Dummy() for _ in range(n)]
+    for i, a in enumerate(actors):
+        grid.add(i % W, i // W, a)
+        # Mixed speeds: some actors act twice per turn
+        scheduler.add(a)
+        a.delay = TICK // 2 if i % 4 == 0 else TICK
+    return grid, scheduler, actors
+
+
+def list_turn(grid):
+    for actor in list(grid.all):
+        pass
+
+
+def scheduler_turn(scheduler):
+    for actor in scheduler.turn():
+        scheduler.reschedule(actor, actor.delay)
+
+
+def spawn_and_die(scheduler, actors):
+    for a in actors:
+        scheduler.remove(a)
+    for a in actors:
+        scheduler.add(a)
+
+
+def bench(stmt, number=20):
+    return min(timeit.repeat(stmt, number=number, repeat=3)) / number
+
+
+if __name__ == '__main__':
+    for n in N_ACTORS:
+        grid, scheduler, actors = build(n)
+        t_list = bench(lambda: list_turn(grid))
+        t_sched = bench(lambda: scheduler_turn(scheduler))
+        churn = actors[:n // 10]
+        t_churn = bench(lambda: spawn_and_die(scheduler, churn))
+        print(
+            f'{n:>6} actors: list rebuild: {t_list * 1000:7.3f}ms/turn  '
+            f'scheduler: {t_sched * 1000:7.3f}ms/turn (~{n * 1.25:.0f} acts)  '
+            f'spawn + death: {t_churn / (2 * len(churn)) * 1e6:.2f}us')
@@ -0,0 +1,76 @@
+"""
+Compare entity spotting by scanning every visible cell (what
+`spot_entities` used to do) with looking up entities around the
+viewer, on an open 80x50 map with a varying number of monsters.
+
+"""
+import os, sys
+import timeit
+
+# This assumes we're running from the <root>/bin folder
+root_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, root_dir)
+
+import numpy as np
+
+from barbarian.components import init_components
+from barbarian.events import Event, EventType
+from barbarian.map import Map, TileType
+from barbarian.raws import get_entity_data
+from barbarian.spawn import spawn_entity
+from barbarian.systems.movement import spot_entities
+from barbarian.world import Level
+
+
+W, H = 80, 50
+N_MONSTERS = (10, 100, 500)
+
+
+def cell_scan(actor, level):
+    """ spot_entities, as it used to be. """
+    for x, y in actor.fov.visible_cells:
+        if a := level.actors[x,y]:
+            if a is actor:
+                continue
+            Event.emit(
+                EventType.ACTOR_SPOTTED,
+                event_data={'actor': actor, 'target': a})
+        if p := level.props[x,y]:
+            if p.typed.type == 'trap':
+                Event.emit(
+                    EventType.ACTOR_SPOTTED,
+                    event_data={'actor': actor, 'target': p})
+
+
+def build_level(n_monsters):
+    rng = np.random.default_rng(0)
+    level = Level(W, H)
+    level.map = Map(W, H, [TileType.FLOOR] * (W * H))
+    level.init_fov_map()
+    cells = rng.choice(W * H, size=n_monsters + 1, replace=False).tolist()
+    viewer = spawn_entity(W // 2, H // 2, get_entity_data('player', 'actors'))
+    level.add_entity('actors', viewer)
+    for idx in cells:
+        x, y = idx % W, idx // W
+        if not level.actors[x, y]:
+            level.add_entity(
+                'actors', spawn_entity(x, y, get_entity_data('orc', 'actors')))
+    viewer.fov.compute(level, viewer.pos.x, viewer.pos.y)
+    return level, viewer
+
+
+def bench(func, actor, level, number=200):
+    def run():
+        func(actor, level)
+    return min(timeit.repeat(run, number=number, repeat=3)) / number
+
+
+if __name__ == '__main__':
+    init_components()
+    for n in N_MONSTERS:
+        level, viewer = build_level(n)
+        t_scan = bench(cell_scan, viewer, level)
+        t_spot = bench(spot_entities, viewer, level)
+        print(
+            f'{n:>4} monsters: cell scan: {t_scan * 1e6:8.1f}us  '
+            f'spot_entities: {t_spot * 1e6:8.1f}us  (x{t_scan / t_spot:.1f})')
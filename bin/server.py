@@ -35,7 +35,8 @@ class BarbarTCPHandler(socketserver.BaseRequestHandler):
         skey = data.pop('session_key')
         if skey not in self.server.sessions:
             print('Initializing a new game instance')
-            self.server.sessions[skey] = Game()
+            self.server.sessions[skey] = Game(
+                timings=self.server.timings is not None)
         game = self.server.sessions[skey]
 
         print('Handling request for session {}'.format(skey))
@@ -65,10 +66,30 @@ class BarbarServer(socketserver.ThreadingTCPServer):
 
     def __init__(self, *args, **kwargs):
         self.profile = kwargs.pop('profile', False)
+        self.timings = kwargs.pop('timings', None)
         super().__init__(*args, **kwargs)
         self.sessions = {}
         print('Listening on {}...'.format(self.server_address))
 
+    def dump_timings(self):
+        """
+        Print each session's system timings, or dump them as json to
+        the file passed with --timings.
+
+        """
+        if self.timings is None:
+            return
+        reports = {}
+        for skey, game in self.sessions.items():
+            if self.timings == '-':
+                print('--- Timings for session {} ---'.format(skey))
+                print(game.timings.summary())
+            reports[skey] = game.timings_report
+        if self.timings != '-':
+            with open(self.timings, 'w') as f:
+                json.dump(reports, f, indent=2)
+            print('Timings dumped to {}'.format(self.timings))
+
 
 if __name__ == "__main__":
 
@@ -82,13 +103,19 @@ if __name__ == "__main__":
     parser.add_argument(
         '--profile', action='store_true', 
         help='profile each response (Requires pyinstrument)')
+    parser.add_argument(
+        '--timings', nargs='?', const='-', metavar='FILE',
+        help='record per system timings and dump them to FILE (or print '
+             'them if omitted) on shutdown. Timings can also be retrieved '
+             'with a GET request for the `timings_report` key')
 
     args = parser.parse_args()
     host, port  = args.host, args.port
 
     # Create the server, binding to localhost on port 9999
     with BarbarServer(
-        (host, port), BarbarTCPHandler, profile=args.profile
+        (host, port), BarbarTCPHandler,
+        profile=args.profile, timings=args.timings,
     ) as server:
         # Activate the server; this will keep running until you
         # interrupt the program with Ctrl-C
@@ -96,3 +123,5 @@ if __name__ == "__main__":
             server.serve_forever()
         except KeyboardInterrupt:
             pass
+        finally:
+            server.dump_timings()
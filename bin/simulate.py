@@ -0,0 +1,85 @@
+"""
+Play many headless games (see `barbarian.headless`) in parallel and
+stream one json report per run to a JSONL file.
+
+Seeds are derived from `--seed`, so a given batch can be replayed, and
+any single run can be replayed alone with `--seeds`:
+
+    $ python bin/simulate.py -n 1000 --seed balance -o runs.jsonl
+    $ python bin/simulate.py --seeds balance-42
+
+"""
+import os, sys
+import json
+import argparse
+from collections import Counter
+
+# This assumes we're running from the <root>/bin folder
+root_dir = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, root_dir)
+
+from barbarian.headless import run_batch
+
+
+def batch_seeds(base, n):
+    """ Seeds for a batch of `n` runs. """
+    return [f'{base}-{i}' for i in range(n)]
+
+
+def print_summary(reports, out=sys.stderr):
+    """ Print a few aggregate stats about `reports`. """
+    done = [r for r in reports if 'error' not in r]
+    crashed = [r['seed'] for r in reports if 'error' in r]
+    print(f'{len(reports)} runs, {len(crashed)} crashed', file=out)
+    if crashed:
+        print('Crashed seeds:', ', '.join(crashed), file=out)
+    if not done:
+        return
+    depths = [r['depth'] for r in done]
+    print(
+        f'Depth: avg {sum(depths) / len(depths):.2f}, max {max(depths)}',
+        file=out)
+    print(
+        f'Turns: avg {sum(r["turns"] for r in done) / len(done):.0f}',
+        file=out)
+    causes = Counter(r['cause_of_death'] for r in done if r['dead'])
+    for cause, n in causes.most_common():
+        print(f'    killed by {cause}: {n}', file=out)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '-n', '--runs', type=int, default=100, help='Number of runs')
+    parser.add_argument(
+        '-s', '--seed', default='barbar',
+        help='Base seed (run seeds are <seed>-<run index>)')
+    parser.add_argument(
+        '--seeds', nargs='+', help='Explicit run seeds (overrides -n & -s)')
+    parser.add_argument(
+        '-t', '--turns', type=int, default=1000,
+        help='Max turns per run')
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help='Number of worker processes (defaults to the number of cpus)')
+    parser.add_argument(
+        '-o', '--output', default='-',
+        help='JSONL output file (defaults to stdout)')
+
+    args = parser.parse_args()
+    seeds = args.seeds or batch_seeds(args.seed, args.runs)
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    reports = []
+    try:
+        for report in run_batch(seeds, n_turns=args.turns, processes=args.jobs):
+            reports.append(report)
+            out.write(json.dumps(report) + '\n')
+            out.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        print_summary(reports)
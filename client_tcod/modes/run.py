@@ -95,6 +95,11 @@ class RunMode(BaseGameMode):
         """
         data = data or {}
         while True:
+            # Spotted events are only emitted when something comes into
+            # view, so check for hostiles already there as well.
+            if self.client.gamestate.hostile_in_view:
+                self.log_msg('Something dangerous is in view')
+                break
             self.client.send_request(Request.action(action_name, data))
             self.client.render()
             request = self.ui_events.handle(self.client.context)
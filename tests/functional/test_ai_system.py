@@ -0,0 +1,85 @@
+from unittest.mock import Mock
+
+from .base import BaseFunctionalTestCase
+from barbarian.actions import ActionType
+from barbarian.utils.rng import Rng
+
+from barbarian.systems.ai import plan_turn, is_blocked
+
+
+class TestPlanTurn(BaseFunctionalTestCase):
+
+    dummy_map = [
+        '##########',
+        '#........#',
+        '#.####...#',
+        '#........#',
+        '##########',
+    ]
+
+    def setUp(self):
+        super().setUp()
+        Rng.init_root('ai')
+
+    def build_game(self, player_pos, *monsters):
+        level = self.build_dummy_level()
+        player = self.spawn_actor(*player_pos, 'player')
+        level.enter(player)
+        actors = []
+        for x, y in monsters:
+            actor = self.spawn_actor(x, y, 'orc')
+            level.add_entity('actors', actor)
+            actors.append(actor)
+        level.update_fovs()
+        return Mock(current_level=level, player=player), actors
+
+    def assert_moves(self, action, d):
+        self.assertEqual(ActionType.MOVE, action.type)
+        self.assertEqual(d, action.data['dir'])
+
+    def test_no_actors(self):
+        game, _ = self.build_game((1, 1))
+        self.assertEqual({}, plan_turn(game))
+
+    def test_chase_player(self):
+        game, (orc,) = self.build_game((1, 1), (4, 1))
+        actions = plan_turn(game)
+        self.assertEqual([orc], list(actions))
+        self.assert_moves(actions[orc], (-1, 0))
+
+    def test_attack_adjacent_player(self):
+        game, (orc,) = self.build_game((1, 1), (2, 1))
+        self.assert_moves(plan_turn(game)[orc], (-1, 0))
+
+    def test_go_around_other_actors(self):
+        # Second orc blocks the shortest path
+        game, (orc, _) = self.build_game((6, 1), (8, 2), (7, 1))
+        d = plan_turn(game)[orc].data['dir']
+        self.assertIn(d, ((-1, 0), (0, -1)))
+
+    def test_wait_if_stuck(self):
+        # Dead end, blocked by another orc
+        game, (orc, _) = self.build_game((1, 3), (1, 1), (1, 2))
+        self.assert_moves(plan_turn(game)[orc], (0, 0))
+
+    def test_player_out_of_sight(self):
+        game, (orc,) = self.build_game((1, 1), (4, 3))
+        orc.fov.range = 1
+        orc.fov.reset()
+        game.current_level.update_fovs()
+        for _ in range(10):
+            dx, dy = plan_turn(game)[orc].data['dir']
+            if (dx, dy) != (0, 0):
+                self.assertFalse(game.current_level.is_blocked(4 + dx, 3 + dy))
+
+    def test_is_blocked(self):
+        game, (orc, other) = self.build_game((1, 1), (4, 1), (8, 1))
+        action = plan_turn(game)[orc]
+        self.assertFalse(is_blocked(action, game))
+
+        game.current_level.move_actor(other, -5, 0)
+        self.assertTrue(is_blocked(action, game))
+
+    def test_is_blocked_player_cell(self):
+        game, (orc,) = self.build_game((1, 1), (2, 1))
+        self.assertFalse(is_blocked(plan_turn(game)[orc], game))
@@ -1,5 +1,8 @@
+from unittest.mock import Mock
+
 from .base import BaseFunctionalTestCase
 from barbarian.actions import Action, ActionType
+from barbarian.settings import NOISE_RADIUS
 
 from barbarian.systems.combat import attack
 
@@ -28,3 +31,11 @@ class TestAttack(BaseFunctionalTestCase):
         self.assertEqual(ActionType.INFLICT_DMG, new_action.type)
         # str 2 - str 5 = dmg -3 => bumped to 1
         self.assertEqual({'dmg': 1}, new_action.data)
+
+    def test_attack_makes_noise(self):
+        attacker = self.spawn_actor(2, 3, 'player')
+        attacked = self.spawn_actor(3, 3, 'kobold')
+        level = Mock()
+
+        attack(self.attack_action(attacker, attacked), level)
+        level.make_noise.assert_called_once_with(2, 3, NOISE_RADIUS)
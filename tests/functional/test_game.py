@@ -4,9 +4,10 @@ import inspect
 from .base import BaseFunctionalTestCase
 from barbarian.utils.rng import Rng
 from barbarian.actions import Action, ActionType
-from barbarian.events import Event
+from barbarian.events import Event, EventType
 from barbarian.world import World, Level
 from barbarian.map import Map, TileType
+from barbarian.utils.timing import Timings
 
 from barbarian.game import Game, EndTurn
 from barbarian.settings import MAP_W, MAP_H
@@ -98,7 +99,7 @@ class TestGame(BaseGameTest):
 
 class TestGameLoop(BaseGameTest):
 
-    def get_gameloop(self):
+    def get_gameloop(self, player_pos=(1, 1), mob_pos=(3, 3)):
         """ Return a minimal game object and return its gameloop """
         self.game = Game()
 
@@ -113,9 +114,9 @@ class TestGameLoop(BaseGameTest):
         level.exit_pos = 8, 8
         level.init_fov_map()
 
-        self.game.player = self.spawn_actor(1, 1, 'player')
+        self.game.player = self.spawn_actor(*player_pos, 'player')
         level.enter(self.game.player)
-        mob = self.spawn_actor(3, 3, 'orc')
+        mob = self.spawn_actor(*mob_pos, 'orc')
         level.actors.add_e(mob)
 
         world.insert_level(level)
@@ -139,10 +140,44 @@ class TestGameLoop(BaseGameTest):
             # 2 actors => 2 calls
             self.assertEqual(2, mock_take_turn.call_count)
 
-            # Event queue cleared, turn counter incremented
-            self.assertEqual(0, len(Event.queue))
+            # Event bus cleared, turn counter incremented
+            self.assertEqual(0, len(self.game.events))
             self.assertEqual(2, self.game.ticks)
 
+    def test_dormant_actors_skip_turn(self):
+
+        gl = self.get_gameloop()
+        # Far away, in an unexplored area
+        far_mob = self.spawn_actor(70, 40, 'orc')
+        self.game.current_level.add_entity('actors', far_mob)
+
+        with patch.object(
+            self.game, 'take_turn', wraps=self.game.take_turn,
+        ) as mock_take_turn:
+
+            gl.send(Action(ActionType.IDLE))
+
+            self.assertEqual(2, mock_take_turn.call_count)
+            self.assertNotIn(
+                far_mob, [c.args[0] for c in mock_take_turn.call_args_list])
+
+    def test_fast_actor_acts_twice(self):
+
+        gl = self.get_gameloop()
+        mob = next(a for a in self.game.actors if not a.is_player)
+        mob.actor.speed = 200
+
+        with patch.object(
+            self.game, 'take_turn', wraps=self.game.take_turn,
+        ) as mock_take_turn:
+
+            gl.send(Action(ActionType.IDLE))
+
+            # Rest of the first turn: mob x 2, then player's next turn
+            self.assertEqual(
+                [mob, mob, self.game.player],
+                [c.args[0] for c in mock_take_turn.call_args_list])
+
     def test_turn_aborted(self):
 
         gl = self.get_gameloop()
@@ -159,8 +194,8 @@ class TestGameLoop(BaseGameTest):
                 # First turn aborted => only one call
                 self.assertEqual(1, mock_take_turn.call_count)
 
-                # Event queue cleared, turn counter incremented
-                self.assertEqual(0, len(Event.queue))
+                # Event bus cleared, turn counter incremented
+                self.assertEqual(0, len(self.game.events))
                 self.assertEqual(2, self.game.ticks)
 
     def test_take_turn_invalid_player_action(self):
@@ -178,8 +213,8 @@ class TestGameLoop(BaseGameTest):
             # Action rejected => only one call
             self.assertEqual(1, mock_take_turn.call_count)
 
-            # Event queue *not* cleared, turn counter *not* incremented
-            self.assertNotEqual(0, len(Event.queue))
+            # Event bus *not* cleared, turn counter *not* incremented
+            self.assertNotEqual(0, len(self.game.events))
             self.assertEqual(1, self.game.ticks)
 
     def test_max_recursion_is_caught(self):
@@ -211,6 +246,102 @@ class TestGameLoop(BaseGameTest):
                         data={'dir': (0, 0)})
                 )
 
+    def test_monsters_act_on_player_move(self):
+
+        gl = self.get_gameloop(player_pos=(5, 2), mob_pos=(4, 2))
+        player = self.game.player
+        orc = next(a for a in self.game.actors if not a.is_player)
+        hp = player.health.hp
+
+        # Sidestep, still next to the orc
+        gl.send(Action.move(player, dir=(0, 1)))
+
+        self.assertEqual((4, 2), (orc.pos.x, orc.pos.y))
+        self.assertLess(player.health.hp, hp)
+
+    def test_gamestate_hostile_in_view(self):
+
+        self.get_gameloop()
+        self.game.state.update(self.game)
+        self.assertTrue(self.game.gs['hostile_in_view'])
+
+        orc = next(a for a in self.game.actors if not a.is_player)
+        self.game.current_level.remove_entity('actors', orc)
+        self.game.state.update(self.game)
+        self.assertFalse(self.game.gs['hostile_in_view'])
+
+    def test_death_events_handled_once(self):
+
+        self.get_gameloop()
+        orc = next(a for a in self.game.actors if not a.is_player)
+        Event.emit(
+            EventType.ACTOR_DIED, bus=self.game.events,
+            event_data={'actor': orc, 'slayer': None})
+
+        with patch.object(
+            self.game.current_level, 'remove_entity'
+        ) as mock_remove:
+            self.game.handle_events()
+            self.game.handle_events()
+            mock_remove.assert_called_once_with('actors', orc)
+
+    def test_events_stay_in_their_game(self):
+
+        gl = self.get_gameloop()
+        game = self.game
+        # Started last, but not the one playing
+        self.get_gameloop()
+
+        # Rejected, so the turn goes on and events are kept
+        gl.send(Action(ActionType.USE_PROP, actor=game.player, data={}))
+
+        self.assertNotEqual(0, len(game.events))
+        self.assertEqual(0, len(self.game.events))
+
+    def test_timings(self):
+
+        gl = self.get_gameloop()
+        self.assertIsNone(self.game.timings_report)
+
+        self.game.timings = Timings()
+        gl.send(Action(ActionType.IDLE, actor=self.game.player))
+        gl.send(Action.move(self.game.player, d={'dir': (1, 0)}))
+
+        report = self.game.process_get_request(
+            {'key': 'timings_report'})['key']
+        self.assertEqual(1, report['action.idle']['count'])
+        # Player + orc
+        self.assertGreaterEqual(report['action.move']['count'], 2)
+        for name in ('chose_action', 'handle_events', 'state_update', 'ai'):
+            self.assertIn(name, report)
+        for entry in report.values():
+            self.assertLessEqual(entry['max'], entry['total'])
+
+    def test_replanning_is_not_nested_in_chose_action(self):
+
+        gl = self.get_gameloop(player_pos=(5, 2), mob_pos=(4, 2))
+        spans, nested = [], []
+
+        class NestingTimings(Timings):
+            def time(self, name, func, *args):
+                if spans:
+                    nested.append((spans[-1], name))
+                spans.append(name)
+                try:
+                    return super().time(name, func, *args)
+                finally:
+                    spans.pop()
+
+        self.game.timings = NestingTimings()
+        with patch.object(
+            self.game, 'plan_ai', wraps=self.game.plan_ai,
+        ) as mock_plan:
+            # The orc has to plan again
+            gl.send(Action.move(self.game.player, dir=(0, 1)))
+            self.assertTrue(mock_plan.called)
+
+        self.assertNotIn(('chose_action', 'ai'), nested)
+
     def test_player_death_stops_the_loop(self):
 
         gl = self.get_gameloop()
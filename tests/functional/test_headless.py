@@ -0,0 +1,129 @@
+from unittest.mock import Mock, patch
+
+from .base import BaseFunctionalTestCase
+from barbarian.actions import Action, ActionType
+from barbarian.state import GameState
+
+from barbarian.headless import ExplorerBot, run, run_batch
+
+
+class TestExplorerBot(BaseFunctionalTestCase):
+
+    dummy_map = [
+        '#######',
+        '#.....#',
+        '#.....#',
+        '#######',
+    ]
+
+    def build_level(self, player_pos):
+        level = self.build_dummy_level()
+        player = self.spawn_actor(*player_pos, 'player')
+        level.enter(player)
+        return level, player
+
+    def choose(self, level, player, bot=None):
+        bot = bot or ExplorerBot()
+        return bot(Mock(current_level=level, player=player))
+
+    def test_explore(self):
+        level, player = self.build_level((1, 1))
+        self.assertEqual(ActionType.XPLORE, self.choose(level, player).type)
+
+    def test_fight_adjacent(self):
+        level, player = self.build_level((1, 1))
+        level.add_entity('actors', self.spawn_actor(2, 2, 'orc'))
+        action = self.choose(level, player)
+        self.assertEqual(ActionType.MOVE, action.type)
+        self.assertEqual((1, 1), action.data['dir'])
+
+    def test_go_after_hostile_in_view(self):
+        level, player = self.build_level((1, 1))
+        level.add_entity('actors', self.spawn_actor(4, 2, 'orc'))
+        action = self.choose(level, player)
+        self.assertEqual(ActionType.MOVE, action.type)
+        dx, dy = action.data['dir']
+        self.assertLess(
+            max(abs(1 + dx - 4), abs(1 + dy - 2)), 3)
+
+    def test_head_for_stairs(self):
+        level, player = self.build_level((1, 1))
+        level.add_entity('props', self.spawn_prop(4, 1, 'stairs_down'))
+        action = self.choose(level, player)
+        self.assertEqual(ActionType.MOVE, action.type)
+        self.assertEqual(1, action.data['dir'][0])
+
+    def test_unexplored_stairs(self):
+        level, player = self.build_level((1, 1))
+        level.add_entity('props', self.spawn_prop(4, 1, 'stairs_down'))
+        level.explored[1, 4] = False
+        self.assertEqual(ActionType.XPLORE, self.choose(level, player).type)
+
+    def test_take_stairs(self):
+        level, player = self.build_level((1, 1))
+        level.add_entity('props', self.spawn_prop(1, 1, 'stairs_down'))
+        action = self.choose(level, player)
+        self.assertEqual(ActionType.USE_PROP, action.type)
+        self.assertEqual('down', action.data['use_key'])
+
+    def test_wait_after_rejection(self):
+        level, player = self.build_level((1, 1))
+        bot = ExplorerBot()
+        self.choose(level, player, bot).reject()
+        self.assertEqual(
+            ActionType.IDLE, self.choose(level, player, bot).type)
+        self.assertEqual(
+            ActionType.XPLORE, self.choose(level, player, bot).type)
+
+
+class TestRun(BaseFunctionalTestCase):
+
+    seed = '4876877298345515653'
+
+    def test_run(self):
+        with patch.object(GameState, 'update') as mock_update:
+            report = run(n_turns=20, seed=self.seed)
+
+        # No gamestate serialization
+        mock_update.assert_not_called()
+
+        self.assertLessEqual(report['turns'], 20)
+        self.assertGreaterEqual(report['depth'], 1)
+        if not report['dead']:
+            self.assertEqual(20, report['turns'])
+            self.assertIsNone(report['cause_of_death'])
+        self.assertGreater(report['turns_per_sec'], 0)
+        for name in ('fovs', 'ai', 'chose_action', 'policy'):
+            self.assertIn(name, report['timings'])
+
+    def test_custom_policy(self):
+        calls = []
+
+        def policy(game):
+            calls.append(game.ticks)
+            return Action(ActionType.IDLE, game.player)
+
+        report = run(policy, n_turns=5, seed=self.seed)
+        self.assertEqual(5, report['turns'])
+        self.assertEqual([1, 2, 3, 4, 5], calls)
+        self.assertEqual(1, report['depth'])
+
+    @staticmethod
+    def summary(report):
+        return (report['turns'], report['depth'], report['cause_of_death'])
+
+    def test_deterministic(self):
+        self.assertEqual(
+            self.summary(run(n_turns=50, seed=self.seed)),
+            self.summary(run(n_turns=50, seed=self.seed)))
+
+    def test_run_batch(self):
+        seeds = [self.seed, '1', '2']
+        reports = {
+            r['seed']: r for r in run_batch(seeds, n_turns=10, processes=2)}
+        self.assertEqual(set(seeds), set(reports))
+        # Same results as when run alone
+        for seed in seeds:
+            self.assertEqual(
+                self.summary(run(n_turns=10, seed=seed)),
+                self.summary(reports[seed]))
@@ -3,10 +3,11 @@ from unittest.mock import Mock, patch
 from .base import BaseFunctionalTestCase
 
 from barbarian.actions import Action, ActionType
-from barbarian.events import Event, EventType
+from barbarian.events import Event, EventType, EventBus
+from barbarian.utils.structures.dijkstra import DijkstraGrid
 
 from barbarian.systems.movement import (
-    move_actor, xplore, change_level, spot_entities,
+    move_actor, xplore, change_level, spot_entities, hostiles_in_view,
 )
 
 
@@ -109,6 +110,7 @@ class TestMoveActor(BaseFunctionalTestCase):
 
         level = self.build_dummy_level()
         actor = self.spawn_actor(4, 2, 'kobold')
+        actor.remove_component('fov')
         level.actors.add_e(actor)
 
         move_action = self.move_action(actor, 1, 1)
@@ -129,8 +131,8 @@ class TestMoveActor(BaseFunctionalTestCase):
         move_action = self.move_action(actor, 1, 1)
         move_actor(move_action, level)
 
-        mock_fov_compute.assert_called_once_with(
-            level, actor.pos.x, actor.pos.y, update_level=False)
+        # Deferred to the next Level.update_fovs call
+        mock_fov_compute.assert_not_called()
 
     @patch('barbarian.components.actor.Fov.compute')
     def test_fov_recompute_has_fov_and_player(self, mock_fov_compute):
@@ -151,6 +153,7 @@ class TestMoveActor(BaseFunctionalTestCase):
 
         level = self.build_dummy_level()
         actor = self.spawn_actor(4, 2, 'kobold')
+        actor.remove_component('fov')
         level.actors.add_e(actor)
 
         move_action = self.move_action(actor, 1, 1)
@@ -169,7 +172,7 @@ class TestMoveActor(BaseFunctionalTestCase):
         move_action = self.move_action(actor, 1, 1)
         move_actor(move_action, level)
 
-        mock_spot.assert_called_once_with(actor, level)
+        mock_spot.assert_called_once_with(actor, level, move_action.bus)
 
     def test_attack_actor_on_dest_cell(self):
 
@@ -267,10 +270,54 @@ class TestXplore(BaseFunctionalTestCase):
         self.assertEqual(ActionType.MOVE, new_action.type)
         self.assertEqual({'dir': (0, 1)}, new_action.data)
 
+    def test_xplore_map_is_repaired(self):
+
+        level = self.build_dummy_level()
+        actor = self.spawn_actor(1, 1, 'player')
+        level.enter(actor)
+
+        xplore(self.xplore_action(actor), level)
+        dg = level.pathmaps.peek(('xplore', actor))
+        self.assertEqual(1, level.pathmaps.misses)
+
+        # Explore the whole bottom corridor
+        for x in range(1, 9):
+            level.explored[3, x] = True
+        new_action = self.assert_action_accepted(
+            xplore, self.xplore_action(actor), level)
+
+        # Map was reused, and now leads to the top right room
+        self.assertIs(dg, level.pathmaps.peek(('xplore', actor)))
+        self.assertEqual(1, level.pathmaps.misses)
+        self.assertEqual(1, level.pathmaps.updates)
+        self.assertEqual({'dir': (0, 1)}, new_action.data)
+
+        unexplored = [
+            (x, y) for x, y, _ in level.map if not level.explored[y, x]]
+        expected = DijkstraGrid.new(
+            level.map.w, level.map.h, *unexplored,
+            passable=~level.blocking_mask(ignore_openable=True))
+        self.assertListEqual(expected.cells, dg.cells)
+
+    def test_xplore_hostile_in_view(self):
+
+        level = self.build_dummy_level()
+        actor = self.spawn_actor(1, 1, 'player')
+        level.enter(actor)
+        level.add_entity('actors', self.spawn_actor(1, 3, 'orc'))
+
+        xplore_action = self.xplore_action(actor)
+        new_action = self.assert_action_rejected(
+            xplore, xplore_action, level)
+
+        self.assertIsNone(new_action)
+        self.assertIn('dangerous', xplore_action.msg)
+
     def test_xplore_no_fov(self):
 
         level = self.build_dummy_level()
         actor = self.spawn_actor(1, 1, 'kobold')
+        actor.remove_component('fov')
         level.enter(actor)
 
         xplore_action = self.xplore_action(actor)
@@ -289,8 +336,7 @@ class TestXplore(BaseFunctionalTestCase):
 
         level.enter(actor)
 
-        for x, y, _ in level.map:
-            actor.fov.explored.add((x, y))
+        actor.fov.explored[:] = True
 
         xplore_action = self.xplore_action(actor)
         new_action = self.assert_action_rejected(
@@ -308,8 +354,7 @@ class TestXplore(BaseFunctionalTestCase):
 
         level.enter(actor)
 
-        for x, y, _ in level.map:
-            level.explored.add((x, y))
+        level.explored[:] = True
 
         xplore_action = self.xplore_action(actor)
         new_action = self.assert_action_rejected(
@@ -384,20 +429,61 @@ class TestSpotEntities(BaseFunctionalTestCase):
 
         level.enter(actor)
 
-        spot_entities(actor, level)
+        bus = EventBus()
+        spot_entities(actor, level, bus)
 
         self.assertEqual(2, mock_emit.call_count)
         mock_emit.assert_any_call(
-            EventType.ACTOR_SPOTTED,
+            EventType.ACTOR_SPOTTED, bus=bus,
             event_data={'actor': actor, 'target': a_to_spot})
         mock_emit.assert_any_call(
-            EventType.ACTOR_SPOTTED,
+            EventType.ACTOR_SPOTTED, bus=bus,
             event_data={'actor': actor, 'target': p_to_spot})
 
+    def test_spot_entities_only_new(self, mock_emit):
+
+        level = self.build_dummy_level()
+        actor = self.spawn_actor(4, 2, 'player')
+
+        a_to_spot = self.spawn_actor(1, 4, 'orc')
+        level.actors.add_e(a_to_spot)
+
+        level.enter(actor)
+
+        spot_entities(actor, level)
+        spot_entities(actor, level)
+        self.assertEqual(1, mock_emit.call_count)
+
+        # Out of view, then back
+        level.remove_entity('actors', a_to_spot)
+        spot_entities(actor, level)
+        level.add_entity('actors', a_to_spot)
+        spot_entities(actor, level)
+        self.assertEqual(2, mock_emit.call_count)
+
+    def test_hostiles_in_view(self, mock_emit):
+
+        level = self.build_dummy_level()
+        actor = self.spawn_actor(4, 2, 'player')
+
+        orc = self.spawn_actor(1, 3, 'orc')
+        level.actors.add_e(orc)
+        level.props.add_e(self.spawn_prop(3, 3, 'trap'))
+
+        level.enter(actor)
+
+        # Still reported once spotted
+        spot_entities(actor, level)
+        self.assertEqual([orc], hostiles_in_view(actor, level))
+
+        level.remove_entity('actors', orc)
+        self.assertEqual([], hostiles_in_view(actor, level))
+
     def test_spot_entities_no_fov(self, mock_emit):
 
         level = self.build_dummy_level()
         actor = self.spawn_actor(4, 2, 'kobold')
+        actor.remove_component('fov')
 
         a_to_spot = self.spawn_actor(1, 4, 'orc')
         level.actors.add_e(a_to_spot)
@@ -191,10 +191,13 @@ class OpenCloseDoorTest(BaseFunctionalTestCase):
             level = self.build_dummy_level()
             door = self.get_door_entity(opened=False)
             action = self.open_door(actor, door)
+            versions = level.blocking_version, level.transparency_version
 
             self.assert_action_accepted(
                 open_or_close_door, action, level)
             self.assert_opened(door)
+            self.assertLess(versions[0], level.blocking_version)
+            self.assertLess(versions[1], level.transparency_version)
 
     def test_close_door(self):
 
@@ -229,10 +232,6 @@ class OpenCloseDoorTest(BaseFunctionalTestCase):
             door = self.get_door_entity(opened=False)
             action = self.close_door(actor, door)
 
-            print(type(door.usable.action))
-            from pprint import pprint
-            pprint(vars(door))
-            pprint(vars(action))
             self.assert_action_rejected(open_or_close_door, action, level)
             self.assert_closed(door)
             self.assertIn('already close', action.msg)
@@ -278,6 +277,7 @@ class OpenCloseDoorTest(BaseFunctionalTestCase):
 
         level = self.build_dummy_level()
         actor = self.spawn_actor(0, 0, 'kobold')
+        actor.remove_component('fov')
         door = self.get_door_entity(opened=False)
 
         for action in (
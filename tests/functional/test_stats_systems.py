@@ -2,7 +2,7 @@ from unittest.mock import patch
 
 from .base import BaseFunctionalTestCase
 from barbarian.actions import Action
-from barbarian.events import Event, EventType
+from barbarian.events import Event, EventType, EventBus
 
 from barbarian.systems.stats import inflict_damage
 
@@ -46,9 +46,10 @@ class TestAttack(BaseFunctionalTestCase):
         # starting hp should be 3 for orcs
 
         dmg_action = self.damage_action(hurter, hurted, 10)
+        dmg_action.bus = bus = EventBus()
         self.assert_action_accepted(inflict_damage, dmg_action)
 
         mock_emit.assert_called_with(
-            EventType.ACTOR_DIED, msg=f'{hurted.name} is dead',
+            EventType.ACTOR_DIED, bus=bus, msg=f'{hurted.name} is dead',
             event_data={'actor': hurted, 'slayer': hurter}
         )
@@ -0,0 +1,109 @@
+import unittest
+
+import numpy as np
+import tcod
+
+from barbarian.components.actor import Fov
+from barbarian.map import Map, TileType
+from barbarian.world import Level
+
+
+class TestFov(unittest.TestCase):
+
+    def build_level(self):
+        l = Level(10, 10)
+        l.map = Map(l.w, l.h, [TileType.FLOOR] * (l.w * l.h))
+        # Wall splitting the map in two
+        for y in range(l.h):
+            l.map[5, y] = TileType.WALL
+        l.init_fov_map()
+        return l
+
+    def test_compute(self):
+        l = self.build_level()
+        fov = Fov(range=10)
+        fov.compute(l, 1, 1)
+
+        self.assertEqual((10, 10), fov.visible.shape)
+        self.assertTrue(fov.is_in_fov(1, 1))
+        self.assertTrue(fov.is_in_fov(5, 1))    # lit wall
+        self.assertFalse(fov.is_in_fov(7, 1))
+        self.assertTrue((fov.explored == fov.visible).all())
+        # Level was not updated
+        self.assertFalse(l.explored.any())
+
+    def test_explored_accumulates(self):
+        l = self.build_level()
+        fov = Fov(range=10)
+        fov.compute(l, 1, 1, update_level=True)
+        l.map[5, 1] = TileType.FLOOR
+        l.init_fov_map()
+        fov.compute(l, 7, 1, update_level=True)
+
+        self.assertFalse(fov.is_in_fov(0, 9))
+        self.assertTrue(fov.explored[9, 0])
+        self.assertTrue(fov.explored[1, 7])
+        self.assertTrue((l.explored == fov.explored).all())
+
+    def test_is_in_fov_out_of_bounds(self):
+        l = self.build_level()
+        fov = Fov(range=10)
+        self.assertFalse(fov.is_in_fov(1, 1))
+        fov.compute(l, 0, 0)
+        self.assertFalse(fov.is_in_fov(-1, 0))
+        self.assertFalse(fov.is_in_fov(0, 10))
+
+    def test_visible_cells(self):
+        l = self.build_level()
+        fov = Fov(range=10)
+        fov.compute(l, 1, 1)
+        cells = fov.visible_cells
+        self.assertIn((1, 1), cells)
+        self.assertNotIn((7, 1), cells)
+        self.assertEqual(int(fov.visible.sum()), len(cells))
+
+    def test_reset(self):
+        l = self.build_level()
+        fov = Fov(range=10)
+        fov.compute(l, 1, 1)
+        fov.reset()
+        self.assertIsNone(fov.visible)
+        self.assertIsNone(fov.explored)
+
+    def test_update(self):
+        l = self.build_level()
+        fov = Fov(range=10)
+        self.assertTrue(fov.update(l, 1, 1))
+        self.assertFalse(fov.update(l, 1, 1))
+        self.assertTrue(fov.is_in_fov(1, 1))
+        # Moved
+        self.assertTrue(fov.update(l, 2, 1))
+        # Transparency changed
+        l.set_tile(2, 3, TileType.WALL)
+        self.assertTrue(fov.update(l, 2, 1))
+        self.assertFalse(fov.is_in_fov(2, 4))
+        # Reset
+        fov.reset()
+        self.assertTrue(fov.update(l, 2, 1))
+
+    def test_window_matches_full_map(self):
+        rng = np.random.default_rng(5)
+        l = Level(40, 30)
+        l.map = Map(l.w, l.h, [TileType.FLOOR] * (l.w * l.h))
+        l.init_fov_map()
+        l.fov_map.transparent[:] = rng.random((l.h, l.w)) < .7
+
+        fov = Fov(range=6)
+        for _ in range(20):
+            x, y = int(rng.integers(l.w)), int(rng.integers(l.h))
+            fov.compute(l, x, y)
+            expected = tcod.map.compute_fov(
+                l.fov_map.transparent, (y, x), radius=6, light_walls=True,
+                algorithm=tcod.FOV_BASIC)
+            self.assertTrue((expected == fov.visible).all())
+
+    def test_unlimited_range(self):
+        l = self.build_level()
+        fov = Fov(range=0)
+        fov.compute(l, 0, 0)
+        self.assertTrue(fov.is_in_fov(4, 9))
@@ -3,7 +3,7 @@ from unittest.mock import patch
 
 from barbarian.actions import Action, ActionType
 from barbarian.actions import ActionDataError, UnknownActionTypeError
-from barbarian.events import EventType
+from barbarian.events import EventType, EventBus
 
 
 class TestAction(unittest.TestCase):
@@ -53,7 +53,7 @@ class TestActionEvents(unittest.TestCase):
         action.accept(msg='YAY!')
 
         patched_emit.assert_called_with(
-            EventType.ACTION_ACCEPTED,
+            EventType.ACTION_ACCEPTED, bus=None,
             msg='YAY!',
             event_data={'type': 'idle', 'actor': None, 'target': None}
         )
@@ -63,17 +63,28 @@ class TestActionEvents(unittest.TestCase):
         action.accept()
 
         patched_emit.assert_called_with(
-            EventType.ACTION_ACCEPTED,
+            EventType.ACTION_ACCEPTED, bus=None,
             msg='',
             event_data={'type': 'move', 'actor': 'a', 'target': None}
         )
 
+    def test_action_event_published_to_bus(self, patched_emit):
+        action = Action(ActionType.IDLE)
+        action.bus = bus = EventBus()
+        action.accept()
+
+        patched_emit.assert_called_with(
+            EventType.ACTION_ACCEPTED, bus=bus,
+            msg='',
+            event_data={'type': 'idle', 'actor': None, 'target': None}
+        )
+
     def test_action_event_rejected(self, patched_emit):
         action = Action(ActionType.IDLE)
         action.reject(msg='ONOES!')
 
         patched_emit.assert_called_with(
-            EventType.ACTION_REJECTED,
+            EventType.ACTION_REJECTED, bus=None,
             msg='ONOES!',
             event_data={'type': 'idle', 'actor': None, 'target': None}
         )
@@ -83,7 +94,7 @@ class TestActionEvents(unittest.TestCase):
         action.reject()
 
         patched_emit.assert_called_with(
-            EventType.ACTION_REJECTED,
+            EventType.ACTION_REJECTED, bus=None,
             msg='',
             event_data={'type': 'move', 'actor': 'a', 'target': None}
         )
@@ -132,6 +143,26 @@ class TestActionHelpers(unittest.TestCase):
         self.assertEqual(action.actor, 'a')
         self.assertEqual(action.data, {'dir': 'dummy'})
 
+    def test_move_shortcut_shared_data(self):
+        action = Action.move('a', dir=(1, 0))
+        self.assertEqual({'dir': (1, 0)}, action.data)
+        self.assertIs(action.data, Action.move('b', dir=(1, 0)).data)
+        # Shared data can't be altered
+        self.assertRaises(TypeError, action.data.update, {'dir': (0, 1)})
+        # Out of the ordinary directions still work
+        self.assertEqual({'dir': (2, 0)}, Action.move('a', dir=(2, 0)).data)
+
+    def test_inflict_dmg_shortcut_shared_data(self):
+        action = Action.inflict_dmg('a', 't', dmg=3)
+        self.assertEqual({'dmg': 3}, action.data)
+        self.assertIs(action.data, Action.inflict_dmg('b', 't', dmg=3).data)
+
+    def test_slots(self):
+        action = Action(ActionType.IDLE)
+        self.assertFalse(hasattr(action, '__dict__'))
+        with self.assertRaises(AttributeError):
+            action.whatever = 'nope'
+
     def test_inflict_dmg_shortcut(self):
         action = Action.inflict_dmg(a='a', t='t', d={'dmg': 1})
         self.assertEqual(action.type, ActionType.INFLICT_DMG)
@@ -1,102 +1,188 @@
 import unittest
 
-from barbarian.events import Event, EventType
+from barbarian.events import Event, EventType, EventBus
 
 
 class TestEvents(unittest.TestCase):
 
-    def setUp(self):
-        Event._QUEUE = []
-        Event._LOG = {}
-
     def test_emit(self):
         e = Event.emit(EventType.ACTION_ACCEPTED, msg='woo!')
-        self.assertEqual(1, len(Event._QUEUE))
-        self.assertIn(e, Event._QUEUE)
-        self.assertEqual(1, len(Event._LOG['current']))
-        self.assertIn(e, Event._LOG['current'])
+        self.assertEqual(EventType.ACTION_ACCEPTED, e.type)
+        self.assertEqual('woo!', e.msg)
+
+    def test_emit_data(self):
+        data = {'key': 'val'}
+        e = Event.emit(EventType.ACTOR_DIED, event_data=data)
+        self.assertIs(data, e.data)
+        e = Event.emit(EventType.ACTOR_DIED, data=data)
+        self.assertIs(data, e.data)
+        self.assertEqual({}, Event.emit(EventType.ACTOR_DIED).data)
+
+    def test_serialize(self):
+        e = Event.emit(
+            EventType.ACTOR_DIED, msg='hello', event_data={'key': 'val'})
+
+        expected = {
+            'type': 'actor_died',
+            'msg': 'hello',
+            'data': {'key': 'val'},
+        }
+        self.assertDictEqual(expected, e.serialize())
 
-    def test_clear_queue(self):
-        Event.emit(EventType.ACTION_ACCEPTED, msg='woo!', transient=False)
-        Event.emit(EventType.ACTION_ACCEPTED, msg='woo!', transient=True)
-        self.assertEqual(2, len(Event._QUEUE))
 
-        Event.clear_queue()
-        self.assertEqual(0, len(Event._QUEUE))
+class TestEventLog(unittest.TestCase):
+
+    def setUp(self):
+        self.bus = EventBus()
 
+    def emit(self, *args, **kwargs):
+        return Event.emit(*args, bus=self.bus, **kwargs)
+
+    def test_emit_logs_event(self):
+        e = self.emit(EventType.ACTION_ACCEPTED, msg='woo!')
+        self.assertEqual(1, len(self.bus._log['current']))
+        self.assertIn(e, self.bus._log['current'])
 
     def test_flush_log(self):
-        e1 = Event.emit(
+        e1 = self.emit(
             EventType.ACTION_ACCEPTED, msg='woo!', transient=False)
-        e2 = Event.emit(
+        e2 = self.emit(
             EventType.ACTION_REJECTED, msg='ono!', transient=False)
 
-        self.assertEqual(2, len(Event._LOG['current']))
+        self.assertEqual(2, len(self.bus._log['current']))
 
         tick1 = 1
-        Event.flush_log(tick1)
+        self.bus.flush_log(tick1)
 
-        self.assertEqual(0, len(Event._LOG['current']))
-        self.assertEqual(2, len(Event._LOG[tick1]))
-        self.assertIn(e1, Event._LOG[tick1])
-        self.assertIn(e2, Event._LOG[tick1])
+        self.assertEqual(0, len(self.bus._log['current']))
+        self.assertEqual(2, len(self.bus._log[tick1]))
+        self.assertIn(e1, self.bus._log[tick1])
+        self.assertIn(e2, self.bus._log[tick1])
 
-        e3 = Event.emit(
+        e3 = self.emit(
             EventType.ACTION_ACCEPTED, msg='woo again!', transient=False)
         tick2 = 2
-        Event.flush_log(tick2)
+        self.bus.flush_log(tick2)
 
-        self.assertEqual(0, len(Event._LOG['current']))
-        self.assertEqual(1, len(Event._LOG[tick2]))
+        self.assertEqual(0, len(self.bus._log['current']))
+        self.assertEqual(1, len(self.bus._log[tick2]))
 
-        self.assertIn(e1, Event._LOG[tick1])
-        self.assertIn(e2, Event._LOG[tick1])
-        self.assertIn(e3, Event._LOG[tick2])
+        self.assertIn(e1, self.bus._log[tick1])
+        self.assertIn(e2, self.bus._log[tick1])
+        self.assertIn(e3, self.bus._log[tick2])
 
     def test_transient_events_are_not_kept_in_the_log(self):
-        e = Event.emit(
-            EventType.ACTION_ACCEPTED, msg='woo!', transient=True)
+        self.emit(EventType.ACTION_ACCEPTED, msg='woo!', transient=True)
 
-        self.assertEqual(1, len(Event._LOG['current']))
+        self.assertEqual(1, len(self.bus._log['current']))
 
         tick = 1
-        Event.flush_log(tick)
+        self.bus.flush_log(tick)
 
-        self.assertEqual(0, len(Event._LOG['current']))
-        self.assertNotIn(tick, Event._LOG)
+        self.assertEqual(0, len(self.bus._log['current']))
+        self.assertNotIn(tick, self.bus._log)
 
     def test_get_current_events(self):
         events = [
-            Event.emit(
+            self.emit(
                 EventType.ACTION_ACCEPTED, msg='woo!', transient=True),
-            Event.emit(
+            self.emit(
                 EventType.ACTION_REJECTED, msg='ono!', transient=True),
         ]
 
-        current_events = Event.get_current_events(1)
+        current_events = self.bus.get_current_events(1)
         self.assertListEqual(events, current_events)
-        self.assertEqual(2, len(Event._LOG['current']))
+        self.assertEqual(2, len(self.bus._log['current']))
 
     def test_get_current_events_and_flush(self):
         events = [
-            Event.emit(
+            self.emit(
                 EventType.ACTION_ACCEPTED, msg='woo!', transient=True),
-            Event.emit(
+            self.emit(
                 EventType.ACTION_REJECTED, msg='ono!', transient=False),
         ]
 
-        current_events = Event.get_current_events(1, flush=True)
+        current_events = self.bus.get_current_events(1, flush=True)
         self.assertListEqual(events, current_events)
-        self.assertEqual(0, len(Event._LOG['current']))
-        self.assertEqual(1, len(Event._LOG[1]))
+        self.assertEqual(0, len(self.bus._log['current']))
+        self.assertEqual(1, len(self.bus._log[1]))
 
-    def test_serialize(self):
-        e = Event.emit(
-            EventType.ACTOR_DIED, msg='hello', event_data={'key': 'val'})
+    def test_clear_keeps_the_log(self):
+        e = self.emit(EventType.ACTOR_DIED)
+        self.bus.clear()
+        self.assertEqual([e], self.bus.get_current_events(1))
 
-        expected = {
-            'type': 'actor_died',
-            'msg': 'hello',
-            'data': {'key': 'val'},
-        }
-        self.assertDictEqual(expected, e.serialize())
+    def test_logs_are_per_bus(self):
+        e = self.emit(EventType.ACTOR_DIED)
+        other = EventBus()
+        Event.emit(EventType.ACTOR_DIED, bus=other)
+        self.assertEqual([e], self.bus.get_current_events(1))
+        self.assertEqual(1, len(other.get_current_events(1)))
+
+
+class TestEventBus(unittest.TestCase):
+
+    def setUp(self):
+        self.bus = EventBus()
+
+    def emit(self, event_type):
+        return Event.emit(event_type, bus=self.bus)
+
+    def test_emit_publishes_to_bus(self):
+        sub = self.bus.subscribe(EventType.ACTOR_DIED)
+        e = self.emit(EventType.ACTOR_DIED)
+        self.assertEqual([e], sub.poll())
+        self.assertEqual(1, len(self.bus))
+
+    def test_emit_without_bus(self):
+        sub = self.bus.subscribe(EventType.ACTOR_DIED)
+        Event.emit(EventType.ACTOR_DIED)
+        self.assertEqual([], sub.poll())
+        self.assertEqual([], self.bus.get_current_events(1))
+
+    def test_poll_only_returns_new_events(self):
+        sub = self.bus.subscribe(EventType.ACTOR_DIED)
+        e1 = self.emit(EventType.ACTOR_DIED)
+        self.assertEqual([e1], sub.poll())
+        self.assertEqual([], sub.poll())
+        e2 = self.emit(EventType.ACTOR_DIED)
+        e3 = self.emit(EventType.ACTOR_DIED)
+        self.assertEqual([e2, e3], sub.poll())
+
+    def test_poll_filters_by_type(self):
+        deaths = self.bus.subscribe(EventType.ACTOR_DIED)
+        both = self.bus.subscribe(
+            EventType.ACTOR_SPOTTED, EventType.ACTOR_DIED)
+        died = self.emit(EventType.ACTOR_DIED)
+        self.emit(EventType.ACTION_ACCEPTED)
+        spotted = self.emit(EventType.ACTOR_SPOTTED)
+
+        self.assertEqual([died], deaths.poll())
+        # Grouped by type, in subscription order
+        self.assertEqual([spotted, died], both.poll())
+
+    def test_subscriptions_are_independent(self):
+        sub1 = self.bus.subscribe(EventType.ACTOR_DIED)
+        sub2 = self.bus.subscribe(EventType.ACTOR_DIED)
+        e = self.emit(EventType.ACTOR_DIED)
+        self.assertEqual([e], sub1.poll())
+        self.assertEqual([e], sub2.poll())
+
+    def test_clear(self):
+        sub = self.bus.subscribe(EventType.ACTOR_DIED)
+        self.emit(EventType.ACTOR_DIED)
+        self.emit(EventType.ACTOR_DIED)
+        sub.poll()
+        self.bus.clear()
+        self.assertEqual(0, len(self.bus))
+        self.assertEqual([], sub.poll())
+        e = self.emit(EventType.ACTOR_DIED)
+        self.assertEqual([e], sub.poll())
+
+    def test_buses_are_independent(self):
+        sub = self.bus.subscribe(EventType.ACTOR_DIED)
+        other = EventBus()
+        other_sub = other.subscribe(EventType.ACTOR_DIED)
+        e = Event.emit(EventType.ACTOR_DIED, bus=other)
+        self.assertEqual([], sub.poll())
+        self.assertEqual([e], other_sub.poll())
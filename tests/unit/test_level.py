@@ -2,6 +2,7 @@ import unittest
 from unittest.mock import Mock, patch
 
 from barbarian.utils.rng import Rng
+from barbarian.components.actor import Fov
 from barbarian.map import Map, TileType
 from barbarian.world import Level
 
@@ -48,6 +49,40 @@ class TestLevel(unittest.TestCase):
 
         self.assertFalse(l.fov_map.transparent[9, 9])
 
+    def test_update_transparency(self):
+        l = Level(10, 10)
+        l.map = Map(l.w, l.h, [TileType.FLOOR] * (l.w * l.h))
+        l.init_fov_map()
+
+        # Spawning
+        actor = self._get_entity_mock(blocks_sight=True)
+        actor.pos.x, actor.pos.y = 1, 1
+        l.add_entity('actors', actor)
+        self.assertFalse(l.fov_map.transparent[1, 1])
+
+        # Moving
+        l.move_actor(actor, 1, 0)
+        self.assertTrue(l.fov_map.transparent[1, 1])
+        self.assertFalse(l.fov_map.transparent[1, 2])
+
+        # In place change (ie door)
+        door = self._get_entity_mock(blocks_sight=True)
+        door.pos.x, door.pos.y = 5, 5
+        l.add_entity('props', door)
+        self.assertFalse(l.fov_map.transparent[5, 5])
+        door.physics.blocks_sight = False
+        l.update_entity('props', door)
+        self.assertTrue(l.fov_map.transparent[5, 5])
+
+        # Tiles
+        l.set_tile(7, 7, TileType.WALL)
+        self.assertFalse(l.fov_map.transparent[7, 7])
+
+        # Still consistent with a full rebuild
+        transparent = l.fov_map.transparent.copy()
+        l.init_fov_map()
+        self.assertTrue((transparent == l.fov_map.transparent).all())
+
     def test_is_blocked(self):
 
         # Simple defering to Map
@@ -85,6 +120,105 @@ class TestLevel(unittest.TestCase):
         l.actors.add(0, 4, self._get_entity_mock(blocks=False))
         self.assertTrue(l.is_blocked(0, 4))
 
+    def test_blocking_mask(self):
+        l = Level(10, 10)
+        l.map = Map(l.w, l.h, [TileType.FLOOR] * (l.w * l.h))
+        l.map[5, 5] = TileType.WALL
+
+        l.actors.add(0, 0, self._get_entity_mock(blocks=True))
+        l.actors.add(1, 1, self._get_entity_mock(blocks=False))
+        l.props.add(2, 2, self._get_entity_mock(blocks=True))
+        l.props.add(3, 3, self._get_entity_mock(blocks=False))
+        door = self._get_entity_mock(blocks=True)
+        l.props.add(4, 4, door)
+        for e in l.props.all:
+            e.openable = e is door
+
+        mask = l.blocking_mask()
+        for x, y, _ in l.map:
+            self.assertEqual(l.is_blocked(x, y), mask[y, x])
+
+        mask = l.blocking_mask(ignore_openable=True)
+        self.assertFalse(mask[4, 4])
+        self.assertTrue(mask[2, 2])
+
+    def test_get_pathmap(self):
+        l = Level(10, 10)
+        l.map = Map(l.w, l.h, [TileType.FLOOR] * (l.w * l.h))
+        l.map[5, 4] = TileType.WALL
+
+        pm = l.get_pathmap((5, 5))
+        self.assertEqual(0, pm[5, 5])
+        self.assertEqual(pm.inf, pm[5, 4])
+        self.assertEqual(4, pm[5, 3])
+        self.assertIs(pm, l.get_pathmap((5, 5)))
+        self.assertIsNot(pm, l.get_pathmap((1, 1)))
+
+        # Blocking actors are taken into account...
+        actor = self._get_entity_mock(blocks=True)
+        actor.pos.x, actor.pos.y = 5, 6
+        l.add_entity('actors', actor)
+        new_pm = l.get_pathmap((5, 5))
+        self.assertIsNot(pm, new_pm)
+        self.assertEqual(new_pm.inf, new_pm[5, 6])
+        # ...unless they're ignored
+        pm = l.get_pathmap((5, 5), ignore_actors=True)
+        self.assertEqual(1, pm[5, 6])
+        l.move_actor(actor, 1, 1)
+        self.assertIs(pm, l.get_pathmap((5, 5), ignore_actors=True))
+
+    def test_set_tile_updates_bitmasks(self):
+        l = Level(10, 10)
+        l.map = Map(l.w, l.h, [TileType.FLOOR] * (l.w * l.h))
+        l.map.compute_bitmask_grid()
+
+        l.set_tile(5, 5, TileType.WALL)
+        expected = Map(l.w, l.h, list(l.map.cells))
+        expected.compute_bitmask_grid()
+        self.assertEqual(
+            expected.bitmask_grid.tolist(), l.map.bitmask_grid.tolist())
+
+    def test_versions(self):
+        l = Level(10, 10)
+        l.map = Map(l.w, l.h, [TileType.FLOOR] * (l.w * l.h))
+
+        l.set_tile(5, 5, TileType.WALL)
+        self.assertEqual(TileType.WALL, l.map[5, 5])
+        self.assertEqual(
+            (1, 1, 1),
+            (l.tiles_version, l.blocking_version, l.transparency_version))
+
+        actor = self._get_entity_mock(blocks=True, blocks_sight=False)
+        actor.pos.x, actor.pos.y = 1, 1
+        l.add_entity('actors', actor)
+        self.assertEqual(1, l.actors.version)
+        self.assertEqual(
+            (1, 2, 1),
+            (l.tiles_version, l.blocking_version, l.transparency_version))
+
+        l.move_actor(actor, 1, 0)
+        self.assertEqual(3, l.blocking_version)
+        l.remove_entity('actors', actor)
+        self.assertEqual(4, l.blocking_version)
+        self.assertEqual(1, l.transparency_version)
+
+        # Non blocking entities don't affect blocking or sight
+        item = self._get_entity_mock(blocks=False, blocks_sight=False)
+        item.pos.x, item.pos.y = 2, 2
+        l.add_entity('items', item)
+        self.assertEqual(1, l.items.version)
+        self.assertEqual(
+            (4, 1), (l.blocking_version, l.transparency_version))
+
+        # In place updates always do
+        door = self._get_entity_mock(blocks=False, blocks_sight=False)
+        door.pos.x, door.pos.y = 3, 3
+        l.add_entity('props', door)
+        l.update_entity('props', door)
+        self.assertEqual(2, l.props.version)
+        self.assertEqual(
+            (5, 2), (l.blocking_version, l.transparency_version))
+
     def test_is_blocked_out_of_bounds(self):
 
         l = Level(10, 10)
@@ -126,6 +260,77 @@ class TestLevel(unittest.TestCase):
         self.assertEqual(actor, l.actors[1, 1])
         self.assertIsNone(l.actors[2, 2])
 
+    def test_update_fovs(self):
+        l = Level(10, 10)
+        l.map = Map(l.w, l.h, [TileType.FLOOR] * (l.w * l.h))
+        l.init_fov_map()
+
+        actors = []
+        for x, fov in ((1, Fov(range=5)), (3, Fov(range=5)), (5, None)):
+            actor = self._get_entity_mock()
+            actor.pos.x, actor.pos.y = x, 1
+            actor.fov = fov
+            actor.is_player = False
+            l.add_entity('actors', actor)
+            actors.append(actor)
+
+        self.assertEqual(2, l.update_fovs())
+        self.assertTrue(actors[0].fov.is_in_fov(3, 1))
+        # Nothing changed
+        self.assertEqual(0, l.update_fovs())
+        # Only the actor that moved
+        l.move_actor(actors[0], 0, 1)
+        self.assertEqual(1, l.update_fovs())
+        # Sight changed: everyone
+        l.set_tile(2, 5, TileType.WALL)
+        self.assertEqual(2, l.update_fovs())
+
+    def _add_actor(self, l, x, y, is_player=False):
+        actor = self._get_entity_mock()
+        actor.pos.x, actor.pos.y = x, y
+        actor.is_player = is_player
+        l.add_entity('actors', actor)
+        return actor
+
+    def test_update_activity(self):
+        l = Level(50, 10)
+        l.map = Map(l.w, l.h, [TileType.FLOOR] * (l.w * l.h))
+        l.explored[:, :30] = True
+
+        player = self._add_actor(l, 1, 1, is_player=True)
+        l.wake(player)
+        near = self._add_actor(l, 5, 5)
+        far = self._add_actor(l, 28, 5)
+        unexplored = self._add_actor(l, 8, 5)
+        l.explored[5, 8] = False
+        self.assertEqual([player], l.active_actors)
+
+        l.update_activity(1, 1, radius=10)
+        self.assertEqual([player, near], l.active_actors)
+
+        # Moving away
+        l.move_actor(player, 20, 0)
+        l.update_activity(21, 1, radius=10)
+        self.assertEqual([player, far], l.active_actors)
+
+        # Removed actors are dropped
+        l.remove_entity('actors', far)
+        self.assertEqual([player], l.active_actors)
+
+    def test_make_noise(self):
+        l = Level(50, 10)
+        l.map = Map(l.w, l.h, [TileType.FLOOR] * (l.w * l.h))
+
+        near = self._add_actor(l, 5, 5)
+        far = self._add_actor(l, 28, 5)
+        l.make_noise(3, 3, 5)
+        self.assertEqual([near], l.active_actors)
+
+        # Awake actors stay awake in unexplored areas, as long as
+        # they're within range
+        l.update_activity(3, 3, radius=10)
+        self.assertEqual([near], l.active_actors)
+
     def test_enter_level(self):
 
         for is_player in (True, False):
@@ -140,6 +345,7 @@ class TestLevel(unittest.TestCase):
             l.enter(actor)
 
             self.assertEqual(actor, l.actors[5, 5])
+            self.assertEqual([actor], l.active_actors)
             actor.fov.reset.assert_called_once()
             actor.fov.compute.assert_called_once_with(
                 l, 5, 5, update_level=is_player)
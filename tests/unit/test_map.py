@@ -1,6 +1,9 @@
+import random
 import unittest
 
-from barbarian.map import Map, TileType
+import numpy as np
+
+from barbarian.map import Map, TileType, TILE_TYPES
 
 
 class TestBaseMapBuilder(unittest.TestCase):
@@ -33,7 +36,7 @@ class TestBaseMapBuilder(unittest.TestCase):
         expected = {
             'width': 3,
             'height': 3,
-            'cells': ['#', '#', '#', '#', '#', '#', '#', '#', '#'],
+            'cells': '#########',
             'bitmask_grid': None,
         }
         self.assertEqual(m.serialize(), expected)
@@ -44,7 +47,185 @@ class TestBaseMapBuilder(unittest.TestCase):
         expected = {
             'width': 3,
             'height': 3,
-            'cells': ['.', '.', '.', '.', '.', '.', '.', '.', '.'],
+            'cells': '.........',
             'bitmask_grid': [5, 1, 9, 4, 0, 8, 6, 2, 10],
         }
         self.assertEqual(m.serialize(), expected)
+
+    def test_blocking_mask(self):
+        m = Map(3, 2, [TileType.WALL, TileType.FLOOR, TileType.FLOOR] * 2)
+        mask = m.blocking_mask()
+        for x, y, _ in m:
+            self.assertEqual(m.cell_blocks(x, y), mask[y, x])
+
+    def test_wall_mask(self):
+        m = Map(3, 2, [TileType.WALL, TileType.FLOOR, TileType.WALL] * 2)
+        expected = np.array([[1, 0, 1], [1, 0, 1]], dtype=bool)
+        self.assertTrue(np.array_equal(expected, m.wall_mask()))
+
+    def test_apply_wall_mask(self):
+        m = Map(3, 2, [TileType.FLOOR] * 6)
+        m.apply_wall_mask(np.array([[1, 0, 0], [0, 0, 1]], dtype=bool))
+        self.assertEqual(TileType.WALL, m[0, 0])
+        self.assertEqual(TileType.WALL, m[2, 1])
+        self.assertEqual(
+            4, sum(c == TileType.FLOOR for c in m.cells))
+
+    def _random_map(self, rng, w, h):
+        return Map(w, h, [
+            TileType.WALL if rng.random() < .45 else TileType.FLOOR
+            for _ in range(w * h)])
+
+    def test_compute_bitmask_grid(self):
+        rng = random.Random(4)
+        for w, h in ((1, 1), (2, 3), (9, 7), (20, 15)):
+            m = self._random_map(rng, w, h)
+            m.compute_bitmask_grid()
+            for x, y, _ in m:
+                self.assertEqual(
+                    m.get_bitmask(x, y), m.bitmask_grid[x, y],
+                    f'Failing cell: ({x},{y}) - {w}x{h}')
+
+    def test_update_bitmask_grid(self):
+        rng = random.Random(8)
+        m = self._random_map(rng, 15, 10)
+        m.compute_bitmask_grid()
+        for _ in range(30):
+            changed = [
+                (rng.randrange(m.w), rng.randrange(m.h))
+                for _ in range(rng.randint(1, 3))]
+            for x, y in changed:
+                m[x, y] = rng.choice((TileType.WALL, TileType.FLOOR))
+            m.update_bitmask_grid(changed)
+
+            expected = Map(m.w, m.h, list(m.cells))
+            expected.compute_bitmask_grid()
+            self.assertListEqual(
+                expected.bitmask_grid.tolist(), m.bitmask_grid.tolist())
+
+    def test_update_bitmask_grid_not_computed(self):
+        m = Map(3, 3, [TileType.FLOOR] * 9)
+        m.update_bitmask_grid([(1, 1)])
+        self.assertIsNotNone(m.bitmask_grid)
+
+    def _parse_map(self, rows):
+        return Map(len(rows[0]), len(rows), [
+            TileType(c) for row in rows for c in row])
+
+    def test_label_regions(self):
+        m = self._parse_map([
+            '..#.',
+            '###.',
+            '.#..',
+        ])
+        labels, sizes = m.label_regions()
+        self.assertEqual(
+            [[1, 1, 0, 2], [0, 0, 0, 2], [3, 0, 2, 2]], labels.tolist())
+        self.assertEqual([0, 2, 4, 1], sizes.tolist())
+
+        labels, sizes = m.label_regions(lambda c: c == TileType.WALL)
+        self.assertEqual([0, 5], sizes.tolist())
+
+    def test_compute_regions(self):
+        m = self._parse_map([
+            '..#.',
+            '###.',
+            '.#..',
+        ])
+        m.compute_regions()
+        self.assertEqual([
+            [(0, 0), (1, 0)],
+            [(3, 0), (3, 1), (2, 2), (3, 2)],
+            [(0, 2)],
+        ], m.regions)
+
+    def test_floodfill(self):
+        m = self._parse_map([
+            '..#.',
+            '###.',
+            '.#..',
+        ])
+        visited = []
+        cells = list(m.floodfill(
+            3, 2, lambda c: c == TileType.FLOOR, visited.append))
+        self.assertEqual(4, len(cells))
+        self.assertEqual(cells, visited)
+        self.assertEqual(
+            [], list(m.floodfill(0, 1, lambda c: c == TileType.FLOOR)))
+
+
+class TestTileTable(unittest.TestCase):
+
+    def test_tile_properties(self):
+        self.assertTrue(TileType.WALL.blocks)
+        self.assertTrue(TileType.WALL.blocks_sight)
+        self.assertFalse(TileType.FLOOR.blocks)
+        self.assertFalse(TileType.FLOOR.blocks_sight)
+        self.assertEqual('#', TileType.WALL.glyph)
+
+    def test_codes(self):
+        for code, tt in enumerate(TILE_TYPES):
+            self.assertEqual(code, tt.code)
+        self.assertEqual(len(TileType), len(TILE_TYPES))
+
+
+class TestMapStorage(unittest.TestCase):
+
+    def test_cells_are_codes(self):
+        m = Map(3, 3, [TileType.FLOOR] * 9)
+        m[1, 1] = TileType.WALL
+        self.assertEqual(np.uint8, m.array.dtype)
+        self.assertEqual(TileType.WALL.code, m.array[1, 1])
+        self.assertEqual(TileType.WALL, m[1, 1])
+        self.assertEqual(TileType.FLOOR, m.cells[0])
+        self.assertEqual((1, 1, TileType.WALL), list(m)[4])
+
+    def test_set_cell_from_code(self):
+        m = Map(3, 3, [TileType.FLOOR] * 9)
+        m[1, 1] = TileType.WALL.code
+        self.assertEqual(TileType.WALL, m[1, 1])
+        m.set_cell(1, 1, TileType.FLOOR.code)
+        self.assertEqual(TileType.FLOOR, m[1, 1])
+
+    def test_init_from_codes(self):
+        m = Map(2, 1, [TileType.WALL.code, TileType.FLOOR.code])
+        self.assertEqual((TileType.WALL, TileType.FLOOR), m.cells)
+
+    def test_cells_are_read_only(self):
+        m = Map(2, 1, [TileType.FLOOR] * 2)
+        with self.assertRaises(TypeError):
+            m.cells[0] = TileType.WALL
+        self.assertEqual(TileType.FLOOR, m[0, 0])
+        # Assigning the whole property works
+        m.cells = [TileType.WALL] * 2
+        self.assertEqual(TileType.WALL, m[0, 0])
+        self.assertEqual([TileType.WALL] * 2, m.tolist())
+
+    def test_iter_where_mask(self):
+        m = Map(2, 2, [TileType.FLOOR, TileType.WALL] * 2)
+        self.assertEqual(
+            [(1, 0, TileType.WALL), (1, 1, TileType.WALL)],
+            list(m.iter_where(m.array == TileType.WALL.code)))
+
+    def test_default_cells(self):
+        m = Map(2, 2)
+        self.assertTrue(all(c == TileType.WALL for c in m.cells))
+
+    def test_copy(self):
+        m = Map(2, 2, [TileType.FLOOR] * 4)
+        c = m.copy()
+        c[0, 0] = TileType.WALL
+        self.assertEqual(TileType.FLOOR, m[0, 0])
+        self.assertIsInstance(c, Map)
+
+    def test_transparency_mask(self):
+        m = Map(3, 1, [TileType.WALL, TileType.FLOOR, TileType.WALL])
+        self.assertEqual([[False, True, False]], m.transparency_mask().tolist())
+        self.assertTrue(m.cell_blocks_sight(0, 0))
+        self.assertFalse(m.cell_blocks_sight(1, 0))
+
+    def test_mask(self):
+        m = Map(3, 1, [TileType.WALL, TileType.FLOOR, TileType.WALL])
+        self.assertEqual(
+            [[False, True, False]],
+            m.mask(lambda c: c == TileType.FLOOR).tolist())
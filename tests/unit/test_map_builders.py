@@ -1,7 +1,10 @@
 import unittest
+import hashlib
 
-from barbarian.map import Map
+from barbarian.utils.rng import Rng
+from barbarian.map import Map, TileType
 from barbarian.genmap.common import BaseMapBuilder
+from barbarian.genmap.builders import CellularAutomataMapBuilder
 
 
 class TestMap(unittest.TestCase):
@@ -13,7 +16,7 @@ class TestMap(unittest.TestCase):
         self.assertEqual(len(builder.snapshots), 1)
         self.assertEqual(builder.snapshots[0].cells, m.cells)
 
-        m[1, 1] = 'woot'
+        m[1, 1] = TileType.FLOOR
         builder.take_snapshot(m)
         self.assertEqual(len(builder.snapshots), 2)
         self.assertNotEqual(builder.snapshots[0].cells, m.cells)
@@ -23,3 +26,70 @@ class TestMap(unittest.TestCase):
         builder = BaseMapBuilder(debug=False)
         builder.take_snapshot('dummy_snapshot')
         self.assertEqual(len(builder.snapshots), 0)
+
+    def test_cull_unreachable(self):
+        builder = BaseMapBuilder()
+        builder.map = Map(4, 3, [TileType(c) for c in (
+            '..#.'
+            '###.'
+            '.#..'
+        )])
+        builder.cull_unreachable(3, 0)
+        self.assertEqual(
+            '###.'
+            '###.'
+            '##..', ''.join(c.value for c in builder.map.cells))
+
+    def test_cull_unreachable_from_blocked_cell(self):
+        builder = BaseMapBuilder()
+        cells = [TileType(c) for c in (
+            '..#.'
+            '###.'
+        )]
+        builder.map = Map(4, 2, cells)
+        self.assertRaises(ValueError, builder.cull_unreachable, 2, 0)
+        # Nothing was culled
+        self.assertEqual(tuple(cells), builder.map.cells)
+
+
+class TestCellularAutomataMapBuilder(unittest.TestCase):
+
+    # Checksums of maps generated by the original, per-cell,
+    # implementation. Changing the algorithm should not change the
+    # caves generated from existing seeds.
+    expected = {
+        '3': ('06eea3fe58bef61fd204f334e8212c4e', (20, 15), (3, 27)),
+        '7': ('590ebc11d0430100373b6c884d8c0fca', (20, 15), (1, 15)),
+    }
+
+    def test_seeded_output_is_stable(self):
+        for seed, (checksum, start_pos, exit_pos) in self.expected.items():
+            Rng.add_rng('dungeon', seed)
+            builder = CellularAutomataMapBuilder()
+            m = builder.build_map(40, 30, 1)
+
+            cells_str = ''.join(c.value for c in m.cells)
+            self.assertEqual(
+                checksum, hashlib.md5(cells_str.encode()).hexdigest())
+            self.assertEqual(start_pos, builder.start_pos)
+            self.assertEqual(exit_pos, builder.exit_pos)
+
+    def test_single_region(self):
+        for seed in self.expected:
+            Rng.add_rng('dungeon', seed)
+            builder = CellularAutomataMapBuilder()
+            m = builder.build_map(40, 30, 1)
+
+            self.assertEqual(1, len(m.regions))
+            self.assertIn(builder.start_pos, m.regions[0])
+            self.assertIn(builder.exit_pos, m.regions[0])
+
+    def test_snapshots(self):
+        Rng.add_rng('dungeon', '3')
+        builder = CellularAutomataMapBuilder(debug=True)
+        m = builder.build_map(40, 30, 1)
+
+        # Random fill + smoothing passes + culling
+        self.assertEqual(
+            builder.SMOOTHING_PASSES + 2, len(builder.snapshots))
+        self.assertEqual(m.cells, builder.snapshots[-1].cells)
@@ -0,0 +1,110 @@
+import unittest
+
+from barbarian.actions import Action, ActionType
+from barbarian.scheduler import Scheduler, TICK, action_cost
+
+
+class TestScheduler(unittest.TestCase):
+
+    def run_turn(self, s, delays=None):
+        """ Run a turn, rescheduling actors with the given delays. """
+        delays = delays or {}
+        acted = []
+        for actor in s.turn():
+            acted.append(actor)
+            s.reschedule(actor, delays.get(actor, TICK))
+        return acted
+
+    def test_add(self):
+        s = Scheduler()
+        s.add('a')
+        s.add('b')
+        self.assertEqual(2, len(s))
+        self.assertIn('a', s)
+        self.assertEqual(['a', 'b'], list(s))
+
+    def test_turn_order(self):
+        s = Scheduler()
+        s.add('a', 50)
+        s.add('b')
+        s.add('c', TICK)
+        self.assertEqual(['b', 'a'], self.run_turn(s))
+        self.assertEqual(TICK, s.time)
+        self.assertEqual(['c', 'b', 'a'], self.run_turn(s))
+
+    def test_speed(self):
+        s = Scheduler()
+        s.add('fast')
+        s.add('slow')
+        delays = {'fast': TICK // 2, 'slow': TICK * 2}
+        self.assertEqual(['fast', 'slow', 'fast'], self.run_turn(s, delays))
+        self.assertEqual(['fast', 'fast'], self.run_turn(s, delays))
+        # Ties go to whoever was scheduled first
+        self.assertEqual(['slow', 'fast', 'fast'], self.run_turn(s, delays))
+
+    def test_remove(self):
+        s = Scheduler()
+        s.add('a')
+        s.add('b')
+        s.remove('a')
+        s.remove('not_scheduled')
+        self.assertEqual(['b'], self.run_turn(s))
+        self.assertNotIn('a', s)
+
+    def test_remove_while_acting(self):
+        s = Scheduler()
+        s.add('a')
+        s.add('b')
+        for actor in s.turn():
+            s.remove('b')
+            s.reschedule(actor, TICK)
+        # Not rescheduled
+        self.assertEqual(['a'], list(s))
+
+    def test_add_during_turn(self):
+        s = Scheduler()
+        s.add('a')
+        acted = []
+        for actor in s.turn():
+            acted.append(actor)
+            if actor == 'a':
+                s.add('b')
+            s.reschedule(actor, TICK)
+        self.assertEqual(['a', 'b'], acted)
+
+    def test_end_turn(self):
+        s = Scheduler()
+        for actor in 'abc':
+            s.add(actor)
+        for actor in s.turn():
+            s.reschedule(actor, TICK)
+            break
+        s.end_turn()
+        self.assertEqual(TICK, s.time)
+        self.assertEqual(['a', 'b', 'c'], list(s))
+        self.assertEqual(['a', 'b', 'c'], self.run_turn(s))
+
+    def test_end_turn_last_actor(self):
+        s = Scheduler()
+        s.add('a')
+        s.add('b')
+        for actor in s.turn():
+            s.remove('a')
+            break
+        # 'b' is the only entry left in the heap
+        s.end_turn()
+        self.assertEqual(['b'], self.run_turn(s))
+
+    def test_removed_entries_dont_pile_up(self):
+        s = Scheduler()
+        for i in range(1000):
+            s.add(i, TICK * 10)
+            s.remove(i)
+        self.assertLess(len(s._heap), 100)
+
+    def test_action_cost(self):
+        self.assertEqual(TICK, action_cost(None))
+        move = Action(ActionType.MOVE)
+        self.assertEqual(TICK, action_cost(move))
+        self.assertEqual(TICK // 2, action_cost(move, speed=200))
+        self.assertEqual(TICK * 2, action_cost(move, speed=50))
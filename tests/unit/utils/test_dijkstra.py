@@ -1,10 +1,16 @@
+import random
 import unittest
 
-from barbarian.utils.structures.dijkstra import DijkstraGrid
+import numpy as np
+
+from barbarian.utils.structures.dijkstra import (
+    DijkstraGrid, ArrayDijkstraGrid, DijkstraError, DijkstraCache)
 
 
 class DijsktraGridTest(unittest.TestCase):
 
+    grid_cls = DijkstraGrid
+
     def _check_grid(self, grid, expected_array):
         for y, row in enumerate(expected_array):
             for x, c in enumerate(row):
@@ -18,11 +24,11 @@ class DijsktraGridTest(unittest.TestCase):
                 print()
 
     def test_init(self):
-        dg = DijkstraGrid(3, 3)
+        dg = self.grid_cls(3, 3)
         self.assertTrue(all(c == dg.inf for c in dg.cells))
 
     def test_set_goal(self):
-        dg = DijkstraGrid(3, 3)
+        dg = self.grid_cls(3, 3)
 
         dg.set_goal(1, 1)
         self.assertEqual(dg[1, 1], 0)
@@ -33,7 +39,7 @@ class DijsktraGridTest(unittest.TestCase):
     def test_basic_compute(self):
 
         # Goal in the center
-        dg = DijkstraGrid(5, 5)
+        dg = self.grid_cls(5, 5)
         dg.set_goal(2, 2)
         dg.compute()
 
@@ -47,7 +53,7 @@ class DijsktraGridTest(unittest.TestCase):
         self._check_grid(dg, expected)
 
         # Goal in a corner
-        dg = DijkstraGrid(5, 5)
+        dg = self.grid_cls(5, 5)
         dg.set_goal(4, 4)
         dg.compute()
 
@@ -62,7 +68,7 @@ class DijsktraGridTest(unittest.TestCase):
 
     def test_several_goals(self):
 
-        dg = DijkstraGrid(5, 5)
+        dg = self.grid_cls(5, 5)
         dg.set_goal(0, 0)
         dg.set_goal(4, 3)
         dg.compute()
@@ -78,7 +84,7 @@ class DijsktraGridTest(unittest.TestCase):
 
     def test_basic_pedicate(self):
 
-        dg = DijkstraGrid(3, 3)
+        dg = self.grid_cls(3, 3)
         dg.set_goal(1, 1)
         dg.compute(
             # ignore first row
@@ -93,7 +99,7 @@ class DijsktraGridTest(unittest.TestCase):
 
     def test_basic_cost_function(self):
 
-        dg = DijkstraGrid(5, 5)
+        dg = self.grid_cls(5, 5)
         dg.set_goal(2, 2)
         dg.compute(
             # Cell at (3, 2) (ie just east to the goal) costs 3
@@ -107,3 +113,264 @@ class DijsktraGridTest(unittest.TestCase):
             [4, 3, 2, 3, 4],
         ]
         self._check_grid(dg, expected)
+
+    def test_compute_from_arrays(self):
+
+        dg = self.grid_cls(3, 3)
+        dg.set_goal(1, 1)
+        passable = np.ones((3, 3), dtype=bool)
+        passable[0, :] = False      # ignore first row
+        costs = np.ones((3, 3), dtype=int)
+        costs[2, 2] = 3
+        dg.compute_from_arrays(passable, costs)
+
+        expected = [
+            [dg.inf, dg.inf, dg.inf],
+            [1,      0,      1],
+            [2,      1,      4],
+        ]
+        self._check_grid(dg, expected)
+
+    def test_new_from_arrays(self):
+        passable = np.ones((5, 5), dtype=bool)
+        passable[:, 2] = False
+        dg = self.grid_cls.new(5, 5, (0, 0), (3, 4, 4), passable=passable)
+
+        expected = [
+            [0,      1,      dg.inf, 8, 7],
+            [1,      2,      dg.inf, 7, 6],
+            [2,      3,      dg.inf, 6, 5],
+            [3,      4,      dg.inf, 5, 4],
+            [4,      5,      dg.inf, 4, 3],
+        ]
+        self._check_grid(dg, expected)
+
+    def test_array_engine_matches_python_engine(self):
+        rng = random.Random(1234)
+        w, h = 20, 15
+        for _ in range(20):
+            passable = np.array(
+                [rng.random() > 0.3 for _ in range(w * h)]).reshape(h, w)
+            costs = np.array(
+                [rng.randint(1, 4) for _ in range(w * h)]).reshape(h, w)
+            goals = [
+                (rng.randint(0, 5), rng.randrange(w), rng.randrange(h))
+                for _ in range(3)]
+
+            dg = self.grid_cls.new(
+                w, h, *goals,
+                predicate=lambda x, y, _: passable[y, x],
+                cost_function=lambda x, y, _: costs[y, x])
+            array_dg = self.grid_cls.new(
+                w, h, *goals, passable=passable, costs=costs)
+
+            self.assertListEqual(dg.tolist(), array_dg.tolist())
+
+    def _random_arrays(self, rng, w, h):
+        passable = np.array(
+            [rng.random() > 0.3 for _ in range(w * h)]).reshape(h, w)
+        costs = np.array(
+            [rng.randint(1, 4) for _ in range(w * h)]).reshape(h, w)
+        return passable, costs
+
+    def test_add_goal(self):
+        passable = np.ones((5, 5), dtype=bool)
+        dg = self.grid_cls.new(5, 5, (0, 0), passable=passable)
+        dg.add_goal(4, 4)
+        dg.repair()
+        self.assertEqual(4, dg[4, 0])
+        self.assertEqual(0, dg[4, 4])
+        self.assertEqual(
+            self.grid_cls.new(
+                5, 5, (0, 0), (4, 4), passable=passable).tolist(),
+            dg.tolist())
+
+    def test_remove_goal(self):
+        passable = np.ones((5, 5), dtype=bool)
+        dg = self.grid_cls.new(5, 5, (0, 0), (4, 4), passable=passable)
+        dg.remove_goal(4, 4)
+        dg.repair()
+        self.assertEqual(8, dg[4, 4])
+        self.assertEqual(
+            self.grid_cls.new(5, 5, (0, 0), passable=passable).tolist(),
+            dg.tolist())
+
+    def test_set_cost(self):
+        passable = np.ones((3, 3), dtype=bool)
+        dg = self.grid_cls.new(3, 3, (0, 0), passable=passable)
+        # Block the center and the cell to its right
+        dg.set_cost(1, 1, 0)
+        dg.set_cost(2, 1, 0)
+        dg.repair()
+        expected = [
+            [0,      1,      2],
+            [1,      dg.inf, dg.inf],
+            [2,      3,      4],
+        ]
+        self._check_grid(dg, expected)
+
+        # Unblock with a higher cost
+        dg.set_cost(1, 1, 5)
+        dg.repair()
+        self.assertEqual(6, dg[1, 1])
+
+    def test_changes_are_only_applied_on_repair(self):
+        passable = np.ones((3, 3), dtype=bool)
+        dg = self.grid_cls.new(3, 3, (0, 0), passable=passable)
+        dg.add_goal(2, 2)
+        self.assertEqual(4, dg[2, 2])
+        dg.repair()
+        self.assertEqual(0, dg[2, 2])
+
+    def test_incremental_updates_require_arrays(self):
+        dg = self.grid_cls.new(3, 3, (0, 0))
+        self.assertRaises(DijkstraError, dg.set_cost, 1, 1, 2)
+        dg.add_goal(2, 2)
+        self.assertRaises(DijkstraError, dg.repair)
+        self.assertRaises(
+            DijkstraError,
+            dg.update_from_arrays, np.ones((3, 3), dtype=bool))
+
+    def test_repair_matches_full_recompute(self):
+        rng = random.Random(4321)
+        w, h = 15, 10
+        for _ in range(10):
+            passable, costs = self._random_arrays(rng, w, h)
+            goals = {
+                (rng.randint(0, 3), rng.randrange(w), rng.randrange(h))
+                for _ in range(3)}
+            dg = self.grid_cls.new(
+                w, h, *goals, passable=passable, costs=costs)
+
+            for _ in range(15):
+                for _ in range(rng.randint(1, 4)):
+                    op = rng.choice(('add', 'remove', 'cost', 'block'))
+                    x, y = rng.randrange(w), rng.randrange(h)
+                    if op == 'add':
+                        weight = rng.randint(0, 3)
+                        goals.add((weight, x, y))
+                        dg.add_goal(x, y, weight)
+                    elif op == 'remove' and goals:
+                        _, x, y = rng.choice(sorted(goals))
+                        goals = {g for g in goals if g[1:] != (x, y)}
+                        dg.remove_goal(x, y)
+                    elif op == 'cost':
+                        passable[y, x] = True
+                        costs[y, x] = rng.randint(1, 4)
+                        dg.set_cost(x, y, costs[y, x])
+                    else:
+                        passable[y, x] = False
+                        dg.set_cost(x, y, 0)
+                dg.repair()
+
+                expected = self.grid_cls.new(
+                    w, h, *goals, passable=passable, costs=costs)
+                self.assertListEqual(expected.tolist(), dg.tolist())
+
+    def test_update_from_arrays_matches_full_recompute(self):
+        rng = random.Random(1111)
+        w, h = 15, 10
+        passable, costs = self._random_arrays(rng, w, h)
+        goal_mask = np.zeros((h, w), dtype=bool)
+        goal_mask[rng.randrange(h), rng.randrange(w)] = True
+        dg = self.grid_cls.new(
+            w, h, *zip(*np.nonzero(goal_mask)[::-1]),
+            passable=passable, costs=costs)
+
+        for _ in range(30):
+            for _ in range(3):
+                x, y = rng.randrange(w), rng.randrange(h)
+                passable[y, x] = not passable[y, x]
+                x, y = rng.randrange(w), rng.randrange(h)
+                costs[y, x] = rng.randint(1, 4)
+                x, y = rng.randrange(w), rng.randrange(h)
+                goal_mask[y, x] = not goal_mask[y, x]
+            dg.update_from_arrays(passable, costs, goal_mask)
+
+            expected = self.grid_cls.new(
+                w, h, *zip(*np.nonzero(goal_mask)[::-1]),
+                passable=passable, costs=costs)
+            self.assertListEqual(expected.tolist(), dg.tolist())
+
+
+class ArrayDijsktraGridTest(DijsktraGridTest):
+
+    grid_cls = ArrayDijkstraGrid
+
+    def test_array_storage(self):
+        dg = ArrayDijkstraGrid.new(5, 5, (2, 2))
+        self.assertEqual((5, 5), dg.array.shape)
+        self.assertEqual(4, dg.array[0, 0])
+        self.assertEqual(
+            DijkstraGrid.new(5, 5, (2, 2)).cells, dg.tolist())
+
+
+class DijkstraCacheTest(unittest.TestCase):
+
+    def _compute(self, *goals):
+        return lambda: DijkstraGrid.new(5, 5, *goals)
+
+    def test_get(self):
+        cache = DijkstraCache(max_bytes=10000)
+        dg = cache.get('a', 0, self._compute((0, 0)))
+        self.assertEqual(DijkstraGrid.new(5, 5, (0, 0)).cells, dg.cells)
+        self.assertIs(dg, cache.get('a', 0, self._compute((0, 0))))
+        self.assertEqual(1, cache.misses)
+        self.assertEqual(1, cache.hits)
+
+    def test_get_outdated(self):
+        cache = DijkstraCache(max_bytes=10000)
+        dg = cache.get('a', 0, self._compute((0, 0)))
+        new_dg = cache.get('a', 1, self._compute((1, 1)))
+        self.assertIsNot(dg, new_dg)
+        self.assertEqual(0, new_dg[1, 1])
+        self.assertEqual(2, cache.misses)
+        self.assertEqual(0, cache.hits)
+
+    def test_get_update(self):
+        cache = DijkstraCache(max_bytes=10000)
+        passable = np.ones((5, 5), dtype=bool)
+        dg = cache.get(
+            'a', 0, lambda: DijkstraGrid.new(5, 5, (0, 0), passable=passable))
+
+        def update(dg):
+            dg.add_goal(4, 4)
+            dg.repair()
+
+        self.assertIs(dg, cache.get('a', 1, self._compute(), update))
+        self.assertEqual(0, dg[4, 4])
+        self.assertEqual(1, cache.updates)
+        # Version was stored
+        self.assertIs(dg, cache.get('a', 1, self._compute(), update))
+        self.assertEqual(1, cache.hits)
+
+    def test_eviction(self):
+        nbytes = DijkstraGrid.new(5, 5, (0, 0)).nbytes
+        cache = DijkstraCache(max_bytes=nbytes * 2)
+        cache.get('a', 0, self._compute((0, 0)))
+        cache.get('b', 0, self._compute((0, 0)))
+        # Mark a as recently used
+        cache.get('a', 0, self._compute((0, 0)))
+        cache.get('c', 0, self._compute((0, 0)))
+
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+        self.assertEqual(1, cache.evictions)
+        self.assertLessEqual(cache.nbytes, cache.max_bytes)
+
+    def test_eviction_keeps_last_map(self):
+        cache = DijkstraCache(max_bytes=0)
+        dg = cache.get('a', 0, self._compute((0, 0)))
+        self.assertIs(dg, cache.peek('a'))
+        self.assertEqual(1, len(cache))
+
+    def test_stats(self):
+        cache = DijkstraCache(max_bytes=10000)
+        cache.get('a', 0, self._compute((0, 0)))
+        cache.get('a', 0, self._compute((0, 0)))
+        stats = cache.stats
+        self.assertEqual(1, stats['size'])
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(cache.nbytes, stats['nbytes'])
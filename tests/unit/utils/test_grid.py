@@ -1,9 +1,12 @@
 import unittest
 from unittest.mock import Mock
 
+import numpy as np
+
 from barbarian.utils.geometry import Rect
 from barbarian.utils.structures.grid import (
-    Grid, EntityGrid, GridContainer, GridError, OutOfBoundGridError)
+    Grid, ArrayGrid, EntityGrid, GridContainer,
+    GridError, OutOfBoundGridError, count_neighbors, label_regions)
 
 
 class TestGrid(unittest.TestCase):
@@ -224,6 +227,249 @@ class TestGrid(unittest.TestCase):
         self.assertListEqual(['l', 'm', 'q', 'r'], new_m.cells)
 
 
+class IntArrayGrid(ArrayGrid):
+    dtype = np.int32
+    fill_value = 0
+
+
+class TestArrayGrid(unittest.TestCase):
+
+    def test_invalid_cell_list_length(self):
+        self.assertRaises(GridError, ArrayGrid, 3, 3, [0] * 12)
+        self.assertRaises(GridError, ArrayGrid, 3, 3, [0] * 6)
+        self.assertRaises(GridError, ArrayGrid, 3, 3, np.zeros(12))
+
+    def test_default_cells(self):
+        g = ArrayGrid(3, 2)
+        self.assertEqual((2, 3), g.array.shape)
+        self.assertTrue(all(c is None for c in g.cells))
+
+        g = IntArrayGrid(3, 2)
+        self.assertEqual(np.int32, g.array.dtype)
+        self.assertTrue(all(c == 0 for c in g.cells))
+
+    def test_array_layout(self):
+        g = IntArrayGrid(3, 2, range(6))
+        # Array is indexed as [y, x]
+        self.assertEqual(5, g.array[1, 2])
+        self.assertEqual(g[2, 1], g.array[1, 2])
+        # Cells are a flat view on the array
+        g.cells[4] = 42
+        self.assertEqual(42, g[1, 1])
+
+    def test_get_and_set_cell(self):
+        g = IntArrayGrid(3, 3)
+        g[1, 2] = 7
+        self.assertEqual(7, g[1, 2])
+        self.assertEqual(7, g.get_cell(1, 2))
+        # Values are returned as python objects
+        self.assertIs(int, type(g[1, 2]))
+
+    def test_invalid_grid_location(self):
+        g = IntArrayGrid(2, 8)
+        for x, y in ((10, 10), (0, 10), (10, 0), (-1, -1), (-1, 0)):
+            self.assertRaises(OutOfBoundGridError, g.get_cell, x, y)
+            self.assertRaises(OutOfBoundGridError, g.set_cell, x, y, 1)
+
+    def test_iter(self):
+        g = IntArrayGrid(3, 2, range(6))
+        l = Grid(3, 2, list(range(6)))
+        self.assertListEqual(list(l), list(g))
+
+    def test_copy(self):
+        g = IntArrayGrid(3, 3, range(9))
+        c = g.copy()
+        self.assertIsInstance(c, IntArrayGrid)
+        self.assertTrue(np.array_equal(g.array, c.array))
+        c[0, 0] = 42
+        self.assertEqual(0, g[0, 0])
+
+    def test_slice(self):
+        cells = [
+            'a', 'b', 'c', 'd', 'e',
+            'f', 'g', 'h', 'i', 'j',
+            'k', 'l', 'm', 'n', 'o',
+            'p', 'q', 'r', 's', 't',
+            'u', 'v', 'w', 'x', 'y'
+        ]
+        g = ArrayGrid(5, 5, cells)
+
+        new_g = g.slice(1, 2, 2, 2)
+        self.assertListEqual(['l', 'm', 'q', 'r'], new_g.tolist())
+        new_g = g.slice_from_rect(Rect(1, 2, 2, 2))
+        self.assertListEqual(['l', 'm', 'q', 'r'], new_g.tolist())
+
+    def test_merge_grid(self):
+        g = IntArrayGrid(4, 4)
+        g.merge_grid(1, 2, IntArrayGrid(2, 2, [1, 2, 3, 4]))
+        g.merge_grid(0, 0, Grid(2, 1, [5, 6]))
+        self.assertListEqual([
+            5, 6, 0, 0,
+            0, 0, 0, 0,
+            0, 1, 2, 0,
+            0, 3, 4, 0,
+        ], g.tolist())
+
+    def test_from_grid(self):
+        g = IntArrayGrid.from_grid(
+            Grid(2, 2, [1, 2, 3, 4]), lambda c: c * 2)
+        self.assertListEqual([2, 4, 6, 8], g.tolist())
+
+
+class TestGridIterators(unittest.TestCase):
+
+    grid_cls = Grid
+
+    def setUp(self):
+        # 4x3 grid, each cell holding its own index
+        self.g = self.grid_cls(4, 3, list(range(12)))
+
+    def test_iter_rows(self):
+        self.assertEqual(
+            [(0, [0, 1, 2, 3]), (1, [4, 5, 6, 7]), (2, [8, 9, 10, 11])],
+            list(self.g.iter_rows()))
+
+    def test_iter_indices(self):
+        for x, y, idx in self.g.iter_indices():
+            self.assertEqual(self.g[x, y], idx)
+        self.assertEqual(12, len(list(self.g.iter_indices())))
+
+    def test_iter_rect(self):
+        self.assertEqual(
+            [(1, 1, 5), (2, 1, 6), (1, 2, 9), (2, 2, 10)],
+            list(self.g.iter_rect(1, 1, 2, 2)))
+
+    def test_iter_rect_clipped(self):
+        self.assertEqual(
+            [(2, 0, 2), (3, 0, 3)], list(self.g.iter_rect(2, -1, 5, 2)))
+        self.assertEqual([], list(self.g.iter_rect(5, 5, 2, 2)))
+
+    def test_iter_where(self):
+        self.assertEqual(
+            [(1, 0, 1), (3, 0, 3), (1, 1, 5)],
+            list(self.g.iter_where(lambda x, y, c: c % 2 and c < 7)))
+
+    def test_iter_where_mask(self):
+        mask = np.zeros((3, 4), dtype=bool)
+        mask[0, 1] = mask[0, 3] = mask[1, 1] = True
+        self.assertEqual(
+            [(1, 0, 1), (3, 0, 3), (1, 1, 5)],
+            list(self.g.iter_where(mask)))
+        self.assertIsInstance(list(self.g.iter_where(mask))[0][2], int)
+
+    def test_iter_where_mask_shape(self):
+        self.assertRaises(
+            GridError, self.g.iter_where, np.zeros((4, 3), dtype=bool))
+
+    def test_values_in_rect(self):
+        self.assertEqual([5, 6, 9, 10], self.g.values_in_rect(1, 1, 2, 2))
+        self.assertEqual([0, 1, 4, 5], self.g.values_in_rect(-1, -1, 3, 3))
+        self.assertIsInstance(self.g.values_in_rect(0, 0, 1, 1)[0], int)
+
+
+class TestArrayGridIterators(TestGridIterators):
+
+    grid_cls = IntArrayGrid
+
+
+class TestCountNeighbors(unittest.TestCase):
+
+    mask = np.array([
+        [1, 0, 0],
+        [0, 1, 0],
+        [1, 1, 0],
+    ], dtype=bool)
+
+    def test_count_neighbors(self):
+        expected = np.array([
+            [1, 2, 1],
+            [4, 3, 2],
+            [2, 2, 2],
+        ])
+        self.assertTrue(np.array_equal(expected, count_neighbors(self.mask)))
+
+    def test_count_neighbors_cardinal_only(self):
+        expected = np.array([
+            [0, 2, 0],
+            [3, 1, 1],
+            [1, 2, 1],
+        ])
+        self.assertTrue(np.array_equal(
+            expected, count_neighbors(self.mask, cardinal_only=True)))
+
+    def test_count_neighbors_out_of_bounds(self):
+        expected = np.array([
+            [6, 5, 6],
+            [7, 3, 5],
+            [7, 5, 7],
+        ])
+        self.assertTrue(np.array_equal(
+            expected, count_neighbors(self.mask, oob_value=True)))
+
+    def test_count_neighbors_out_array(self):
+        out = np.full((3, 3), 42, dtype=np.uint8)
+        res = count_neighbors(self.mask, out=out)
+        self.assertIs(out, res)
+        self.assertTrue(np.array_equal(count_neighbors(self.mask), out))
+
+
+class TestLabelRegions(unittest.TestCase):
+
+    def test_label_regions(self):
+        mask = np.array([
+            [1, 1, 0, 1],
+            [0, 1, 0, 1],
+            [1, 0, 0, 1],
+            [1, 1, 1, 1],
+        ], dtype=bool)
+        labels, sizes = label_regions(mask)
+        expected = np.array([
+            [1, 1, 0, 2],
+            [0, 1, 0, 2],
+            [2, 0, 0, 2],
+            [2, 2, 2, 2],
+        ])
+        self.assertTrue(np.array_equal(expected, labels))
+        self.assertEqual([0, 3, 8], sizes.tolist())
+
+    def test_label_regions_diagonals_dont_connect(self):
+        mask = np.array([[1, 0], [0, 1]], dtype=bool)
+        labels, sizes = label_regions(mask)
+        self.assertEqual([[1, 0], [0, 2]], labels.tolist())
+        self.assertEqual([0, 1, 1], sizes.tolist())
+
+    def test_label_regions_empty(self):
+        labels, sizes = label_regions(np.zeros((3, 4), dtype=bool))
+        self.assertFalse(labels.any())
+        self.assertEqual([0], sizes.tolist())
+
+    def test_label_regions_matches_floodfill(self):
+        rng = np.random.default_rng(3)
+        for _ in range(50):
+            h, w = rng.integers(1, 20, 2)
+            mask = rng.random((h, w)) < .6
+            labels, sizes = label_regions(mask)
+            self.assertEqual(mask.sum(), sizes.sum())
+
+            # Check each region against a naive flood fill
+            for region_id in range(1, len(sizes)):
+                ys, xs = np.nonzero(labels == region_id)
+                seen, stack = set(), [(xs[0], ys[0])]
+                while stack:
+                    x, y = stack.pop()
+                    if (x, y) in seen:
+                        continue
+                    seen.add((x, y))
+                    for dx, dy in Grid.CARDINAL_DIRS:
+                        nx, ny = x + dx, y + dy
+                        if 0 <= nx < w and 0 <= ny < h and mask[ny, nx]:
+                            stack.append((nx, ny))
+                self.assertEqual(sizes[region_id], len(seen))
+                self.assertEqual(
+                    set(zip(xs.tolist(), ys.tolist())),
+                    {(int(x), int(y)) for x, y in seen})
+
+
 class TestEntityGrid(unittest.TestCase):
 
     def test_add_objects(self):
@@ -286,6 +532,94 @@ class TestEntityGrid(unittest.TestCase):
         eg.remove_e(e)
         self.assertIsNone(eg[1,0])
 
+    def test_iter_order(self):
+        eg = EntityGrid(3, 3)
+        eg.add(2, 2, 'a')
+        eg.add(0, 0, 'b')
+        eg.add(1, 0, 'c')
+        self.assertEqual(['a', 'b', 'c'], eg.all)
+        eg.remove(0, 0, 'b')
+        eg[0,0] = 'b'
+        self.assertEqual(
+            [(2, 2, 'a'), (1, 0, 'c'), (0, 0, 'b')], list(eg))
+
+    def test_replace_object(self):
+        eg = EntityGrid(2, 2)
+        eg.add(0, 0, 'obj1')
+        eg.add(0, 0, 'obj2')
+        self.assertEqual(['obj2'], eg.all)
+        self.assertEqual(1, len(eg))
+
+    def test_move(self):
+        eg = EntityGrid(3, 3)
+        eg.add(0, 0, 'a')
+        eg.add(1, 1, 'b')
+        eg.move(0, 0, 2, 2, 'a')
+        self.assertIsNone(eg[0,0])
+        self.assertEqual('a', eg[2,2])
+        # Moved object keeps its place
+        self.assertEqual([(2, 2, 'a'), (1, 1, 'b')], list(eg))
+
+    def test_move_to_occupied_cell(self):
+        eg = EntityGrid(3, 3)
+        eg.add(0, 0, 'a')
+        eg.add(1, 1, 'b')
+        eg.move(0, 0, 1, 1, 'a')
+        self.assertIsNone(eg[0,0])
+        self.assertEqual('a', eg[1,1])
+        # b was replaced
+        self.assertEqual(['a'], eg.all)
+        self.assertEqual(1, len(eg))
+        self.assertEqual([(1, 1, 'a')], eg.objects_in_rect(0, 0, 3, 3))
+
+    def test_move_entity(self):
+        e = Mock(pos=Mock(x=1, y=0))
+        eg = EntityGrid(2, 2)
+        eg.add_e(e)
+        eg.move_e(e, 0, 1)
+        self.assertIsNone(eg[1,0])
+        self.assertEqual(e, eg[0,1])
+        self.assertEqual((0, 1), (e.pos.x, e.pos.y))
+
+    def test_iter_while_moving(self):
+        eg = EntityGrid(3, 3)
+        eg.add(0, 0, 'a')
+        eg.add(1, 1, 'b')
+        for x, y, o in eg:
+            eg.move(x, y, x + 1, y, o)
+        self.assertEqual(['a', 'b'], eg.all)
+
+    def test_version(self):
+        eg = EntityGrid(2, 2)
+        self.assertEqual(0, eg.version)
+        eg.add(0, 0, 'obj')
+        eg.remove(0, 0, 'obj')
+        eg[1,1] = 'obj'
+        self.assertEqual(3, eg.version)
+        eg.touch()
+        self.assertEqual(4, eg.version)
+
+    def test_objects_in_rect(self):
+        eg = EntityGrid(20, 20)
+        eg.add(0, 0, 'a')
+        eg.add(5, 5, 'b')
+        eg.add(9, 9, 'c')
+        eg.add(19, 19, 'd')
+        self.assertEqual(
+            [(5, 5, 'b'), (9, 9, 'c')], sorted(eg.objects_in_rect(4, 4, 6, 6)))
+        self.assertEqual(
+            [(0, 0, 'a')], eg.objects_in_rect(-5, -5, 6, 6))
+        self.assertEqual(
+            [(19, 19, 'd')], eg.objects_in_rect(15, 15, 10, 10))
+        self.assertEqual([], eg.objects_in_rect(1, 1, 4, 4))
+        # Buckets follow moves and removals
+        eg.move(9, 9, 18, 1, 'c')
+        eg.remove(5, 5, 'b')
+        self.assertEqual([], eg.objects_in_rect(4, 4, 6, 6))
+        self.assertEqual([(18, 1, 'c')], eg.objects_in_rect(15, 0, 5, 5))
+        eg[18, 1] = 'e'
+        self.assertEqual([(18, 1, 'e')], eg.objects_in_rect(15, 0, 5, 5))
+
 
 class TestGridContainer(unittest.TestCase):
 
@@ -344,8 +678,78 @@ class TestGridContainer(unittest.TestCase):
     def test_remove_entity(self):
         e = Mock(pos=Mock(x=1, y=0))
         gc = GridContainer(2, 2)
-        gc[1,0].add(e)
+        gc.add(1, 0, e)
         self.assertEqual(len(gc[1,0]), 1)
 
         gc.remove_e(e)
         self.assertEqual(len(gc[1,0]), 0)
+
+    def test_version(self):
+        gc = GridContainer(2, 2)
+        gc.add(0, 0, 'obj1')
+        gc.add(0, 0, 'obj2')
+        gc.remove(0, 0, 'obj1')
+        self.assertEqual(3, gc.version)
+
+    def test_iter_rows(self):
+        gc = GridContainer(2, 2)
+        gc.add(1, 0, 'obj')
+        self.assertEqual(
+            [(0, [frozenset(), {'obj'}]), (1, [frozenset(), frozenset()])],
+            list(gc.iter_rows()))
+
+    def test_move(self):
+        gc = GridContainer(2, 2)
+        gc.add(0, 0, 'obj1')
+        gc.add(0, 0, 'obj2')
+        gc.move(0, 0, 1, 1, 'obj1')
+        self.assertEqual({'obj2'}, gc[0,0])
+        self.assertEqual({'obj1'}, gc[1,1])
+        self.assertEqual([(1, 1, 'obj1'), (0, 0, 'obj2')], list(gc))
+
+    def test_objects_in_rect(self):
+        gc = GridContainer(20, 20)
+        gc.add(1, 1, 'obj1')
+        gc.add(1, 1, 'obj2')
+        gc.add(12, 12, 'obj3')
+        self.assertEqual(
+            [(1, 1, 'obj1'), (1, 1, 'obj2')],
+            sorted(gc.objects_in_rect(0, 0, 5, 5)))
+        gc.move(12, 12, 2, 2, 'obj3')
+        self.assertEqual(3, len(gc.objects_in_rect(0, 0, 5, 5)))
+        self.assertEqual([], gc.objects_in_rect(10, 10, 5, 5))
+
+    def test_sparse_storage(self):
+        gc = GridContainer(10, 10)
+        self.assertEqual(0, len(gc._sets))
+        gc.add(1, 1, 'obj1')
+        gc.add(1, 1, 'obj2')
+        self.assertEqual(1, len(gc._sets))
+        gc.remove(1, 1, 'obj1')
+        gc.remove(1, 1, 'obj2')
+        self.assertEqual(0, len(gc._sets))
+
+    def test_empty_cell(self):
+        gc = GridContainer(2, 2)
+        self.assertEqual(frozenset(), gc[0,0])
+        self.assertFalse(any(gc[0,0]))
+        with self.assertRaises(AttributeError):
+            gc[0,0].add('obj')
+        with self.assertRaises(OutOfBoundGridError):
+            gc[2,2]
+
+    def test_remove_missing_object(self):
+        gc = GridContainer(2, 2)
+        with self.assertRaises(KeyError):
+            gc.remove(0, 0, 'obj')
+
+    def test_set_cell(self):
+        gc = GridContainer(2, 2)
+        with self.assertRaises(GridError):
+            gc[0,0] = {'obj'}
+
+    def test_cells(self):
+        gc = GridContainer(2, 2)
+        gc.add(1, 0, 'obj')
+        self.assertEqual(
+            [frozenset(), {'obj'}, frozenset(), frozenset()], gc.cells)